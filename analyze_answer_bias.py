@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Analyze how the correct answer is distributed over option positions, per
+level, mondai and source, and rank the most skewed exams
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from exam_corpus import LEVELS
+from exam_corpus.answer_bias import AnswerCounts, analyze_answer_bias
+
+
+def format_distribution(counts: AnswerCounts) -> str:
+    """Share of each answer position, per option count: "4: 22/26/27/25%" """
+    parts = []
+    for option_count, row in counts.distribution().items():
+        total = sum(row)
+        if option_count < 3 and total < 10:
+            continue
+        shares = "/".join(f"{count / total * 100:.0f}" for count in row)
+        parts.append(f"{option_count}: {shares}%")
+    return "  ".join(parts)
+
+
+def print_group(title: str, groups: dict):
+    """One line per group: questions, position shares, chi-square and p-value"""
+    print(f"\n{title}")
+    print("-"*78)
+    for name, counts in groups.items():
+        statistic, dof, p_value = counts.chi_square()
+        print(f"{name:<16} {counts.total:>7} {format_distribution(counts):<36} "
+              f"χ²={statistic:>8.1f} (df {dof}) p={p_value:.1e}")
+
+
+def print_report(report: dict, top: int):
+    """Print the distributions and the most skewed mondai and exams"""
+    print("\n" + "="*78)
+    print("🎯 ANSWER POSITION BIAS (share of correct answers at option 1/2/3/4)")
+    print("="*78)
+    print_group("By level:", dict(sorted(report["levels"].items())))
+    print_group("By source:", report["sources"])
+
+    ranked = sorted(report["mondai"].items(), key=lambda item: item[1].chi_square()[2])
+    print_group(f"Most skewed mondai (top {top}):",
+                {f"{level} mondai {mondai}": counts for (level, mondai), counts in ranked[:top]})
+
+    print(f"\nMost skewed exams (top {top}):")
+    print("-"*78)
+    for exam in report["exams"][:top]:
+        print(f"{exam['exam']:<26} {exam['source']:<14} {exam['questions']:>4} questions  "
+              f"χ²={exam['chi_square']:>6.1f} (df {exam['dof']}) p={exam['p_value']:.1e}")
+
+    if report["one_based"]:
+        sources = sorted({exam["source"] for exam in report["one_based"]})
+        print(f"\nℹ️  {len(report['one_based'])} exams store 1-based answers ({', '.join(sources)}) "
+              f"and are left out above")
+    print("-"*78)
+    print(f"⏱️  {report['questions']} questions in {len(report['exams'])} exams "
+          f"({report['skipped']} without a usable answer) in {report['seconds']:.2f}s")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Answer position bias analysis")
+    parser.add_argument("--levels", nargs="+", choices=LEVELS, default=None,
+                        help="levels to analyze (default: all)")
+    parser.add_argument("--top", type=int, default=10,
+                        help="skewed mondai and exams to list (default: 10)")
+    parser.add_argument("--json", type=Path, default=None,
+                        help="also write the ranked exams and distributions to a JSON file")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    print("🔍 Counting answer positions...")
+    report = analyze_answer_bias(levels=args.levels, workers=args.workers)
+    print_report(report, args.top)
+    for relative, error in report["errors"].items():
+        print(f"  ❌ Error processing {relative}: {error}")
+
+    if args.json:
+        def summary(counts: AnswerCounts) -> dict:
+            statistic, dof, p_value = counts.chi_square()
+            return {"distribution": counts.distribution(), "chi_square": statistic,
+                    "dof": dof, "p_value": p_value}
+
+        payload = {
+            "levels": {level: summary(counts) for level, counts in sorted(report["levels"].items())},
+            "sources": {source: summary(counts) for source, counts in report["sources"].items()},
+            "mondai": {f"{level}/{mondai}": summary(counts)
+                       for (level, mondai), counts in sorted(report["mondai"].items(),
+                                                             key=lambda item: (item[0][0], item[0][1]))},
+            "exams": report["exams"],
+            "one_based": report["one_based"],
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        print(f"💾 Report saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
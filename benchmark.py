@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark the corpus maintenance scripts on synthetic exam trees (1x, 10x, 100x)
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from exam_corpus.loader import TIMINGS_ENV
+from exam_corpus.synthetic import generate_corpus
+
+REPO_DIR = Path(__file__).resolve().parent
+
+# script -> extra arguments; --full keeps the manifest from skipping work
+BENCHMARKS = {
+    "validate_exams": ["--full"],
+    "generate_statistics": ["--full"],
+    "fix_statistics": [],
+    "remove_svg_icons": [],
+}
+
+# Scripts that rewrite exams in place run on a fresh copy of the generated
+# tree, so every run (and every later benchmark) sees the same workload
+REWRITES = {"fix_statistics", "remove_svg_icons"}
+
+# Runs one script and reports its wall time and the peak RSS of the largest
+# process (the script or one of its workers) from a fresh parent process
+_RUNNER = """
+import json, resource, subprocess, sys, time
+start = time.perf_counter()
+code = subprocess.call(sys.argv[1:], stdout=subprocess.DEVNULL)
+wall = time.perf_counter() - start
+maxrss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+print(json.dumps({"exit_code": code, "wall_seconds": wall, "maxrss": maxrss}))
+"""
+
+
+def run_script(script: str, args: list, exams_dir: Path, workers: int = None) -> dict:
+    """Run one maintenance script against exams_dir and collect its measurements"""
+    command = [sys.executable, str(REPO_DIR / f"{script}.py"), *args]
+    if workers is not None:
+        command += ["--workers", str(workers)]
+
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        timings_file = f.name
+    env = dict(os.environ, EXAMS_DIR=str(exams_dir))
+    env[TIMINGS_ENV] = timings_file
+    try:
+        output = subprocess.run([sys.executable, "-c", _RUNNER, *command], env=env,
+                                capture_output=True, text=True, check=True).stdout
+        measured = json.loads(output.strip().splitlines()[-1])
+        try:
+            with open(timings_file, "r", encoding="utf-8") as f:
+                loader = json.load(f)
+        except ValueError:
+            loader = {}
+    finally:
+        os.unlink(timings_file)
+
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    maxrss = measured["maxrss"] / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    read = loader.get("read_seconds", 0.0)
+    parse = loader.get("parse_seconds", 0.0)
+    logic = loader.get("transform_seconds", 0.0)
+    # Scripts whose workers read the files themselves (streaming scans) have
+    # no separate read/parse time to split off
+    busy = read + parse + logic if read + parse else 0
+    return {
+        "exit_code": measured["exit_code"],
+        "wall_seconds": measured["wall_seconds"],
+        "peak_rss_mb": maxrss,
+        "worker_read_seconds": read,
+        "worker_parse_seconds": parse,
+        "worker_logic_seconds": logic,
+        "parse_share": (read + parse) / busy if busy else None,
+    }
+
+
+def compare(results: list, baseline_path: Path, threshold: float):
+    """Print wall-time changes against a previous results file"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["scale"], r["script"]): r for r in json.load(f)["results"]}
+
+    print("\n" + "="*60)
+    print(f"📉 COMPARISON WITH {baseline_path}")
+    print("="*60)
+    regressions = 0
+    for result in results:
+        previous = baseline.get((result["scale"], result["script"]))
+        if not previous:
+            continue
+        change = result["wall_seconds"] / previous["wall_seconds"] - 1
+        mark = "⚠️ " if change > threshold else "  "
+        regressions += change > threshold
+        print(f"{mark} {result['scale']:>4}x {result['script']:<22} "
+              f"{previous['wall_seconds']:8.2f}s -> {result['wall_seconds']:8.2f}s ({change:+.1%})")
+    if regressions:
+        print(f"\n⚠️  {regressions} benchmark(s) slower by more than {threshold:.0%}")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark the maintenance scripts")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10],
+                        help="corpus sizes as multiples of the real corpus (e.g. 1 10 100)")
+    parser.add_argument("--scripts", nargs="+", default=list(BENCHMARKS), choices=list(BENCHMARKS),
+                        help="scripts to benchmark")
+    parser.add_argument("--corpus-dir", type=Path,
+                        default=Path(tempfile.gettempdir()) / "jlpt_exam_bench",
+                        help="where synthetic trees are generated (reused across runs)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed for the synthetic corpus")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes for generation and the scripts")
+    parser.add_argument("--output", type=Path, default=REPO_DIR / "benchmark_results.json",
+                        help="machine-readable results file")
+    parser.add_argument("--baseline", type=Path, default=None,
+                        help="previous results file to compare wall times against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="slowdown reported as a regression (default: 0.10)")
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scales:
+        tree = args.corpus_dir / f"{scale}x"
+        print(f"🧪 Generating {scale}x synthetic corpus in {tree}...")
+        start = time.perf_counter()
+        corpus = generate_corpus(tree / "exams", scale, args.seed, args.workers)
+        mb = corpus["bytes"] / 1024 / 1024
+        print(f"   {corpus['files']:,} files, {mb:.1f} MB ({time.perf_counter() - start:.1f}s)")
+
+        for script in args.scripts:
+            print(f"   ⏱️  {script}...", end="", flush=True)
+            exams_dir = tree / "exams"
+            if script in REWRITES:
+                exams_dir = tree / "work" / "exams"
+                shutil.rmtree(exams_dir.parent, ignore_errors=True)
+                shutil.copytree(tree / "exams", exams_dir)
+            try:
+                measured = run_script(script, BENCHMARKS[script], exams_dir, args.workers)
+            finally:
+                if script in REWRITES:
+                    shutil.rmtree(exams_dir.parent, ignore_errors=True)
+            wall = max(measured["wall_seconds"], 1e-9)
+            result = {
+                "scale": scale,
+                "script": script,
+                "files": corpus["files"],
+                "mb": mb,
+                **measured,
+                "files_per_second": corpus["files"] / wall,
+                "mb_per_second": mb / wall,
+            }
+            results.append(result)
+            share = result["parse_share"]
+            print(f" {wall:.2f}s, {result['files_per_second']:,.0f} files/s, "
+                  f"{result['mb_per_second']:.1f} MB/s, peak RSS {result['peak_rss_mb']:.0f} MB"
+                  + (f", parse {share:.0%}" if share is not None else "")
+                  + ("" if result["exit_code"] == 0 else f" ❌ exit code {result['exit_code']}"))
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "workers": args.workers,
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Results saved to: {args.output}")
+
+    if args.baseline:
+        compare(results, args.baseline, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Build or update the single-file exam archive (exams.jxa), read exams from it,
+and compare a sequential archive scan with reading the tree file by file
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from exam_corpus import EXAMS_DIR, discover_exam_files
+from exam_corpus.archive import ARCHIVE_PATH, ExamArchive, update_archive
+
+
+def scan_tree(exams_dir: Path, parse: bool) -> tuple:
+    """Read (and parse) every exam file by file; returns (bytes read, seconds)"""
+    start = time.perf_counter()
+    total = 0
+    for path, _, _ in discover_exam_files(exams_dir=exams_dir):
+        with open(path, "rb") as f:
+            raw = f.read()
+        if parse:
+            json.loads(raw)
+        total += len(raw)
+    return total, time.perf_counter() - start
+
+
+def scan_archive(archive_path: Path, parse: bool) -> tuple:
+    """Read (and parse) every exam from the archive in file order"""
+    start = time.perf_counter()
+    total = 0
+    with ExamArchive(archive_path) as archive:
+        for entry, view in archive:
+            raw = bytes(view)
+            if parse:
+                json.loads(raw)
+            total += entry["length"]
+            view.release()
+    return total, time.perf_counter() - start
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Build the single-file exam archive")
+    parser.add_argument("--archive", type=Path, default=ARCHIVE_PATH,
+                        help=f"archive file (default: {ARCHIVE_PATH.name} next to the exams tree)")
+    parser.add_argument("--full", action="store_true",
+                        help="rebuild the archive instead of appending changed exams")
+    parser.add_argument("--get", metavar="ID",
+                        help="print one exam's JSON from the archive and exit")
+    parser.add_argument("--scan", action="store_true",
+                        help="time a full scan of the archive against reading the tree")
+    args = parser.parse_args()
+
+    if args.get:
+        with ExamArchive(args.archive) as archive:
+            if args.get not in archive:
+                print(f"❌ No exam '{args.get}' in {args.archive}", file=sys.stderr)
+                sys.exit(1)
+            view = archive.get(args.get)
+            sys.stdout.buffer.write(view)
+            view.release()
+        return
+
+    print(f"🗄️  Updating {args.archive}...")
+    report = update_archive(args.archive, EXAMS_DIR, full=args.full)
+    action = "rebuilt" if report["rebuilt"] else "updated"
+    print(f"   {report['entries']} exams, {report['written']} written, "
+          f"{report['removed']} removed ({action} in {report['seconds']:.2f}s)")
+    if report["garbage_bytes"]:
+        print(f"   {report['garbage_bytes'] / 1024 / 1024:.1f}MB of replaced bytes "
+              f"(rebuilt once more than half the file)")
+
+    if args.scan:
+        for parse in (False, True):
+            print(f"\n⏱️  Full scan ({'read + parse' if parse else 'read'} every exam):")
+            # Tree first, so both scans run with the same page cache state
+            tree_bytes, tree_seconds = scan_tree(EXAMS_DIR, parse)
+            archive_bytes, archive_seconds = scan_archive(args.archive, parse)
+            print(f"   Tree:    {tree_bytes / 1024 / 1024:.1f}MB in {tree_seconds:.2f}s "
+                  f"({tree_bytes / 1024 / 1024 / tree_seconds:.0f} MB/s)")
+            print(f"   Archive: {archive_bytes / 1024 / 1024:.1f}MB in {archive_seconds:.2f}s "
+                  f"({archive_bytes / 1024 / 1024 / archive_seconds:.0f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
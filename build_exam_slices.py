@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Build per-skill exam slices (exam_slices/) used by the API for ?skills= requests
+"""
+
+import argparse
+import time
+
+from exam_corpus import LEVELS
+from exam_corpus.slices import SLICES_DIR, build_slices
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Build per-skill exam slices")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--full", action="store_true",
+                        help="rebuild every slice instead of only those of changed files")
+    parser.add_argument("--levels", nargs="+", default=None, choices=LEVELS,
+                        help="levels to build (default: all)")
+    args = parser.parse_args()
+
+    print("🔪 Building exam slices...")
+    start = time.perf_counter()
+    summary = build_slices(args.levels, workers=args.workers, full=args.full)
+    elapsed = time.perf_counter() - start
+
+    print(f"   {summary['files']} exams: {summary['built']} built, "
+          f"{summary['unchanged']} unchanged, {summary['removed']} stale slices removed")
+    if summary["built"]:
+        print(f"   {summary['bytes'] / 1024 / 1024:.1f} MB written")
+    for relative, error in summary["errors"].items():
+        print(f"  ❌ Error processing {relative}: {error}")
+    print(f"✅ Done in {elapsed:.2f}s, slices in {SLICES_DIR}")
+
+
+if __name__ == "__main__":
+    main()
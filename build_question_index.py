@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Build the columnar question index (question_index/) and run ad-hoc counts on it
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from exam_corpus.question_index import INDEX_DIR, QuestionIndex, build_index
+
+
+def parse_condition(text: str):
+    """Parse column=value, converting numeric values"""
+    column, _, value = text.partition("=")
+    if not value:
+        raise argparse.ArgumentTypeError(f"Expected column=value, got {text!r}")
+    return column, int(value) if value.lstrip("-").isdigit() else value
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Build or query the columnar question index")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--index-dir", type=Path, default=INDEX_DIR,
+                        help="where to store the index")
+    parser.add_argument("--query", action="store_true",
+                        help="query the existing index instead of rebuilding it")
+    parser.add_argument("--where", type=parse_condition, action="append", default=[],
+                        metavar="COLUMN=VALUE", help="filter rows (repeatable)")
+    parser.add_argument("--by", nargs="+", default=[], metavar="COLUMN",
+                        help="group the count by these columns")
+    args = parser.parse_args()
+
+    if not args.query:
+        print("🏗️  Building question index...")
+        start = time.perf_counter()
+        meta = build_index(args.index_dir, workers=args.workers)
+        print(f"✅ Indexed {meta['rows']:,} questions from {len(meta['exams'])} exams "
+              f"in {time.perf_counter() - start:.2f}s")
+        for relative, error in meta["errors"].items():
+            print(f"  ❌ {relative}: {error}")
+        print(f"💾 Index saved to: {args.index_dir}")
+        if not args.where and not args.by:
+            return
+
+    with QuestionIndex(args.index_dir) as index:
+        where = dict(args.where)
+        start = time.perf_counter()
+        if args.by:
+            counts = index.count_by(*args.by, **where)
+            elapsed = time.perf_counter() - start
+            for key, count in sorted(counts.items(), key=lambda item: str(item[0])):
+                print(f"   {key}: {count:,}")
+        else:
+            print(f"   {index.count(**where):,} questions")
+            elapsed = time.perf_counter() - start
+        print(f"⏱️  Query took {elapsed * 1000:.1f} ms over {index.rows:,} rows")
+
+
+if __name__ == "__main__":
+    main()
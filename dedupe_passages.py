@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Deduplicate passage HTML into a content-addressed store, or expand it back
+"""
+
+import argparse
+from pathlib import Path
+
+from exam_corpus import EXAMS_DIR
+from exam_corpus.passages import STORE_NAME, compact_tree, expand_tree
+
+
+def print_compact_report(report: dict):
+    """Print bytes saved per level"""
+    print("\n" + "="*60)
+    print("📊 PASSAGE DEDUPLICATION REPORT")
+    print("="*60)
+    print(f"{'Level':<8} {'Files':<8} {'Original':>12} {'Compacted':>12} {'Saved':>12}")
+    print("-"*60)
+
+    total_original = total_compacted = 0
+    for level in sorted(report["levels"]):
+        stats = report["levels"][level]
+        saved = stats["original"] - stats["compacted"]
+        total_original += stats["original"]
+        total_compacted += stats["compacted"]
+        print(f"{level:<8} {stats['files']:<8} {stats['original'] / 1024 / 1024:>10.1f}MB "
+              f"{stats['compacted'] / 1024 / 1024:>10.1f}MB {saved / 1024 / 1024:>10.1f}MB")
+
+    store_mb = report["store_bytes"] / 1024 / 1024
+    net = total_original - total_compacted - report["store_bytes"]
+    print("-"*60)
+    print(f"📦 {STORE_NAME}: {report['passages']:,} distinct passages, {store_mb:.1f}MB")
+    if total_original:
+        print(f"✨ Net saving: {net / 1024 / 1024:.1f}MB "
+              f"({net / total_original * 100:.1f}% of {total_original / 1024 / 1024:.1f}MB)")
+    print(f"⏱️  {report['written']} files written in {report['seconds']:.2f}s")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Deduplicate or expand exam passages")
+    parser.add_argument("command", choices=["compact", "expand"],
+                        help="compact: exams tree -> deduplicated tree; expand: the reverse")
+    parser.add_argument("--source", type=Path, default=None,
+                        help="tree to read (default: exams/ for compact)")
+    parser.add_argument("--out", type=Path, default=None,
+                        help="tree to write")
+    parser.add_argument("--verify", type=Path, default=None, metavar="DIR",
+                        help="expand: check the expanded bytes against the original tree")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        if args.out is None:
+            parser.error("compact requires --out")
+        source = args.source or EXAMS_DIR
+        print(f"🗜️  Compacting {source} -> {args.out}...")
+        report = compact_tree(args.out, exams_dir=source, workers=args.workers)
+        print_compact_report(report)
+    else:
+        if args.source is None:
+            parser.error("expand requires --source")
+        print(f"📤 Expanding {args.source}...")
+        report = expand_tree(args.source, args.out, args.verify, workers=args.workers)
+        print(f"   {report['files']} files expanded, {report['written']} written")
+        if args.verify is not None:
+            if report["mismatches"]:
+                print(f"❌ {len(report['mismatches'])} files differ from {args.verify}:")
+                for relative in report["mismatches"][:20]:
+                    print(f"   - {relative}")
+            else:
+                print(f"✅ Round trip is byte-identical to {args.verify}")
+
+    for relative, error in report["errors"].items():
+        print(f"  ❌ Error processing {relative}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Shared helpers for the exam maintenance scripts
+"""
+
+from .loader import (
+    EXAMS_DIR,
+    LEVELS,
+    SOURCES,
+    ExamFile,
+    discover_exam_files,
+    iter_exams,
+    timing_report,
+)
+from .manifest import MANIFEST_PATH, Manifest, fingerprint
+from .mapping import MAPPING_FILE, MONDAI_PART_MAPPING, PARTS, part_for
+from .writer import atomic_write_bytes, dumps_exam, write_exam
+
+__all__ = [
+    "EXAMS_DIR",
+    "LEVELS",
+    "MANIFEST_PATH",
+    "MAPPING_FILE",
+    "MONDAI_PART_MAPPING",
+    "PARTS",
+    "SOURCES",
+    "ExamFile",
+    "Manifest",
+    "atomic_write_bytes",
+    "discover_exam_files",
+    "dumps_exam",
+    "fingerprint",
+    "iter_exams",
+    "part_for",
+    "timing_report",
+    "write_exam",
+]
@@ -0,0 +1,244 @@
+"""
+Answer-position bias analysis
+
+AnswerCounts is a fixed-size table of how often each position holds the
+correct answer, kept separately for each number of options (a question
+with 3 options should put its answer in each position a third of the
+time, one with 4 a quarter). Tables are plain arrays: adding a question is
+one increment, two tables merge by adding them element-wise, and
+to_bytes/from_bytes move them between processes, so each worker counts its
+exams and the main process only merges.
+
+The bias score is Pearson's chi-square against a uniform answer position,
+summed over the option counts (degrees of freedom: options - 1 each), with
+its p-value from the regularized upper incomplete gamma function.
+
+Some exams (the official ones) store 1-based answers: no answer is ever 0
+and some equal the option count. Ranked as 0-based they look like the most
+biased exams of all, so they are detected per exam, kept out of the
+tallies and the ranking, and listed separately.
+"""
+
+import math
+import time
+from array import array
+from collections import defaultdict
+from operator import add
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .loader import EXAMS_DIR, iter_exams
+
+# Questions with more options than this are not counted
+MAX_OPTIONS = 8
+
+_CELLS = (MAX_OPTIONS + 1) * MAX_OPTIONS
+
+
+class AnswerCounts:
+    """Correct-answer positions per option count: counts[options * MAX_OPTIONS + answer]"""
+
+    __slots__ = ("counts",)
+
+    def __init__(self, counts: Optional[array] = None):
+        self.counts = counts if counts is not None else array("I", bytes(4 * _CELLS))
+
+    def add(self, option_count: int, answer: int) -> bool:
+        """Count one question; False if it cannot be counted"""
+        if not 2 <= option_count <= MAX_OPTIONS or not 0 <= answer < option_count:
+            return False
+        self.counts[option_count * MAX_OPTIONS + answer] += 1
+        return True
+
+    def merge(self, other: "AnswerCounts") -> "AnswerCounts":
+        """Add another table into this one"""
+        self.counts = array("I", map(add, self.counts, other.counts))
+        return self
+
+    def to_bytes(self) -> bytes:
+        return self.counts.tobytes()
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "AnswerCounts":
+        counts = array("I")
+        counts.frombytes(payload)
+        return cls(counts)
+
+    def row(self, option_count: int) -> List[int]:
+        start = option_count * MAX_OPTIONS
+        return self.counts[start:start + option_count].tolist()
+
+    def distribution(self) -> Dict[int, List[int]]:
+        """option count -> answers per position, for the option counts seen"""
+        rows = {}
+        for option_count in range(2, MAX_OPTIONS + 1):
+            row = self.row(option_count)
+            if any(row):
+                rows[option_count] = row
+        return rows
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def chi_square(self) -> Tuple[float, int, float]:
+        """(statistic, degrees of freedom, p-value) against uniform answer positions"""
+        statistic, dof = 0.0, 0
+        for option_count, row in self.distribution().items():
+            expected = sum(row) / option_count
+            statistic += sum((observed - expected) ** 2 for observed in row) / expected
+            dof += option_count - 1
+        return statistic, dof, chi_square_sf(statistic, dof)
+
+
+def chi_square_sf(statistic: float, dof: int) -> float:
+    """P(X >= statistic) for a chi-square distribution with dof degrees of freedom"""
+    if dof <= 0:
+        return 1.0
+    if statistic <= 0:
+        return 1.0
+    return _upper_gamma(dof / 2, statistic / 2)
+
+
+def _upper_gamma(a: float, x: float) -> float:
+    """Regularized upper incomplete gamma Q(a, x)"""
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1:
+        # Series for P(a, x)
+        term = total = 1.0 / a
+        n = a
+        for _ in range(1000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+    # Continued fraction for Q(a, x) (modified Lentz)
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.exp(log_prefix) * h
+
+
+def answer_base(answers: Iterable[Tuple[int, int]]) -> int:
+    """1 if (option count, answer) pairs look 1-based (no 0, some equal to the count), else 0"""
+    zero = at_count = False
+    for option_count, answer in answers:
+        zero = zero or answer == 0
+        at_count = at_count or answer == option_count
+    return 1 if at_count and not zero else 0
+
+
+def exam_answer_base(data: dict) -> int:
+    """answer_base over every question of a parsed exam (0 or 1)"""
+    return answer_base((len(question["options"]), question["answer"])
+                       for section in data.get("sections", [])
+                       for question in section.get("questions", [])
+                       if isinstance(question.get("options"), list)
+                       and isinstance(question.get("answer"), int))
+
+
+def exam_answer_counts(file_path: Path, data: dict) -> dict:
+    """
+    Worker transform: answer counts of one exam, whole and per mondai
+
+    Returns:
+        {"source", "base": 0 or 1, "exam": table bytes, "mondai": {mondai:
+        table bytes}, "skipped"}, counted from the zero-based answers
+    """
+    answers = []
+    for section in data.get("sections", []):
+        for question in section.get("questions", []):
+            options = question.get("options")
+            answer = question.get("answer")
+            if isinstance(options, list) and isinstance(answer, int):
+                answers.append((section.get("mondai"), len(options), answer))
+            else:
+                answers.append((section.get("mondai"), None, None))
+    base = answer_base((count, answer) for _, count, answer in answers if count is not None)
+
+    exam = AnswerCounts()
+    per_mondai: Dict[int, AnswerCounts] = {}
+    skipped = 0
+    for mondai, option_count, answer in answers:
+        table = per_mondai.setdefault(mondai, AnswerCounts())
+        if option_count is not None and table.add(option_count, answer - base):
+            exam.add(option_count, answer - base)
+        else:
+            skipped += 1
+    return {
+        "source": data.get("source"),
+        "base": base,
+        "exam": exam.to_bytes(),
+        "mondai": {mondai: table.to_bytes() for mondai, table in per_mondai.items()},
+        "skipped": skipped,
+    }
+
+
+def analyze_answer_bias(levels: Optional[Iterable] = None,
+                        sources: Optional[Iterable[str]] = None,
+                        workers: Optional[int] = None,
+                        exams_dir: Path = EXAMS_DIR) -> dict:
+    """
+    Answer-position counts per level, per (level, mondai) and per source,
+    plus every exam ranked by bias, in one pass.
+
+    Returns:
+        Report with levels, mondai, sources (AnswerCounts), exams (dicts with
+        exam, level, source, questions, chi_square, dof, p_value, most
+        biased first), one_based (exams with 1-based answers, left out of
+        everything else: exam, level, source, questions), questions,
+        skipped, errors and seconds
+    """
+    start = time.perf_counter()
+    by_level: Dict[str, AnswerCounts] = defaultdict(AnswerCounts)
+    by_mondai: Dict[Tuple[str, int], AnswerCounts] = defaultdict(AnswerCounts)
+    by_source: Dict[str, AnswerCounts] = defaultdict(AnswerCounts)
+    exams = []
+    one_based = []
+    report = {"questions": 0, "skipped": 0, "errors": {}}
+
+    for record in iter_exams(levels=levels, sources=sources, workers=workers,
+                             transform=exam_answer_counts, exams_dir=exams_dir):
+        if record.error:
+            report["errors"][record.path.relative_to(exams_dir).as_posix()] = record.error
+            continue
+        exam = AnswerCounts.from_bytes(record.data["exam"])
+        source = record.data["source"] or record.source
+        if record.data["base"]:
+            one_based.append({"exam": record.path.stem, "level": record.level, "source": source,
+                              "questions": exam.total})
+            continue
+        by_level[record.level].merge(exam)
+        by_source[source].merge(exam)
+        for mondai, payload in record.data["mondai"].items():
+            by_mondai[(record.level, mondai)].merge(AnswerCounts.from_bytes(payload))
+
+        statistic, dof, p_value = exam.chi_square()
+        questions = exam.total
+        exams.append({"exam": record.path.stem, "level": record.level, "source": source,
+                      "questions": questions, "chi_square": statistic, "dof": dof,
+                      "p_value": p_value})
+        report["questions"] += questions
+        report["skipped"] += record.data["skipped"]
+
+    # Smallest p-value first; p-values that underflow to 0 by chi-square per dof
+    exams.sort(key=lambda exam: (exam["p_value"], -exam["chi_square"] / max(exam["dof"], 1)))
+    report.update(levels=dict(by_level), mondai=dict(by_mondai), sources=dict(by_source),
+                  exams=exams, one_based=one_based, seconds=time.perf_counter() - start)
+    return report
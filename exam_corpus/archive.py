@@ -0,0 +1,320 @@
+"""
+Single-file, memory-mapped archive of the exams tree
+
+Layout:
+
+    header  magic "JXA1" | u32 version | u64 index offset | u64 index length
+    data    the raw JSON bytes of each exam, back to back
+    index   compact JSON list of entries:
+            {"id", "path", "level", "source", "offset", "length", "hash", "mtime_ns"}
+
+The index sits after the data it describes, so update_archive only appends
+the exams that changed, followed by a new index, and then rewrites the
+header to point at it; the header write is the commit point, and a crash
+before it leaves the previous archive intact. Replaced bytes stay in the
+file as garbage until it exceeds MAX_GARBAGE of the file, when the archive
+is rebuilt in discovery order. Exams that were only touched are not worth
+a new index: their stored mtime is refreshed with the next real append,
+and until then they are recognized by checksum.
+
+ExamArchive maps the file once: get() returns a zero-copy memoryview of an
+exam's bytes, and iteration walks the entries in file order, so a full scan
+is one sequential read instead of thousands of open/stat calls.
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .loader import (
+    EXAMS_DIR, ExamFile, Transform, bytes_hash, discover_exam_files, map_records, normalize_level
+)
+
+ARCHIVE_PATH = EXAMS_DIR.parent / "exams.jxa"
+ARCHIVE_VERSION = 1
+MAGIC = b"JXA1"
+
+# Rebuild instead of appending once this share of the file is dead bytes
+MAX_GARBAGE = 0.5
+
+_HEADER = struct.Struct("<4sIQQ")
+
+
+class ExamArchive:
+    """Read-only view of an archive file"""
+
+    def __init__(self, path: Path = ARCHIVE_PATH):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buf = memoryview(self.map)
+
+        magic, version, index_offset, index_length = _HEADER.unpack_from(self.buf)
+        if magic != MAGIC or version != ARCHIVE_VERSION:
+            self.close()
+            raise ValueError(f"{self.path}: not an exam archive (version {ARCHIVE_VERSION})")
+        self.index_offset = index_offset
+        self.index_end = index_offset + index_length
+        self.entries: List[dict] = json.loads(bytes(self.buf[index_offset:self.index_end]))
+        self.by_id: Dict[str, dict] = {entry["id"]: entry for entry in self.entries}
+
+    def close(self):
+        self.buf.release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, exam_id: str) -> bool:
+        return exam_id in self.by_id
+
+    def view(self, entry: dict) -> memoryview:
+        return self.buf[entry["offset"]:entry["offset"] + entry["length"]]
+
+    def get(self, exam_id: str) -> memoryview:
+        """Zero-copy view of one exam's JSON bytes"""
+        return self.view(self.by_id[exam_id])
+
+    def load(self, exam_id: str) -> dict:
+        """Parse one exam"""
+        return json.loads(str(self.get(exam_id), "utf-8"))
+
+    def verify(self, exam_id: str) -> bool:
+        """Check an exam's bytes against the checksum in the index"""
+        return bytes_hash(self.get(exam_id)) == self.by_id[exam_id]["hash"]
+
+    def select(self, levels: Optional[Iterable] = None,
+               sources: Optional[Iterable[str]] = None) -> List[dict]:
+        """Entries of some levels/sources, in discovery order"""
+        level_names = None if levels is None else {normalize_level(level) for level in levels}
+        source_names = None if sources is None else set(sources)
+        return [entry for entry in self.entries
+                if (level_names is None or entry["level"] in level_names)
+                and (source_names is None or entry["source"] in source_names)]
+
+    def __iter__(self) -> Iterator[Tuple[dict, memoryview]]:
+        """(entry, bytes view) of every exam in file order, for sequential scans"""
+        if hasattr(self.map, "madvise"):
+            self.map.madvise(mmap.MADV_SEQUENTIAL)
+        for entry in sorted(self.entries, key=lambda entry: entry["offset"]):
+            yield entry, self.view(entry)
+
+
+def _write_header(f, index_offset: int, index_length: int):
+    f.seek(0)
+    f.write(_HEADER.pack(MAGIC, ARCHIVE_VERSION, index_offset, index_length))
+
+
+def _entry(path: Path, level: str, source: str, exams_dir: Path, raw: bytes, offset: int,
+           mtime_ns: int) -> dict:
+    return {
+        "id": path.stem,
+        "path": path.relative_to(exams_dir).as_posix(),
+        "level": level,
+        "source": source,
+        "offset": offset,
+        "length": len(raw),
+        "hash": bytes_hash(raw),
+        "mtime_ns": mtime_ns,
+    }
+
+
+def _rebuild(archive_path: Path, files: List[Tuple[Path, str, str]], exams_dir: Path) -> dict:
+    temp = archive_path.with_name(f".{archive_path.name}.tmp")
+    entries = []
+    with open(temp, "wb") as f:
+        offset = _HEADER.size
+        f.write(b"\0" * offset)
+        for path, level, source in files:
+            # mtime of the handle before reading: a later edit shows up as a change
+            with open(path, "rb") as exam:
+                mtime_ns = os.fstat(exam.fileno()).st_mtime_ns
+                raw = exam.read()
+            entries.append(_entry(path, level, source, exams_dir, raw, offset, mtime_ns))
+            f.write(raw)
+            offset += len(raw)
+        index = json.dumps(entries, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        f.write(index)
+        _write_header(f, offset, len(index))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, archive_path)
+    return {"entries": len(entries), "written": len(entries), "rebuilt": True}
+
+
+def update_archive(archive_path: Path = ARCHIVE_PATH,
+                   exams_dir: Path = EXAMS_DIR,
+                   full: bool = False,
+                   max_garbage: float = MAX_GARBAGE) -> dict:
+    """
+    Bring the archive in line with the exams tree, appending only changed exams.
+
+    Unchanged exams are recognized by size and mtime, then by checksum; an
+    exam whose bytes did not change is never rewritten.
+
+    Returns:
+        Report with entries, written (exams whose bytes were written),
+        touched (unchanged exams with a new mtime), removed, rebuilt,
+        garbage_bytes and seconds
+    """
+    start = time.perf_counter()
+    archive_path = Path(archive_path)
+    exams_dir = Path(exams_dir)
+    files = discover_exam_files(exams_dir=exams_dir)
+
+    old = None
+    if not full and archive_path.exists():
+        try:
+            old = ExamArchive(archive_path)
+        except (ValueError, OSError, struct.error):
+            old = None
+    if old is None:
+        report = _rebuild(archive_path, files, exams_dir)
+        report.update(touched=0, removed=0, garbage_bytes=0, seconds=time.perf_counter() - start)
+        return report
+
+    entries = []
+    changed: List[Tuple[int, bytes]] = []
+    touched = 0
+    with old:
+        for path, level, source in files:
+            stat = path.stat()
+            relative = path.relative_to(exams_dir).as_posix()
+            previous = old.by_id.get(path.stem)
+            if previous is not None and previous["path"] != relative:
+                previous = None
+            if (previous is not None and previous["length"] == stat.st_size
+                    and previous["mtime_ns"] == stat.st_mtime_ns):
+                entries.append(previous)
+                continue
+            with open(path, "rb") as f:
+                raw = f.read()
+            entry = _entry(path, level, source, exams_dir, raw, 0, stat.st_mtime_ns)
+            if previous is not None and previous["hash"] == entry["hash"]:
+                # Touched but identical: keep the stored bytes
+                entries.append(dict(previous, mtime_ns=stat.st_mtime_ns))
+                touched += 1
+                continue
+            changed.append((len(entries), raw))
+            entries.append(entry)
+        old_entries = old.entries
+        data_end, index_end = old.index_offset, old.index_end
+
+    current = {entry["id"] for entry in entries}
+    removed = sum(1 for entry in old_entries if entry["id"] not in current)
+    live = sum(entry["length"] for entry in entries)
+    same_exams = [entry["id"] for entry in entries] == [entry["id"] for entry in old_entries]
+    if not changed and same_exams:
+        # Nothing but mtimes differ: keep the current index rather than append a copy
+        return {"entries": len(entries), "written": 0, "touched": touched, "removed": 0,
+                "rebuilt": False, "garbage_bytes": data_end - _HEADER.size - live,
+                "seconds": time.perf_counter() - start}
+
+    new_end = index_end + sum(len(raw) for _, raw in changed)
+    if new_end - _HEADER.size - live > max_garbage * new_end:
+        report = _rebuild(archive_path, files, exams_dir)
+        report.update(touched=0, removed=removed, garbage_bytes=0,
+                      seconds=time.perf_counter() - start)
+        return report
+
+    # Append after the current index, so the archive stays valid until the header moves
+    with open(archive_path, "r+b") as f:
+        f.seek(index_end)
+        offset = index_end
+        for position, raw in changed:
+            entries[position]["offset"] = offset
+            f.write(raw)
+            offset += len(raw)
+        index = json.dumps(entries, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        f.write(index)
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+        _write_header(f, offset, len(index))
+        f.flush()
+        os.fsync(f.fileno())
+
+    return {"entries": len(entries), "written": len(changed), "touched": touched,
+            "removed": removed, "rebuilt": False, "garbage_bytes": offset - _HEADER.size - live,
+            "seconds": time.perf_counter() - start}
+
+
+# Archives mapped by this process, so each worker maps the file only once
+_ARCHIVES: Dict[Path, ExamArchive] = {}
+
+
+def _load_entry(task) -> ExamFile:
+    """Parse and optionally transform one archived exam (runs in a worker)"""
+    archive_path, (path, level, source), entry, transform = task
+    record = ExamFile(path=path, level=level, source=source)
+    if entry is None:
+        record.error = "Not in the archive"
+        return record
+    record.size, record.mtime_ns, record.hash = entry["length"], entry["mtime_ns"], entry["hash"]
+    try:
+        if archive_path not in _ARCHIVES:
+            _ARCHIVES[archive_path] = ExamArchive(archive_path)
+        archive = _ARCHIVES[archive_path]
+        start = time.perf_counter()
+        text = str(archive.view(entry), "utf-8")
+        parsed_at = time.perf_counter()
+        record.read_seconds = parsed_at - start
+        record.data = json.loads(text)
+        record.parse_seconds = time.perf_counter() - parsed_at
+    except Exception as e:
+        record.data = None
+        record.error = f"Cannot read entry: {e}"
+        return record
+
+    if transform is not None:
+        start = time.perf_counter()
+        try:
+            record.data = transform(path, record.data)
+        except Exception as e:
+            record.data = None
+            record.error = str(e)
+        record.transform_seconds = time.perf_counter() - start
+    return record
+
+
+def iter_archive(archive_path: Path = ARCHIVE_PATH,
+                 levels: Optional[Iterable] = None,
+                 sources: Optional[Iterable[str]] = None,
+                 workers: Optional[int] = None,
+                 transform: Optional[Transform] = None,
+                 exams_dir: Path = EXAMS_DIR,
+                 chunksize: int = 8,
+                 files: Optional[List[Tuple[Path, str, str]]] = None) -> Iterator[ExamFile]:
+    """
+    iter_exams over an archive: the same records, in the same order, but
+    read from the mapped archive instead of one file per exam. Record paths
+    point into exams_dir, as if the exams had been read from the tree, and
+    carry the size, mtime and checksum stored for them. Exams are always
+    parsed, so a transform never receives None.
+
+    Args:
+        files: Explicit (path, level, source) list under exams_dir to load
+            instead of selecting entries by levels/sources; a file missing
+            from the archive yields a record with an error
+    """
+    archive_path = Path(archive_path).resolve()
+    exams_dir = Path(exams_dir)
+    with ExamArchive(archive_path) as archive:
+        if files is None:
+            tasks = [(archive_path, (exams_dir / entry["path"], entry["level"], entry["source"]),
+                      entry, transform) for entry in archive.select(levels, sources)]
+        else:
+            by_path = {entry["path"]: entry for entry in archive.entries}
+            tasks = [(archive_path, file, by_path.get(file[0].relative_to(exams_dir).as_posix()),
+                      transform) for file in files]
+    yield from map_records(_load_entry, tasks, workers, chunksize)
@@ -0,0 +1,304 @@
+"""
+Plan / apply changesets for bulk exam rewrites
+
+A changeset is a list of changes, one per modified JSON value:
+
+    {"file": "N1/custom/jlpt4you_N1_1.json", "pointer": "/sections/3/part",
+     "old": "reading", "new": "grammar"}
+
+A change without "old" adds a value, one without "new" removes it. Plans are
+computed in parallel with iter_exams and stored as JSON Lines, so they can be
+reviewed first and later applied to this tree or to a replica copy.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from .loader import EXAMS_DIR, ExamFile, discover_exam_files, iter_exams
+from .writer import atomic_write_bytes, write_exam
+
+_MISSING = object()
+
+# (path, data) -> changes for that file, without the "file" key
+Planner = Callable[[Path, dict], List[dict]]
+
+
+class ChangeConflict(ValueError):
+    """A change does not match the current contents of the file"""
+
+
+def escape_token(token) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def unescape_token(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_change(pointer: str, old=_MISSING, new=_MISSING) -> dict:
+    change = {"pointer": pointer}
+    if old is not _MISSING:
+        change["old"] = old
+    if new is not _MISSING:
+        change["new"] = new
+    return change
+
+
+def diff_documents(old, new, pointer: str = "") -> List[dict]:
+    """
+    Compute the changes that turn old into new.
+
+    Dicts are compared key by key; lists of equal length element by element;
+    anything else (including lists whose length changed) is replaced whole.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key, value in old.items():
+            child = f"{pointer}/{escape_token(key)}"
+            if key not in new:
+                changes.append(make_change(child, old=value))
+            else:
+                changes.extend(diff_documents(value, new[key], child))
+        for key, value in new.items():
+            if key not in old:
+                changes.append(make_change(f"{pointer}/{escape_token(key)}", new=value))
+        return changes
+
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        changes = []
+        for index, (a, b) in enumerate(zip(old, new)):
+            changes.extend(diff_documents(a, b, f"{pointer}/{index}"))
+        return changes
+
+    if type(old) is type(new) and old == new:
+        return []
+    return [make_change(pointer, old=old, new=new)]
+
+
+def _resolve_parent(doc, pointer: str):
+    """Return (container, last token) for a JSON pointer"""
+    if not pointer.startswith("/"):
+        raise ChangeConflict(f"Invalid pointer: {pointer!r}")
+    tokens = [unescape_token(t) for t in pointer[1:].split("/")]
+
+    target = doc
+    for token in tokens[:-1]:
+        try:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise ChangeConflict(f"Path not found: {pointer}")
+
+    last = tokens[-1]
+    if isinstance(target, list):
+        try:
+            last = int(last)
+        except ValueError:
+            raise ChangeConflict(f"Invalid list index in {pointer}")
+    return target, last
+
+
+def _describe(value) -> str:
+    return "nothing" if value is _MISSING else repr(value)
+
+
+def apply_changes(doc, changes: Iterable[dict]):
+    """
+    Apply changes to a parsed document in place.
+
+    Raises:
+        ChangeConflict: If a value differs from the change's "old" value
+    """
+    for change in changes:
+        pointer = change["pointer"]
+        if pointer == "":
+            raise ChangeConflict("Replacing the whole document is not supported")
+        container, key = _resolve_parent(doc, pointer)
+
+        try:
+            current = container[key]
+        except (KeyError, IndexError):
+            current = _MISSING
+        expected = change.get("old", _MISSING)
+        if _MISSING in (current, expected):
+            matches = current is expected
+        else:
+            matches = current == expected
+        if not matches:
+            raise ChangeConflict(f"{pointer}: expected {_describe(expected)}, "
+                                 f"found {_describe(current)}")
+
+        if "new" in change:
+            container[key] = change["new"]
+        elif current is not _MISSING:
+            del container[key]
+    return doc
+
+
+def plan_changeset(planner: Planner,
+                   levels: Optional[Iterable] = None,
+                   sources: Optional[Iterable[str]] = None,
+                   workers: Optional[int] = None,
+                   exams_dir: Path = EXAMS_DIR) -> Iterator[ExamFile]:
+    """
+    Run a planner over the corpus in parallel without writing anything.
+
+    Yields:
+        ExamFile records whose data is the file's list of changes, each
+        tagged with its path relative to exams_dir
+    """
+    for record in iter_exams(levels, sources, workers, transform=planner, exams_dir=exams_dir):
+        if not record.error:
+            relative = record.path.relative_to(exams_dir).as_posix()
+            record.data = [dict(change, file=relative) for change in record.data or []]
+        yield record
+
+
+def write_changeset(path: Path, changes: Iterable[dict]):
+    """Store a changeset as JSON Lines"""
+    lines = [json.dumps(change, ensure_ascii=False) for change in changes]
+    atomic_write_bytes(Path(path), ("\n".join(lines) + "\n" if lines else "").encode("utf-8"))
+
+
+def read_changeset(path: Path) -> List[dict]:
+    """Load a changeset written by write_changeset"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def group_by_file(changes: Iterable[dict]) -> Dict[str, List[dict]]:
+    """Group changes by file, keeping first-seen file order"""
+    grouped: Dict[str, List[dict]] = {}
+    for change in changes:
+        grouped.setdefault(change["file"], []).append(change)
+    return grouped
+
+
+def _print_progress(done: int, total: int, nbytes: int, start: float, stream=sys.stdout):
+    width = 30
+    filled = int(width * done / total) if total else width
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    stream.write(f"\r   [{'#' * filled}{'.' * (width - filled)}] {done}/{total} files "
+                 f"{done / elapsed:7.1f} files/s {nbytes / 1024 / 1024 / elapsed:6.1f} MB/s")
+    stream.flush()
+
+
+def apply_changeset(changes: Iterable[dict],
+                    exams_dir: Path = EXAMS_DIR,
+                    progress: bool = True) -> dict:
+    """
+    Apply a changeset in one batched pass.
+
+    Args:
+        changes: Changes as produced by plan_changeset/read_changeset
+        exams_dir: Tree to apply them to (may be a replica of the planned tree)
+        progress: Print a progress bar with throughput numbers
+
+    Returns:
+        Summary with files, written (relative paths of the files whose bytes
+        changed), conflicts (file -> message), bytes, seconds
+    """
+    grouped = group_by_file(changes)
+    summary = {"files": len(grouped), "written": [], "conflicts": {}, "bytes": 0, "seconds": 0.0}
+    start = time.perf_counter()
+
+    for done, (relative, file_changes) in enumerate(grouped.items(), 1):
+        path = exams_dir / relative
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            summary["bytes"] += len(raw)
+            data = apply_changes(json.loads(raw), file_changes)
+            if write_exam(path, data):
+                summary["written"].append(relative)
+        except (OSError, ValueError) as e:
+            summary["conflicts"][relative] = str(e)
+
+        if progress:
+            _print_progress(done, len(grouped), summary["bytes"], start)
+
+    if progress and grouped:
+        sys.stdout.write("\n")
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+
+def add_changeset_arguments(parser):
+    """Add the shared --dry-run/--plan/--apply/--exams-dir options to a script"""
+    parser.add_argument("--exams-dir", type=Path, default=EXAMS_DIR,
+                        help="root of the exams tree (e.g. a replica copy)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--dry-run", action="store_true",
+                       help="compute and print the plan without writing anything")
+    group.add_argument("--plan", type=Path, metavar="FILE",
+                       help="write the planned changeset to FILE (JSON Lines) without applying it")
+    group.add_argument("--apply", type=Path, metavar="FILE",
+                       help="apply a changeset previously written with --plan")
+
+
+def run_changeset_command(args, planner: Planner,
+                          levels: Optional[Iterable] = None) -> Optional[Dict[str, dict]]:
+    """
+    Plan (in parallel) and apply (in one batched pass) according to the options
+    added by add_changeset_arguments.
+
+    Returns:
+        level -> {"total": files in the tree, "updated": files actually
+        written} for the summary, or None if nothing was applied
+        (--dry-run / --plan)
+    """
+    counts: Dict[str, dict] = {}
+
+    if args.apply:
+        changes = read_changeset(args.apply)
+        print(f"📥 Loaded {len(changes)} changes from {args.apply}")
+        for _, level, _ in discover_exam_files(levels, exams_dir=args.exams_dir):
+            counts.setdefault(level, {"total": 0, "updated": 0})["total"] += 1
+    else:
+        changes = []
+        print("🧮 Planning changes...")
+        current_level = None
+        for record in plan_changeset(planner, levels, workers=args.workers, exams_dir=args.exams_dir):
+            if record.level != current_level:
+                current_level = record.level
+                print(f"\n📂 Planning {current_level}...")
+            level_counts = counts.setdefault(record.level, {"total": 0, "updated": 0})
+            level_counts["total"] += 1
+            if record.error:
+                print(f"  ❌ Error processing {record.name}: {record.error}")
+            elif record.data:
+                changes.extend(record.data)
+                print(f"  📝 {record.name}: {len(record.data)} change(s)")
+
+        files = len(group_by_file(changes))
+        print(f"\n🧾 Plan: {len(changes)} changes in {files} files")
+
+        if args.plan:
+            write_changeset(args.plan, changes)
+            print(f"💾 Changeset saved to: {args.plan}")
+            return None
+        if args.dry_run:
+            for change in changes:
+                print(f"   {json.dumps(change, ensure_ascii=False)}")
+            print("ℹ️  Dry run: no files were modified")
+            return None
+
+    if changes:
+        print("\n✍️  Applying changes...")
+    summary = apply_changeset(changes, args.exams_dir)
+    if summary["files"]:
+        mb = summary["bytes"] / 1024 / 1024
+        seconds = max(summary["seconds"], 1e-9)
+        print(f"   {len(summary['written'])} files written in {summary['seconds']:.2f}s "
+              f"({summary['files'] / seconds:.1f} files/s, {mb / seconds:.1f} MB/s)")
+
+    # Only files whose bytes changed count as updated
+    for relative in summary["written"]:
+        level = relative.split("/", 1)[0]
+        counts.setdefault(level, {"total": 0, "updated": 0})["updated"] += 1
+    for relative, message in summary["conflicts"].items():
+        print(f"  ❌ Conflict in {relative}: {message}")
+
+    return counts
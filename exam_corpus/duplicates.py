@@ -0,0 +1,324 @@
+"""
+Near-duplicate question detection with MinHash and LSH
+
+Each question is reduced to its plain text plus options (furigana, tags and
+whitespace removed, NFKC-normalized) and split into character trigrams.
+Questions with the same normalized text are exact duplicates and are
+grouped by hash first, so only one MinHash signature per distinct text is
+needed. Signatures use one-permutation hashing: every shingle is hashed
+once and kept as the minimum of one of NUM_HASHES buckets, with empty
+buckets filled from their right-hand neighbour, which makes a signature
+O(shingles) instead of O(shingles x hashes).
+
+Signatures are split into bands; texts sharing any band of the same
+(level, part, context) are candidates, and a candidate pair is linked when
+the share of equal hash values (the estimated Jaccard similarity) reaches
+the threshold. Linked texts form clusters through a union-find, so the
+whole run is near-linear in the number of questions. The context is the
+question's passage or audio: the same question asked about a different
+passage, recording or picture is not a duplicate. Listening questions with
+no audio, passage or picture (e.g. "1番" with options 1-4) are only told
+apart by a recording the corpus does not have, so they are never grouped.
+
+Only texts with at least MIN_SHINGLES trigrams containing a letter get a
+signature; shorter ones ("2番|1|2|3") only ever match exactly.
+"""
+
+import json
+import re
+import time
+import unicodedata
+from array import array
+from collections import defaultdict
+from operator import eq
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .loader import EXAMS_DIR, iter_exams
+from .manifest import bytes_hash
+from .search import plain_text
+from .writer import atomic_write_bytes
+
+NUM_HASHES = 64
+BANDS = 16
+THRESHOLD = 0.8
+
+# Texts with fewer trigrams containing a letter than this only ever match exactly
+MIN_SHINGLES = 5
+
+POOL_PATH = EXAMS_DIR.parent / "question_pool.jsonl"
+
+_MASK = (1 << 64) - 1
+_EMPTY = _MASK
+
+_SRC = re.compile(r"""\bsrc\s*=\s*["']([^"']+)""")
+
+
+def _normalize(text: str) -> str:
+    return "".join(unicodedata.normalize("NFKC", text).split())
+
+
+def normalize_question(question: dict) -> str:
+    """Comparable text of a question: text and options, no markup or spacing"""
+    parts = [plain_text(question.get("text"))]
+    options = question.get("options")
+    if isinstance(options, list):
+        parts.extend(plain_text(option) for option in options)
+    return _normalize("|".join(parts))
+
+
+def question_media(question: dict) -> List[str]:
+    """Image and media sources in the text and options (plain_text drops them)"""
+    values = [question.get("text")]
+    options = question.get("options")
+    if isinstance(options, list):
+        values.extend(options)
+    return [src for value in values if isinstance(value, str) and "src" in value
+            for src in _SRC.findall(value)]
+
+
+def _context(question: dict, passages: Dict[str, str], unique: str = "") -> str:
+    """
+    Passage hash, audio and pictures of a question, or unique if it has none
+    (for questions that only a missing recording tells apart)
+    """
+    parts = []
+    passage = question.get("passage")
+    if isinstance(passage, str) and passage:
+        if passage not in passages:
+            text = _normalize(plain_text(passage)) + "\x1f".join(_SRC.findall(passage))
+            passages[passage] = bytes_hash(text.encode("utf-8"))
+        parts.append(passages[passage])
+    if question.get("audioURL"):
+        parts.append(question["audioURL"])
+    parts.extend(question_media(question))
+    return "\x1f".join(parts) or unique
+
+
+def minhash(text: str, num_hashes: int = NUM_HASHES) -> Optional[bytes]:
+    """
+    One-permutation MinHash signature of the character trigrams of text.
+
+    Returns:
+        num_hashes little-endian u64 values, or None if text is too short
+    """
+    trigrams = set(zip(text, text[1:], text[2:]))
+    if sum(1 for trigram in trigrams if any(char.isalpha() for char in trigram)) < MIN_SHINGLES:
+        return None
+    shingles = {(ord(a) << 42) | (ord(b) << 21) | ord(c) for a, b, c in trigrams}
+    signature = [_EMPTY] * num_hashes
+    for shingle in shingles:
+        # splitmix64 finalizer: a fixed, well-mixed 64-bit hash of the trigram
+        h = (shingle + 0x9E3779B97F4A7C15) & _MASK
+        h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+        h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & _MASK
+        h ^= h >> 31
+        bucket = h % num_hashes
+        if h < signature[bucket]:
+            signature[bucket] = h
+    # Densify: an empty bucket borrows the next filled one (with its distance)
+    for bucket in range(num_hashes):
+        if signature[bucket] == _EMPTY:
+            for distance in range(1, num_hashes):
+                value = signature[(bucket + distance) % num_hashes]
+                if value != _EMPTY:
+                    signature[bucket] = (value + distance) & (_MASK - 1)
+                    break
+    return array("Q", signature).tobytes()
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    first, second = array("Q", a), array("Q", b)
+    return sum(map(eq, first, second)) / len(first)
+
+
+# Signatures already computed by this process, by normalized-text hash
+_SIGNATURES: Dict[str, Optional[bytes]] = {}
+
+
+def question_signatures(file_path: Path, data: dict) -> List[tuple]:
+    """
+    Worker transform: one row per question
+
+    Returns:
+        (section index, question index, part, mondai, number, key, context,
+        signature) tuples, where key is the hash of the normalized text
+    """
+    rows = []
+    passages: Dict[str, str] = {}
+    for s, section in enumerate(data.get("sections", [])):
+        part = section.get("part")
+        for q, question in enumerate(section.get("questions", [])):
+            text = normalize_question(question)
+            key = bytes_hash(text.encode("utf-8"))
+            if key not in _SIGNATURES:
+                _SIGNATURES[key] = minhash(text)
+            unique = f"{file_path.stem}/{s}/{q}" if part == "listening" else ""
+            rows.append((s, q, part, section.get("mondai"), question.get("number"), key,
+                         _context(question, passages, unique), _SIGNATURES[key]))
+    return rows
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: Dict[int, int] = {}
+
+    def find(self, item: int) -> int:
+        root = item
+        while self.parent.get(root, root) != root:
+            root = self.parent[root]
+        while item != root:
+            self.parent[item], item = root, self.parent.get(item, item)
+        return root
+
+    def union(self, a: int, b: int):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def find_duplicates(levels: Optional[Iterable] = None,
+                    sources: Optional[Iterable[str]] = None,
+                    threshold: float = THRESHOLD,
+                    bands: int = BANDS,
+                    workers: Optional[int] = None,
+                    exams_dir: Path = EXAMS_DIR) -> dict:
+    """
+    Cluster duplicate and near-duplicate questions per level and part.
+
+    Returns:
+        Report with questions, distinct (normalized texts), clusters, levels
+        (level -> part -> questions, clusters, duplicates), errors and seconds.
+        Each cluster has level, part, kind ("exact" or "near"), similarity
+        (lowest linked pair) and members: (exam id, section index, question
+        index, mondai, number) in corpus order; the first member is the one
+        kept in the pool.
+    """
+    start = time.perf_counter()
+    rows_per_band = NUM_HASHES // bands
+    # Distinct texts, numbered in corpus order: (level, part, context, key) -> id
+    text_ids: Dict[tuple, int] = {}
+    signatures: List[Optional[bytes]] = []
+    groups: List[tuple] = []
+    members: List[list] = []
+    report = {"questions": 0, "errors": {}}
+    exam_order: Dict[str, int] = {}
+
+    for record in iter_exams(levels=levels, sources=sources, workers=workers,
+                             transform=question_signatures, exams_dir=exams_dir):
+        if record.error:
+            report["errors"][record.path.relative_to(exams_dir).as_posix()] = record.error
+            continue
+        exam_id = record.path.stem
+        exam_order[exam_id] = len(exam_order)
+        for s, q, part, mondai, number, key, context, signature in record.data:
+            group = (record.level, part, context)
+            text_id = text_ids.setdefault(group + (key,), len(signatures))
+            if text_id == len(signatures):
+                signatures.append(signature)
+                groups.append(group)
+                members.append([])
+            members[text_id].append((exam_id, s, q, mondai, number))
+            report["questions"] += 1
+
+    # LSH: texts sharing a band within the same group are candidates
+    links = _UnionFind()
+    lowest: Dict[int, float] = {}
+    buckets: Dict[tuple, List[int]] = {}
+    for text_id, signature in enumerate(signatures):
+        if signature is None:
+            continue
+        candidates = set()
+        for band in range(bands):
+            band_key = (groups[text_id], band,
+                        signature[band * rows_per_band * 8:(band + 1) * rows_per_band * 8])
+            bucket = buckets.setdefault(band_key, [])
+            candidates.update(bucket)
+            bucket.append(text_id)
+        for other in candidates:
+            if links.find(other) == links.find(text_id):
+                continue
+            score = similarity(signature, signatures[other])
+            if score >= threshold:
+                root_score = min(lowest.get(links.find(other), 1.0),
+                                 lowest.get(links.find(text_id), 1.0), score)
+                links.union(other, text_id)
+                lowest[links.find(text_id)] = root_score
+
+    clustered: Dict[int, List[int]] = defaultdict(list)
+    for text_id in range(len(signatures)):
+        clustered[links.find(text_id)].append(text_id)
+
+    clusters = []
+    levels_report: Dict[str, Dict[str, dict]] = defaultdict(
+        lambda: defaultdict(lambda: {"questions": 0, "clusters": 0, "duplicates": 0}))
+    for text_id, group in enumerate(groups):
+        levels_report[group[0]][group[1]]["questions"] += len(members[text_id])
+    for root, text_group in clustered.items():
+        questions = sorted((member for text_id in text_group for member in members[text_id]),
+                           key=lambda member: (exam_order[member[0]], member[1], member[2]))
+        if len(questions) < 2:
+            continue
+        level, part, _ = groups[root]
+        clusters.append({
+            "level": level,
+            "part": part,
+            "kind": "exact" if len(text_group) == 1 else "near",
+            "similarity": lowest.get(root, 1.0),
+            "members": questions,
+        })
+        stats = levels_report[level][part]
+        stats["clusters"] += 1
+        stats["duplicates"] += len(questions) - 1
+
+    clusters.sort(key=lambda cluster: (cluster["level"], str(cluster["part"]), -len(cluster["members"])))
+    report.update(
+        distinct=len(signatures),
+        clusters=clusters,
+        levels={level: dict(parts) for level, parts in levels_report.items()},
+        seconds=time.perf_counter() - start,
+    )
+    return report
+
+
+def write_pool(report: dict, pool_path: Path = POOL_PATH,
+               levels: Optional[Iterable] = None,
+               sources: Optional[Iterable[str]] = None,
+               exams_dir: Path = EXAMS_DIR) -> int:
+    """
+    Write the deduplicated question pool: every question except the later
+    members of each cluster, one JSON object per line with level, part,
+    mondai, exam, duplicates (cluster size) and the question itself (with
+    its passage inlined, as in the exams).
+
+    Returns:
+        Number of questions written
+    """
+    dropped = set()
+    sizes = {}
+    for cluster in report["clusters"]:
+        kept, *rest = cluster["members"]
+        sizes[kept[:3]] = len(cluster["members"])
+        dropped.update(member[:3] for member in rest)
+
+    lines = []
+    for record in iter_exams(levels=levels, sources=sources, exams_dir=exams_dir):
+        if record.error:
+            continue
+        exam_id = record.path.stem
+        for s, section in enumerate(record.data.get("sections", [])):
+            for q, question in enumerate(section.get("questions", [])):
+                ref = (exam_id, s, q)
+                if ref in dropped:
+                    continue
+                lines.append(json.dumps({
+                    "level": record.level,
+                    "part": section.get("part"),
+                    "mondai": section.get("mondai"),
+                    "exam": exam_id,
+                    "duplicates": sizes.get(ref, 1),
+                    "question": question,
+                }, ensure_ascii=False))
+    atomic_write_bytes(Path(pool_path), ("\n".join(lines) + "\n").encode("utf-8"))
+    return len(lines)
@@ -0,0 +1,451 @@
+"""
+Inverted kanji / n-gram index over question text, options and passages
+
+Text is reduced to plain text (no tags or furigana, NFKC) and cut into
+runs of Japanese characters; every run contributes its character bigrams
+and every kanji its own unigram. A question is indexed under the tokens of
+its text, its options and its passage.
+
+kanji_index/ holds two files:
+
+    postings-<generation>.bin
+                  the postings of every token, back to back. A token's
+                  postings are records, one per exam containing it:
+                  varint exam delta (ordinals are delta-encoded) | u8 count |
+                  count u8 question positions within the exam
+    meta.json     the postings file name, exams (path, level, size, mtime,
+                  hash, per-question part and mondai, live flag) and the
+                  token table (offset, length, last exam ordinal)
+
+Every write goes to a new postings generation, and meta.json is replaced
+only after it is complete. The offsets in meta.json therefore always
+belong to the postings file it names, even after a crash mid-update. Older
+generations are removed once meta.json points past them.
+
+Building is a map-reduce: worker processes turn exams into per-exam
+postings, and the main process appends them to each token's record list.
+Updates are incremental: files whose size and mtime (failing that, content
+hash) match the index are skipped. Changed and new exams are tokenized
+again and get new ordinals at the end, so their records append to the
+existing postings without touching them. The ordinals they replace are
+flagged dead, and readers skip those records. Once dead exams hold
+MAX_GARBAGE of the indexed questions, the index is rebuilt from scratch.
+
+KanjiIndex maps the postings and answers queries in disjunctive normal
+form (terms joined by AND, groups joined by OR) with level and part
+filters. A term matches questions containing all of its bigrams (a single
+kanji: its unigram), so a term of three or more characters can, rarely,
+match a question containing its bigrams but not the whole term.
+"""
+
+import json
+import mmap
+import re
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from .loader import EXAMS_DIR, ExamFile, discover_exam_files, iter_exams, natural_key, normalize_level
+from .manifest import bytes_hash
+from .mapping import PARTS
+from .search import plain_text
+from .writer import atomic_write_bytes
+
+INDEX_DIR = EXAMS_DIR.parent / "kanji_index"
+INDEX_VERSION = 2
+
+# Rebuild once this share of the postings belongs to replaced or removed exams
+MAX_GARBAGE = 0.5
+
+# Question positions and their count are stored in one byte each
+MAX_QUESTIONS = 255
+
+PART_CODES = {part: part[0] for part in PARTS}
+
+_RUN = re.compile(r"[ぁ-ゟ゠-ヿ㐀-䶿一-鿿豈-﫿々〆ヵヶ]+")
+_KANJI = re.compile(r"[㐀-䶿一-鿿豈-﫿々]")
+
+
+def text_tokens(text: str) -> Set[str]:
+    """Bigrams of each Japanese run, plus single kanji"""
+    tokens = set()
+    for run in _RUN.findall(unicodedata.normalize("NFKC", text)):
+        tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+        tokens.update(_KANJI.findall(run))
+    return tokens
+
+
+def term_tokens(term: str) -> Set[str]:
+    """
+    Tokens a question must all contain to match term.
+
+    Raises:
+        ValueError: If term is a single kana or has no Japanese characters
+    """
+    runs = _RUN.findall(unicodedata.normalize("NFKC", term))
+    tokens = set()
+    for run in runs:
+        if len(run) == 1:
+            if not _KANJI.match(run):
+                raise ValueError(f"'{term}': single kana are not indexed")
+            tokens.add(run)
+        else:
+            tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+    if not tokens:
+        raise ValueError(f"'{term}' has no Japanese characters to look up")
+    return tokens
+
+
+def exam_postings(file_path: Path, data: dict) -> dict:
+    """
+    Worker transform: one exam's postings
+
+    Returns:
+        {"parts": one code per question, "mondai": [...],
+        "postings": {token: bytes of question positions}}
+    """
+    positions: Dict[str, bytearray] = {}
+    passages: Dict[str, Set[str]] = {}
+    parts = []
+    mondai = []
+    position = 0
+    for section in data.get("sections", []):
+        part = PART_CODES.get(section.get("part"), "?")
+        for question in section.get("questions", []):
+            if position >= MAX_QUESTIONS:
+                raise ValueError(f"More than {MAX_QUESTIONS} questions")
+            texts = [plain_text(question.get("text"))]
+            options = question.get("options")
+            if isinstance(options, list):
+                texts.extend(plain_text(option) for option in options)
+            tokens = text_tokens("\n".join(texts))
+            passage = question.get("passage")
+            if isinstance(passage, str) and passage:
+                if passage not in passages:
+                    passages[passage] = text_tokens(plain_text(passage))
+                tokens |= passages[passage]
+            for token in tokens:
+                if token not in positions:
+                    positions[token] = bytearray()
+                positions[token].append(position)
+            parts.append(part)
+            mondai.append(section.get("mondai"))
+            position += 1
+    return {"parts": "".join(parts), "mondai": mondai,
+            "postings": {token: bytes(local) for token, local in positions.items()}}
+
+
+def _varint(value: int) -> bytes:
+    if value < 0x80:
+        return bytes((value,))
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+class _PostingsBuilder:
+    """Appends exam records to token postings"""
+
+    def __init__(self, tokens: Optional[Dict[str, list]] = None):
+        # token -> [old postings (bytes or memoryview), new records, last exam ordinal]
+        self.tokens: Dict[str, list] = tokens or {}
+
+    def add_exam(self, ordinal: int, postings: Dict[str, bytes]):
+        for token, local in postings.items():
+            entry = self.tokens.get(token)
+            if entry is None:
+                entry = self.tokens[token] = [b"", bytearray(), -1]
+            delta = ordinal - entry[2] if entry[2] >= 0 else ordinal
+            entry[1] += _varint(delta)
+            entry[1].append(len(local))
+            entry[1] += local
+            entry[2] = ordinal
+
+    def write(self, path: Path) -> Dict[str, list]:
+        """Write the postings file; returns the token table"""
+        table = {}
+        chunks = []
+        offset = 0
+        for token in sorted(self.tokens):
+            old, new, last = self.tokens[token]
+            length = len(old) + len(new)
+            chunks.append(old)
+            chunks.append(new)
+            table[token] = [offset, length, last]
+            offset += length
+        atomic_write_bytes(path, b"".join(chunks))
+        return table
+
+
+def _exam_entry(relative: str, record: ExamFile) -> dict:
+    """Index entry of a tokenized exam, as of the bytes its worker read"""
+    return {"path": relative, "level": record.level, "source": record.source,
+            "size": record.size, "mtime_ns": record.mtime_ns, "hash": record.hash,
+            "parts": record.data["parts"], "mondai": record.data["mondai"], "live": True}
+
+
+def _read_meta(index_dir: Path) -> Optional[dict]:
+    try:
+        with open(index_dir / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != INDEX_VERSION or not (index_dir / meta["postings"]).exists():
+        return None
+    return meta
+
+
+def _next_postings(index_dir: Path) -> str:
+    generations = [int(path.stem.split("-")[1]) for path in index_dir.glob("postings-*.bin")
+                   if path.stem.split("-")[1].isdigit()]
+    return f"postings-{max(generations, default=0) + 1}.bin"
+
+
+def build_index(index_dir: Path = INDEX_DIR,
+                exams_dir: Path = EXAMS_DIR,
+                workers: Optional[int] = None,
+                full: bool = False,
+                max_garbage: float = MAX_GARBAGE) -> dict:
+    """
+    Create or update the index.
+
+    Returns:
+        Report with exams, tokenized (exams read again), removed, rebuilt,
+        tokens, postings_bytes, garbage (share of dead records), errors and
+        seconds
+    """
+    start = time.perf_counter()
+    index_dir = Path(index_dir)
+    exams_dir = Path(exams_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    files = discover_exam_files(exams_dir=exams_dir)
+    report = {"exams": len(files), "tokenized": 0, "removed": 0, "errors": {}}
+
+    meta = None if full else _read_meta(index_dir)
+    rebuilt = meta is None
+    touched = 0
+    exams: List[dict] = meta["exams"] if meta else []
+    live = {entry["path"]: ordinal for ordinal, entry in enumerate(exams) if entry["live"]}
+
+    pending = []
+    current = set()
+    for path, level, source in files:
+        relative = path.relative_to(exams_dir).as_posix()
+        current.add(relative)
+        ordinal = live.get(relative)
+        if ordinal is not None:
+            stat = path.stat()
+            entry = exams[ordinal]
+            if (entry["size"], entry["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+                continue
+            if entry["size"] == stat.st_size and entry["hash"] == bytes_hash(path.read_bytes()):
+                # Touched but identical
+                entry["mtime_ns"] = stat.st_mtime_ns
+                touched += 1
+                continue
+        pending.append((path, level, source))
+
+    for relative, ordinal in live.items():
+        if relative not in current:
+            exams[ordinal]["live"] = False
+            report["removed"] += 1
+
+    builder = _PostingsBuilder()
+    if meta:
+        # Unchanged postings are copied over as they are
+        view = memoryview((index_dir / meta["postings"]).read_bytes())
+        builder = _PostingsBuilder({token: [view[offset:offset + length], bytearray(), last]
+                                    for token, (offset, length, last) in meta["tokens"].items()})
+
+    for record in iter_exams(workers=workers, transform=exam_postings, files=pending,
+                             checksum=True):
+        relative = record.path.relative_to(exams_dir).as_posix()
+        if record.error:
+            report["errors"][relative] = record.error
+            continue
+        ordinal = live.get(relative)
+        if ordinal is not None and exams[ordinal]["hash"] == record.hash:
+            exams[ordinal].update(size=record.size, mtime_ns=record.mtime_ns)
+            touched += 1
+            continue
+        if ordinal is not None:
+            exams[ordinal]["live"] = False
+        builder.add_exam(len(exams), record.data["postings"])
+        exams.append(_exam_entry(relative, record))
+        report["tokenized"] += 1
+
+    dead = sum(len(entry["parts"]) for entry in exams if not entry["live"])
+    total = sum(len(entry["parts"]) for entry in exams)
+    rebuild = meta is not None and total and dead / total > max_garbage
+    if rebuild:
+        return build_index(index_dir, exams_dir, workers, full=True, max_garbage=max_garbage)
+
+    changed = rebuilt or report["tokenized"] or report["removed"]
+    postings = _next_postings(index_dir) if changed else meta["postings"]
+    table = builder.write(index_dir / postings) if changed else meta["tokens"]
+    builder = None
+    if changed or touched:
+        meta = {"version": INDEX_VERSION, "postings": postings, "exams": exams, "tokens": table}
+        atomic_write_bytes(index_dir / "meta.json",
+                           json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    for path in index_dir.glob("postings*.bin"):
+        if path.name != postings:
+            path.unlink()
+
+    report.update(
+        rebuilt=rebuilt,
+        tokens=len(table),
+        postings_bytes=(index_dir / postings).stat().st_size,
+        garbage=dead / total if total else 0.0,
+        seconds=time.perf_counter() - start,
+    )
+    return report
+
+
+class KanjiIndex:
+    """Memory-mapped reader"""
+
+    def __init__(self, index_dir: Path = INDEX_DIR):
+        self.index_dir = Path(index_dir)
+        for _ in range(3):
+            meta = _read_meta(self.index_dir)
+            if meta is None:
+                raise FileNotFoundError(f"No kanji index (version {INDEX_VERSION}) in {self.index_dir}")
+            try:
+                f = open(self.index_dir / meta["postings"], "rb")
+                break
+            except FileNotFoundError:
+                # An update replaced meta.json and removed this generation meanwhile
+                continue
+        else:
+            raise FileNotFoundError(f"The kanji index in {self.index_dir} keeps changing")
+        self.exams: List[dict] = meta["exams"]
+        self.tokens: Dict[str, list] = meta["tokens"]
+        self.live = [entry["live"] for entry in self.exams]
+        self.exam_ids = [Path(entry["path"]).stem for entry in self.exams]
+        # Results come out in corpus order: level, source, natural file order
+        order = sorted(range(len(self.exams)),
+                       key=lambda ordinal: natural_key(self.exams[ordinal]["path"]))
+        self.rank = {ordinal: rank for rank, ordinal in enumerate(order)}
+        with f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.tokens else None
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def postings(self, token: str, exams: Optional[List[bool]] = None) -> Dict[int, bytes]:
+        """
+        exam ordinal -> question positions, for the exams containing token
+        among exams (flags by ordinal; default: the live ones)
+        """
+        entry = self.tokens.get(token)
+        if entry is None:
+            return {}
+        offset, length, _ = entry
+        buf = self.map[offset:offset + length]
+        result = {}
+        ordinal = 0
+        i = 0
+        end = len(buf)
+        live = self.live if exams is None else exams
+        while i < end:
+            delta = shift = 0
+            while True:
+                byte = buf[i]
+                i += 1
+                delta |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+            ordinal += delta
+            count = buf[i]
+            if live[ordinal]:
+                result[ordinal] = buf[i + 1:i + 1 + count]
+            i += 1 + count
+        return result
+
+    def match_term(self, term: str, exams: Optional[List[bool]] = None) -> Dict[int, Set[int]]:
+        """exam ordinal -> positions of the questions containing every token of term"""
+        lists = sorted((self.postings(token, exams) for token in term_tokens(term)), key=len)
+        exams = set(lists[0])
+        for other in lists[1:]:
+            exams.intersection_update(other)
+        result = {}
+        for ordinal in exams:
+            positions = set(lists[0][ordinal])
+            for other in lists[1:]:
+                positions.intersection_update(other[ordinal])
+            if positions:
+                result[ordinal] = positions
+        return result
+
+    def query(self, groups: Sequence[Sequence[str]],
+              levels: Optional[Iterable] = None,
+              parts: Optional[Iterable[str]] = None) -> List[dict]:
+        """
+        Questions matching any group, where a group matches if all of its
+        terms do, in corpus order.
+
+        Returns:
+            Dicts with exam, path, level, position (in the exam), part and mondai
+        """
+        exams = self.live
+        if levels is not None:
+            level_names = {normalize_level(level) for level in levels}
+            exams = [live and entry["level"] in level_names
+                     for live, entry in zip(self.live, self.exams)]
+        part_codes = None if parts is None else {PART_CODES[part] for part in parts}
+
+        matches: Dict[int, Set[int]] = {}
+        for group in groups:
+            found: Optional[Dict[int, Set[int]]] = None
+            for term in sorted(group, key=len, reverse=True):
+                term_matches = self.match_term(term, exams)
+                if found is None:
+                    found = term_matches
+                else:
+                    found = {ordinal: found[ordinal] & positions
+                             for ordinal, positions in term_matches.items() if ordinal in found}
+                if not found:
+                    break
+            for ordinal, positions in (found or {}).items():
+                matches.setdefault(ordinal, set()).update(positions)
+
+        part_names = {code: part for part, code in PART_CODES.items()}
+        results = []
+        for ordinal in sorted(matches, key=self.rank.get):
+            entry = self.exams[ordinal]
+            for position in sorted(matches[ordinal]):
+                if part_codes is not None and entry["parts"][position] not in part_codes:
+                    continue
+                results.append({
+                    "exam": self.exam_ids[ordinal],
+                    "path": entry["path"],
+                    "level": entry["level"],
+                    "position": position,
+                    "part": part_names.get(entry["parts"][position]),
+                    "mondai": entry["mondai"][position],
+                })
+        return results
+
+
+def parse_query(text: str) -> List[List[str]]:
+    """'緊張 試験 OR 不安' -> [["緊張", "試験"], ["不安"]] (AND binds tighter than OR)"""
+    groups = [[]]
+    for word in text.split():
+        if word.upper() == "OR" or word == "|":
+            groups.append([])
+        elif word.upper() != "AND":
+            groups[-1].append(word)
+    return [group for group in groups if group]
@@ -0,0 +1,143 @@
+"""
+Per-level/per-source exam listing index for the API's listing endpoint
+
+exam_listing/<level>/<source>.json holds, in the server's numeric-aware
+order, one entry per exam:
+
+    {"id": ..., "title": ..., "duration": ..., "questions": ...,
+     "by_part": {...}, "size": ..., "mtime_ns": "..."}
+
+Entries are computed per file through the manifest (listing_entry is a
+manifest analysis, next to the per-part question counts it is combined
+with), so regenerating the index only re-reads changed files.
+
+Each listing also records its generation: the mtime of the exams/<level>/
+<source> directory, taken before the scan. Adding, removing or atomically
+rewriting an exam (as every script here does) changes it, so the server
+serves a listing as is after a single stat of the directory.
+"""
+
+import json
+import mmap
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .loader import EXAMS_DIR, LEVELS, SOURCES, ExamFile, natural_key
+from .writer import atomic_write_bytes
+
+LISTING_DIR = EXAMS_DIR.parent / "exam_listing"
+
+# Bump when listing_entry changes so cached entries are recomputed
+LISTING_VERSION = "2"
+
+# In the canonical indent=2 format a raw newline only occurs between tokens,
+# so this marks the top-level "sections" key: everything before it is the
+# small exam header (id, title, level, type, source, duration).
+_SECTIONS_KEY = re.compile(rb'\n  "sections": \[')
+
+
+def _read_head(buf) -> Optional[dict]:
+    match = _SECTIONS_KEY.search(buf)
+    if match is None:
+        return None
+    head = bytes(buf[:match.start()]).rstrip()
+    if not head.endswith(b","):
+        return None
+    try:
+        return json.loads(head[:-1] + b"}")
+    except ValueError:
+        return None
+
+
+def listing_entry(file_path: Path, data: dict = None) -> dict:
+    """Header fields of one exam (reads only the header when data is not already parsed)"""
+    head = data
+    if head is None:
+        with open(file_path, "rb") as f:
+            try:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                buf = None
+            try:
+                head = _read_head(buf) if buf is not None else None
+            finally:
+                if buf is not None:
+                    buf.close()
+        if head is None:
+            with open(file_path, "rb") as f:
+                head = json.loads(f.read())
+
+    return {"title": head.get("title"), "duration": head.get("duration")}
+
+
+def directory_generations(exams_dir: Path = EXAMS_DIR,
+                          levels: Iterable[str] = LEVELS) -> Dict[tuple, str]:
+    """
+    Generation of every exams/<level>/<source> directory: its mtime in
+    nanoseconds, as a string since it does not fit in a JavaScript number.
+    Take it before scanning, so a change during the scan makes the listing
+    stale rather than silently incomplete.
+    """
+    generations = {}
+    for level in levels:
+        for source in SOURCES:
+            try:
+                generations[(level, source)] = str((exams_dir / level / source).stat().st_mtime_ns)
+            except OSError:
+                continue
+    return generations
+
+
+def build_listings(records: List[ExamFile], name: str = "listing",
+                   counts: str = "counts") -> Dict[tuple, List[dict]]:
+    """
+    Group manifest records (whose data holds a listing_entry result under
+    name and per-part question counts under counts) into sorted
+    per-level/per-source listings.
+    """
+    listings: Dict[tuple, List[dict]] = {}
+    for record in records:
+        entry = {"id": record.path.stem}
+        if not record.error:
+            entry.update(record.data[name])
+            by_part = record.data[counts]
+            entry.update(questions=sum(by_part.values()), by_part=by_part)
+        else:
+            entry.update(title=None, duration=None, questions=0, by_part={})
+        stat = record.path.stat()
+        entry["size"] = stat.st_size
+        # A string: nanosecond mtimes do not fit in a JavaScript number
+        entry["mtime_ns"] = str(stat.st_mtime_ns)
+        listings.setdefault((record.level, record.source), []).append(entry)
+
+    for entries in listings.values():
+        entries.sort(key=lambda entry: natural_key(entry["id"]))
+    return listings
+
+
+def save_listings(listings: Dict[tuple, List[dict]], listing_dir: Path = LISTING_DIR,
+                  generations: Optional[Dict[tuple, str]] = None) -> int:
+    """
+    Write one listing file per level/source, skipping files whose bytes are unchanged.
+
+    Args:
+        generations: directory_generations taken before the scan (a listing
+            without one is never served as is)
+
+    Returns:
+        Number of listing files written
+    """
+    written = 0
+    for (level, source), entries in sorted(listings.items()):
+        path = listing_dir / level / f"{source}.json"
+        generation = (generations or {}).get((level, source))
+        payload = json.dumps({"level": level, "source": source, "generation": generation,
+                              "items": entries},
+                             ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if path.exists() and path.read_bytes() == payload:
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(path, payload)
+        written += 1
+    return written
@@ -0,0 +1,286 @@
+"""
+One-pass, process-pool loader for the exam corpus under exams/<level>/<source>/
+"""
+
+import atexit
+import hashlib
+import json
+import mmap
+import os
+import re
+import time
+from dataclasses import dataclass
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# EXAMS_DIR (also read by server.js) points every script at another tree,
+# e.g. a synthetic benchmark corpus; generated files go next to that tree
+EXAMS_DIR = Path(os.environ.get("EXAMS_DIR") or REPO_DIR / "exams").resolve()
+
+# When set, per-process totals of the worker read/parse/transform time spent
+# in iter_exams are written to this JSON file at exit (used by benchmark.py)
+TIMINGS_ENV = "EXAM_CORPUS_TIMINGS"
+
+LEVELS = ["N1", "N2", "N3", "N4", "N5"]
+SOURCES = ["custom", "official"]
+
+# Transforms run inside the worker process and receive (path, parsed data),
+# or (path, None) when loading with parse=False. Only their return value is
+# sent back to the parent, so a transform that reduces a 180 KB exam to a
+# small result avoids pickling the whole document.
+Transform = Callable[[Path, dict], Any]
+
+
+@dataclass
+class ExamFile:
+    """A single exam file as yielded by iter_exams"""
+    path: Path
+    level: str
+    source: str
+    size: int = 0
+    data: Any = None
+    error: Optional[str] = None
+    read_seconds: float = 0.0
+    parse_seconds: float = 0.0
+    transform_seconds: float = 0.0
+    cached: bool = False
+    # Set by the worker that read the file: its mtime when it was read, and
+    # (with checksum=True) the hash of the bytes it read
+    mtime_ns: int = 0
+    hash: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    @property
+    def elapsed(self) -> float:
+        return self.read_seconds + self.parse_seconds + self.transform_seconds
+
+
+_TOTALS = {"files": 0, "bytes": 0, "read_seconds": 0.0, "parse_seconds": 0.0,
+           "transform_seconds": 0.0}
+
+
+def _dump_totals():
+    with open(os.environ[TIMINGS_ENV], "w", encoding="utf-8") as f:
+        json.dump(_TOTALS, f)
+
+
+def _record_totals(record: "ExamFile") -> "ExamFile":
+    if _TOTALS["files"] == 0:
+        atexit.register(_dump_totals)
+    _TOTALS["files"] += 1
+    _TOTALS["bytes"] += record.size
+    _TOTALS["read_seconds"] += record.read_seconds
+    _TOTALS["parse_seconds"] += record.parse_seconds
+    _TOTALS["transform_seconds"] += record.transform_seconds
+    return record
+
+
+def bytes_hash(raw) -> str:
+    """Hash of raw exam bytes"""
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def content_hash(path: Path) -> str:
+    """Hash of a file's raw bytes, over a memory map so memory stays flat"""
+    with open(path, "rb") as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            return bytes_hash(b"")
+        try:
+            return bytes_hash(buf)
+        finally:
+            buf.close()
+
+
+def natural_key(name: str) -> List:
+    """Numeric-aware sort key, matching the server's localeCompare(numeric)"""
+    return [int(part) if part.isdigit() else part.lower()
+            for part in re.split(r"(\d+)", name)]
+
+
+def normalize_level(level) -> str:
+    """Accept 1, "1", "n1" or "N1" and return "N1" """
+    text = str(level).upper()
+    return text if text.startswith("N") else f"N{text}"
+
+
+def discover_exam_files(levels: Optional[Iterable] = None,
+                        sources: Optional[Iterable[str]] = None,
+                        exams_dir: Path = EXAMS_DIR) -> List[Tuple[Path, str, str]]:
+    """
+    List exam files in a deterministic order.
+
+    Args:
+        levels: Levels to include (default: every N* directory)
+        sources: Sources to include (default: custom and official)
+        exams_dir: Root of the exams tree
+
+    Returns:
+        (path, level, source) tuples sorted by level, source, then file name
+    """
+    if levels is None:
+        level_names = sorted(d.name for d in exams_dir.glob("N*") if d.is_dir())
+    else:
+        level_names = [normalize_level(level) for level in levels]
+    source_names = list(sources) if sources is not None else SOURCES
+
+    files = []
+    for level in level_names:
+        for source in source_names:
+            exam_dir = exams_dir / level / source
+            if not exam_dir.is_dir():
+                continue
+            names = sorted((p.name for p in exam_dir.glob("*.json")), key=natural_key)
+            files.extend((exam_dir / name, level, source) for name in names)
+    return files
+
+
+def find_exam_file(exam_id: str, exams_dir: Path = EXAMS_DIR) -> Tuple[Path, str, str]:
+    """
+    Locate an exam by id (its file name without .json).
+
+    Raises:
+        FileNotFoundError: If no exam has that id
+    """
+    for path in exams_dir.glob(f"N*/*/{exam_id}.json"):
+        if path.parent.name in SOURCES:
+            return path, path.parent.parent.name, path.parent.name
+    raise FileNotFoundError(f"No exam '{exam_id}' in {exams_dir}")
+
+
+def _load(task: Tuple[Path, str, str, Optional[Transform], bool, bool]) -> ExamFile:
+    """Read, parse and optionally transform one file (runs in a worker)"""
+    path, level, source, transform, parse, checksum = task
+    record = ExamFile(path=path, level=level, source=source)
+
+    if not parse:
+        # The transform reads the file itself (e.g. a streaming scanner)
+        try:
+            stat = path.stat()
+            record.size = stat.st_size
+            record.mtime_ns = stat.st_mtime_ns
+            if checksum:
+                record.hash = content_hash(path)
+        except OSError as e:
+            record.error = f"Cannot read file: {e}"
+            return record
+    else:
+        try:
+            start = time.perf_counter()
+            with open(path, "rb") as f:
+                record.mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+                raw = f.read()
+            record.size = len(raw)
+            record.read_seconds = time.perf_counter() - start
+            if checksum:
+                record.hash = bytes_hash(raw)
+            parsed_at = time.perf_counter()
+            record.data = json.loads(raw)
+            record.parse_seconds = time.perf_counter() - parsed_at
+        except Exception as e:
+            record.data = None
+            record.error = f"Cannot read file: {e}"
+            return record
+
+    if transform is not None:
+        start = time.perf_counter()
+        try:
+            record.data = transform(path, record.data)
+        except Exception as e:
+            record.data = None
+            record.error = str(e)
+        record.transform_seconds = time.perf_counter() - start
+
+    return record
+
+
+def iter_exams(levels: Optional[Iterable] = None,
+               sources: Optional[Iterable[str]] = None,
+               workers: Optional[int] = None,
+               transform: Optional[Transform] = None,
+               exams_dir: Path = EXAMS_DIR,
+               chunksize: int = 8,
+               files: Optional[List[Tuple[Path, str, str]]] = None,
+               parse: bool = True,
+               checksum: bool = False) -> Iterator[ExamFile]:
+    """
+    Parse every exam once and stream the results in discovery order.
+
+    Args:
+        levels: Levels to include (default: all)
+        sources: Sources to include (default: custom and official)
+        workers: Worker processes (default: os.cpu_count(); 1 runs in-process)
+        transform: Optional top-level function (path, data) -> result, run in
+            the worker; its result replaces ExamFile.data
+        exams_dir: Root of the exams tree
+        chunksize: Files handed to a worker at a time
+        files: Explicit (path, level, source) list to load instead of
+            discovering files from levels/sources
+        parse: When False, files are not read or parsed and the transform
+            receives (path, None)
+        checksum: Hash the bytes each worker read into ExamFile.hash
+
+    Yields:
+        ExamFile records, one per file, in the same order as discover_exam_files
+    """
+    if files is None:
+        files = discover_exam_files(levels, sources, exams_dir)
+    tasks = [(path, level, source, transform, parse, checksum) for path, level, source in files]
+    yield from map_records(_load, tasks, workers, chunksize)
+
+
+def map_records(load: Callable[[Any], ExamFile], tasks: list,
+                workers: Optional[int] = None, chunksize: int = 8) -> Iterator[ExamFile]:
+    """Run a top-level load function over tasks on the process pool, in order"""
+    if not tasks:
+        return
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+
+    if workers == 1:
+        records = map(load, tasks)
+    else:
+        pool = Pool(processes=workers)
+        records = pool.imap(load, tasks, chunksize=chunksize)
+    if os.environ.get(TIMINGS_ENV):
+        records = map(_record_totals, records)
+
+    try:
+        yield from records
+    finally:
+        if workers > 1:
+            pool.terminate()
+
+
+def timing_report(records: List[ExamFile], top: int = 5) -> List[str]:
+    """Summarize per-file timings collected by iter_exams"""
+    if not records:
+        return ["No files loaded"]
+
+    total_bytes = sum(r.size for r in records)
+    read = sum(r.read_seconds for r in records)
+    parse = sum(r.parse_seconds for r in records)
+    work = sum(r.transform_seconds for r in records)
+    busy = read + parse + work
+
+    lines = [
+        f"Files: {len(records)} ({total_bytes / 1024 / 1024:.1f} MB)",
+        f"Worker time: read {read:.2f}s, parse {parse:.2f}s, process {work:.2f}s",
+    ]
+    if busy > 0:
+        lines.append(f"Throughput per worker: {total_bytes / 1024 / 1024 / busy:.1f} MB/s")
+
+    lines.append(f"Slowest {min(top, len(records))} files:")
+    for r in sorted(records, key=lambda r: r.elapsed, reverse=True)[:top]:
+        lines.append(f"  {r.elapsed * 1000:7.1f} ms  {r.level}/{r.source}/{r.name}")
+    return lines
@@ -0,0 +1,185 @@
+"""
+Incremental content-hash manifest so scripts only re-parse changed exam files
+
+The manifest records, for every exam file, its size, mtime and content hash
+together with cached per-file analysis results (validation result, question
+counts, ...). Each analysis is registered under a name with a fingerprint;
+when the fingerprint changes (e.g. MONDAI_PART_MAPPING was edited) every
+cached result of that analysis is treated as stale.
+"""
+
+import hashlib
+import json
+import os
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from .archive import iter_archive
+from .loader import (
+    EXAMS_DIR, ExamFile, Transform, bytes_hash, content_hash, discover_exam_files, iter_exams
+)
+from .writer import atomic_write_bytes
+
+MANIFEST_PATH = EXAMS_DIR.parent / ".exam_manifest.json"
+MANIFEST_VERSION = 1
+
+# name -> (transform, fingerprint)
+Analyses = Dict[str, Tuple[Transform, str]]
+
+
+def fingerprint(obj) -> str:
+    """Stable short hash of any JSON-serializable object"""
+    text = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def run_analyses(transforms: Tuple[Tuple[str, Transform], ...], path: Path, data: dict) -> dict:
+    """Run several named transforms over one parsed exam (runs in a worker)"""
+    return {name: transform(path, data) for name, transform in transforms}
+
+
+class Manifest:
+    """Per-file cache of stat info, content hashes and analysis results"""
+
+    def __init__(self, path: Path = MANIFEST_PATH, exams_dir: Path = EXAMS_DIR):
+        self.path = path
+        self.exams_dir = exams_dir
+        self.fingerprints: Dict[str, str] = {}
+        self.files: Dict[str, dict] = {}
+        self.load()
+
+    def load(self):
+        """Load the manifest from disk, starting empty if missing or unreadable"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        self.fingerprints = data.get("fingerprints", {})
+        self.files = data.get("files", {})
+
+    def save(self):
+        """Write the manifest next to the exams directory"""
+        data = {
+            "version": MANIFEST_VERSION,
+            "fingerprints": self.fingerprints,
+            "files": self.files
+        }
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        atomic_write_bytes(self.path, payload.encode("utf-8"))
+
+    def _key(self, path: Path) -> str:
+        return path.relative_to(self.exams_dir).as_posix()
+
+    def _expire_stale_analyses(self, analyses: Analyses):
+        """Drop cached results whose analysis fingerprint changed"""
+        for name, (_, expected) in analyses.items():
+            if self.fingerprints.get(name) == expected:
+                continue
+            for entry in self.files.values():
+                entry.get("results", {}).pop(name, None)
+            self.fingerprints[name] = expected
+
+    def _is_current(self, entry: Optional[dict], path: Path, stat: os.stat_result) -> bool:
+        """Check whether a cached entry still describes the file on disk"""
+        if entry is None or entry.get("size") != stat.st_size:
+            return False
+        if entry.get("mtime_ns") == stat.st_mtime_ns:
+            return True
+
+        # Touched but possibly unchanged (checkout, copy): compare content
+        if entry.get("hash") == content_hash(path):
+            entry["mtime_ns"] = stat.st_mtime_ns
+            return True
+        return False
+
+    def refresh(self, analyses: Analyses,
+                levels: Optional[Iterable] = None,
+                sources: Optional[Iterable[str]] = None,
+                workers: Optional[int] = None,
+                full: bool = False,
+                parse: bool = True,
+                archive: Optional[Path] = None) -> Iterator[ExamFile]:
+        """
+        Yield every exam with its analysis results, parsing only changed files.
+
+        Args:
+            analyses: name -> (transform, fingerprint) to compute per file
+            levels: Levels to include (default: all)
+            sources: Sources to include (default: custom and official)
+            workers: Worker processes for the files that need parsing
+            full: Ignore the cache and re-parse every file
+            parse: Passed to iter_exams; False for analyses that read the
+                file themselves
+            archive: Read changed files from this exam archive (kept up to
+                date by the caller) instead of the tree; they are always parsed
+
+        Yields:
+            ExamFile records in discovery order; data maps each analysis name
+            to its result and cached tells whether the file was parsed
+        """
+        self._expire_stale_analyses(analyses)
+        files = discover_exam_files(levels, sources, self.exams_dir)
+
+        records = []
+        pending = []
+        for path, level, source in files:
+            key = self._key(path)
+            entry = self.files.get(key)
+            stat = path.stat()
+            record = ExamFile(path=path, level=level, source=source, size=stat.st_size)
+
+            fresh = (not full and self._is_current(entry, path, stat)
+                     and (entry.get("error") or all(name in entry["results"] for name in analyses)))
+            if fresh:
+                record.cached = True
+                record.error = entry.get("error")
+                record.data = {name: entry["results"][name] for name in analyses
+                               if name in entry.get("results", {})}
+            else:
+                pending.append((path, level, source))
+            records.append(record)
+
+        transform = partial(run_analyses, tuple((name, fn) for name, (fn, _) in analyses.items()))
+        if archive is not None:
+            parsed = iter_archive(archive, workers=workers, transform=transform,
+                                  exams_dir=self.exams_dir, files=pending)
+        else:
+            parsed = iter_exams(workers=workers, transform=transform, files=pending, parse=parse,
+                                checksum=True)
+
+        for record in records:
+            if not record.cached:
+                record = next(parsed)
+                self._store(record)
+            yield record
+
+        # Forget files that disappeared from the scanned part of the tree
+        if levels is None and sources is None:
+            seen = {self._key(path) for path, _, _ in files}
+            for key in list(self.files):
+                if key not in seen:
+                    del self.files[key]
+
+    def _store(self, record: ExamFile):
+        """Cache a freshly parsed record, as of the bytes its worker read"""
+        key = self._key(record.path)
+        previous = self.files.get(key, {})
+
+        entry = {
+            "size": record.size,
+            "mtime_ns": record.mtime_ns,
+            "hash": record.hash,
+            "error": record.error,
+            "results": {}
+        }
+        if previous.get("hash") == entry["hash"]:
+            # Same content: keep results of analyses not run this time
+            entry["results"] = dict(previous.get("results", {}))
+        if record.data:
+            entry["results"].update(record.data)
+        self.files[key] = entry
@@ -0,0 +1,93 @@
+"""
+Canonical MONDAI -> part mapping, compiled into O(1) per-level lookup tables
+
+The ranges live in mondai_part_mapping.json at the repository root (shared
+with server.js). Each part maps to an inclusive [first, last] mondai range;
+a last of null means "this mondai and every later one" (listening).
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .loader import REPO_DIR, normalize_level
+
+MAPPING_FILE = REPO_DIR / "mondai_part_mapping.json"
+
+PARTS = ["vocabulary", "grammar", "reading", "listening"]
+
+# level -> part -> (first, last or None)
+Mapping = Dict[str, Dict[str, Tuple[int, Optional[int]]]]
+
+
+def load_mapping(path: Path = MAPPING_FILE) -> Mapping:
+    """
+    Load and check the mapping data file.
+
+    Raises:
+        ValueError: If a part is unknown or the ranges of a level overlap
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+
+    mapping = {}
+    for level, parts in raw.items():
+        ranges = {}
+        for part, (first, last) in parts.items():
+            if part not in PARTS:
+                raise ValueError(f"{level}: unknown part '{part}'")
+            if last is not None and last < first:
+                raise ValueError(f"{level}: empty range for {part}")
+            ranges[part] = (first, last)
+
+        ordered = sorted(ranges.values())
+        for (_, last), (next_first, _) in zip(ordered, ordered[1:]):
+            if last is None or last >= next_first:
+                raise ValueError(f"{level}: overlapping mondai ranges")
+        mapping[level] = ranges
+    return mapping
+
+
+def compile_mapping(mapping: Mapping) -> Dict[str, Tuple[List[Optional[str]], Optional[str], int]]:
+    """Compile ranges into (table indexed by mondai, open-ended part, its first mondai)"""
+    tables = {}
+    for level, ranges in mapping.items():
+        size = max((last if last is not None else first) for first, last in ranges.values()) + 1
+        table: List[Optional[str]] = [None] * size
+        tail_part, tail_start = None, size
+
+        for part, (first, last) in ranges.items():
+            if last is None:
+                tail_part, tail_start = part, first
+                last = size - 1
+            for mondai in range(first, last + 1):
+                table[mondai] = part
+        tables[level] = (table, tail_part, tail_start)
+    return tables
+
+
+MONDAI_PART_MAPPING = load_mapping()
+_TABLES = compile_mapping(MONDAI_PART_MAPPING)
+
+
+def part_for(level, mondai: int) -> Optional[str]:
+    """
+    Get the part for a mondai.
+
+    Args:
+        level: JLPT level ("N1" or 1)
+        mondai: Mondai number
+
+    Returns:
+        Part name, or None if the level or mondai is not mapped
+    """
+    compiled = _TABLES.get(level) or _TABLES.get(normalize_level(level))
+    if compiled is None or not isinstance(mondai, int):
+        return None
+
+    table, tail_part, tail_start = compiled
+    if 0 <= mondai < len(table):
+        return table[mondai]
+    if tail_part is not None and mondai >= tail_start:
+        return tail_part
+    return None
@@ -0,0 +1,261 @@
+"""
+Mock exam assembler
+
+QuestionPools reads the corpus once and keeps, per (level, mondai), every
+distinct "unit" a section can be built from: a single question, or a run
+of consecutive questions sharing a passage (or audio), which must stay
+together. Questions are identified by the normalized text of
+duplicates.normalize_question plus their pictures, passage or audio, units by their
+questions; units are stored once, as compact JSON bytes, so a whole corpus
+of pools fits in a few tens of MB. Each level's template is its most
+common section layout: mondai, part, title, description and question
+count, with the most common duration. Answers are stored zero-based:
+units from exams with 1-based answers (answer_bias.answer_base) are
+shifted down, so every mock has one consistent answer key.
+
+assemble() fills every template section by drawing units at random
+without replacement until the question count is reached, only taking a
+unit if the rest of the section can still be filled exactly from the unit
+sizes the pool has, and never a unit with a question already in the exam
+(the same question can appear alone in one exam and grouped in another).
+It parses each section with a single json.loads and renumbers the
+questions. Exams are reproducible: the same pools, level, seed and index
+always give the same exam. generate() streams any number of them.
+"""
+
+import json
+import random
+import time
+from array import array
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .answer_bias import exam_answer_base
+from .duplicates import normalize_question, question_media
+from .loader import EXAMS_DIR, iter_exams, normalize_level
+from .manifest import bytes_hash
+from .streaming import count_questions_parsed
+
+SOURCE = "mock"
+
+
+def _units(questions: list) -> List[list]:
+    """Split a section's questions into runs sharing a passage or audio"""
+    units = []
+    previous = None
+    for question in questions:
+        context = question.get("passage") or question.get("audioURL") or None
+        if context is not None and context == previous:
+            units[-1].append(question)
+        else:
+            units.append([question])
+        previous = context
+    return units
+
+
+def question_key(question: dict) -> int:
+    """64-bit identity of a question: its normalized text, pictures, passage and audio"""
+    text = "\x1e".join((normalize_question(question), "\x1f".join(question_media(question)),
+                        question.get("passage") or "", question.get("audioURL") or ""))
+    return int(bytes_hash(text.encode("utf-8"))[:16], 16)
+
+
+def exam_units(file_path: Path, data: dict) -> dict:
+    """
+    Worker transform: the layout of one exam and its units
+
+    Returns:
+        {"duration", "layout": [(mondai, part, title, description, count)],
+        "units": [(mondai, question keys, compact JSON of the questions)]},
+        with zero-based answers
+    """
+    base = exam_answer_base(data)
+    layout = []
+    units = []
+    for section in data.get("sections", []):
+        questions = section.get("questions", [])
+        mondai = section.get("mondai")
+        layout.append((mondai, section.get("part"), section.get("title"),
+                       section.get("description"), len(questions)))
+        for unit in _units(questions):
+            # Some exams repeat a question within a group; keep it once
+            distinct = {}
+            for question in unit:
+                distinct.setdefault(question_key(question), question)
+            keys, unit = tuple(distinct), list(distinct.values())
+            if base:
+                unit = [dict(question, answer=question["answer"] - base)
+                        if isinstance(question.get("answer"), int) else question
+                        for question in unit]
+            body = ",".join(json.dumps({k: v for k, v in question.items() if k != "number"},
+                                       ensure_ascii=False, separators=(",", ":"))
+                            for question in unit)
+            units.append((mondai, keys, body.encode("utf-8")))
+    return {"duration": data.get("duration"), "layout": layout, "units": units}
+
+
+class QuestionPools:
+    """Per-(level, mondai) pools of distinct units, plus one template per level"""
+
+    def __init__(self):
+        # (level, mondai) -> unit bodies, their question counts and question keys
+        self.units: Dict[Tuple[str, int], List[bytes]] = defaultdict(list)
+        self.sizes: Dict[Tuple[str, int], array] = defaultdict(lambda: array("B"))
+        self.keys: Dict[Tuple[str, int], List[Tuple[int, ...]]] = defaultdict(list)
+        # (level, mondai, count) -> which remainders unit sizes can add up to
+        self._reachable: Dict[Tuple[str, int, int], List[bool]] = {}
+        self.templates: Dict[str, dict] = {}
+        self.seconds = 0.0
+
+    @classmethod
+    def build(cls, levels: Optional[Iterable] = None,
+              sources: Optional[Iterable[str]] = None,
+              workers: Optional[int] = None,
+              exams_dir: Path = EXAMS_DIR) -> "QuestionPools":
+        """Read the corpus once and build the pools and templates"""
+        start = time.perf_counter()
+        pools = cls()
+        seen = set()
+        layouts: Dict[str, Counter] = defaultdict(Counter)
+        durations: Dict[str, Counter] = defaultdict(Counter)
+        for record in iter_exams(levels=levels, sources=sources, workers=workers,
+                                 transform=exam_units, exams_dir=exams_dir):
+            if record.error:
+                continue
+            level = record.level
+            layouts[level][tuple(record.data["layout"])] += 1
+            if record.data["duration"]:
+                durations[level][record.data["duration"]] += 1
+            for mondai, keys, body in record.data["units"]:
+                if (level, mondai, keys) in seen or len(keys) > 255:
+                    continue
+                seen.add((level, mondai, keys))
+                pools.units[(level, mondai)].append(body)
+                pools.sizes[(level, mondai)].append(len(keys))
+                pools.keys[(level, mondai)].append(keys)
+
+        for level, counter in layouts.items():
+            layout = counter.most_common(1)[0][0]
+            pools.templates[level] = {
+                "duration": durations[level].most_common(1)[0][0] if durations[level] else None,
+                "sections": [{"mondai": mondai, "part": part, "title": title,
+                              "description": description, "count": count}
+                             for mondai, part, title, description, count in layout],
+            }
+        pools.seconds = time.perf_counter() - start
+        return pools
+
+    def pool_size(self, level, mondai: int) -> Tuple[int, int]:
+        """(units, questions) available for one mondai"""
+        sizes = self.sizes.get((normalize_level(level), mondai), array("B"))
+        return len(sizes), sum(sizes)
+
+    def _reachable_counts(self, key: Tuple[str, int], count: int) -> List[bool]:
+        """reachable[n]: some combination of the pool's unit sizes adds up to n"""
+        cache_key = key + (count,)
+        if cache_key not in self._reachable:
+            reachable = [True] + [False] * count
+            sizes = set(self.sizes[key])
+            for total in range(1, count + 1):
+                reachable[total] = any(size <= total and reachable[total - size] for size in sizes)
+            self._reachable[cache_key] = reachable
+        return self._reachable[cache_key]
+
+    def _sample(self, rng: random.Random, key: Tuple[str, int], count: int,
+                used_questions: set, attempts: int = 3) -> List[int]:
+        """
+        Units adding up to count questions (fewer if the pool cannot), with
+        no question from used_questions; their questions are added to it
+        """
+        sizes = self.sizes.get(key)
+        if not sizes:
+            return []
+        keys = self.keys[key]
+        reachable = self._reachable_counts(key, count)
+        # The largest count the unit sizes can make, normally count itself
+        target = next(total for total in range(count, -1, -1) if reachable[total])
+
+        for _ in range(attempts):
+            chosen, used, taken = [], set(), set()
+            remaining = target
+
+            def take(index: int) -> bool:
+                size = sizes[index]
+                if (index in used or size > remaining or not reachable[remaining - size]
+                        or not used_questions.isdisjoint(keys[index])
+                        or not taken.isdisjoint(keys[index])):
+                    return False
+                used.add(index)
+                taken.update(keys[index])
+                chosen.append(index)
+                return True
+
+            # Random draws are cheap while most units fit; a shuffled pass finishes the rest
+            for _ in range(4 * count + 16):
+                if not remaining:
+                    break
+                index = rng.randrange(len(sizes))
+                if take(index):
+                    remaining -= sizes[index]
+            if remaining:
+                for index in rng.sample(range(len(sizes)), len(sizes)):
+                    if not remaining:
+                        break
+                    if take(index):
+                        remaining -= sizes[index]
+            # Early picks can rule out an exact fill; start over with other draws
+            if not remaining:
+                break
+        used_questions.update(taken)
+        return chosen
+
+    def assemble(self, level, seed: int = 0, index: int = 0) -> dict:
+        """
+        One mock exam in the corpus format, statistics included.
+
+        Raises:
+            KeyError: If there is no template for the level
+        """
+        level = normalize_level(level)
+        template = self.templates[level]
+        rng = random.Random(f"{level}:{seed}:{index}")
+        exam = {
+            "id": f"{SOURCE}_{level}_{seed}_{index}",
+            "title": f"Mock {level} ({seed}-{index})",
+            "level": int(level[1:]),
+            "type": "custom",
+            "source": SOURCE,
+        }
+        if template["duration"]:
+            exam["duration"] = template["duration"]
+
+        sections = []
+        used_questions = set()
+        number = 0
+        for spec in template["sections"]:
+            key = (level, spec["mondai"])
+            bodies = self.units.get(key, [])
+            chosen = self._sample(rng, key, spec["count"], used_questions)
+            questions = json.loads(b"[" + b",".join(bodies[i] for i in chosen) + b"]")
+            for question in questions:
+                number += 1
+                # number first, as in the exams
+                question_items = list(question.items())
+                question.clear()
+                question["number"] = number
+                question.update(question_items)
+            section = {"mondai": spec["mondai"], "part": spec["part"]}
+            for field in ("title", "description"):
+                if spec[field] is not None:
+                    section[field] = spec[field]
+            section["questions"] = questions
+            sections.append(section)
+        exam["sections"] = sections
+        exam["statistics"] = count_questions_parsed(exam)
+        return exam
+
+    def generate(self, level, count: int, seed: int = 0, first: int = 0) -> Iterator[dict]:
+        """Stream count exams: indexes first .. first + count - 1 of a seed"""
+        for index in range(first, first + count):
+            yield self.assemble(level, seed, index)
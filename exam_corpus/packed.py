@@ -0,0 +1,377 @@
+"""
+Packed binary exam format (.jxb) with a section offset table
+
+Layout (little-endian):
+
+    magic "JXB1" | u32 head length | u32 sections | u32 strings
+    head         compact JSON of the top-level object, "sections": [] kept
+                 as a placeholder so the key order survives
+    string table per string: u32 offset, u32 length
+    section table per section: i32 mondai (-1: none), u8 part code
+                 (index in PARTS, 255: other), 3 pad, u32 offset, u32 length
+    strings      UTF-8 passages, each stored once per exam
+    sections     compact JSON per section, separated by commas so that the
+                 whole area parses as one array; a question's string
+                 "passage" is the index of its passage in the string table
+                 (other values, e.g. null, are kept as they are)
+
+Passages are repeated on every question of a reading or listening mondai,
+so storing them once roughly halves what a reader has to parse, and the
+tables let a reader decode one mondai or one part (plus only the passages
+it references) without touching the rest. pack_exam/unpack_exam round-trip
+exactly: dumps_exam(unpack_exam(pack_exam(data))) gives the original bytes.
+"""
+
+import json
+import mmap
+import struct
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .loader import EXAMS_DIR, LEVELS, SOURCES, iter_exams, natural_key, normalize_level
+from .mapping import PARTS
+from .writer import atomic_write_bytes, dumps_exam
+
+SUFFIX = ".jxb"
+MAGIC = b"JXB1"
+
+_HEADER = struct.Struct("<4sIII")
+_STRING = struct.Struct("<II")
+_SECTION = struct.Struct("<iB3xII")
+_OTHER_PART = 255
+
+
+def _compact(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def pack_exam(data: dict) -> bytes:
+    """Encode one parsed exam"""
+    strings: List[bytes] = []
+    string_ids: Dict[str, int] = {}
+    sections: List[Tuple[int, int, bytes]] = []
+
+    for section in data.get("sections", []):
+        questions = []
+        for question in section.get("questions", []):
+            passage = question.get("passage")
+            if isinstance(passage, str):
+                if passage not in string_ids:
+                    string_ids[passage] = len(strings)
+                    strings.append(passage.encode("utf-8"))
+                question = dict(question, passage=string_ids[passage])
+            questions.append(question)
+        body = dict(section, questions=questions) if "questions" in section else section
+
+        mondai = section.get("mondai")
+        part = section.get("part")
+        sections.append((
+            mondai if isinstance(mondai, int) and 0 <= mondai < 1 << 31 else -1,
+            PARTS.index(part) if part in PARTS else _OTHER_PART,
+            _compact(body),
+        ))
+
+    head = _compact(dict(data, sections=[]) if "sections" in data else data)
+    chunks = [_HEADER.pack(MAGIC, len(head), len(sections), len(strings)), head]
+    offset = 0
+    for string in strings:
+        chunks.append(_STRING.pack(offset, len(string)))
+        offset += len(string)
+    offset = 0
+    for mondai, part, body in sections:
+        chunks.append(_SECTION.pack(mondai, part, offset, len(body)))
+        offset += len(body) + 1
+    chunks.extend(strings)
+    chunks.append(b",".join(body for _, _, body in sections))
+    return b"".join(chunks)
+
+
+class PackedExam:
+    """
+    Lazy reader over packed bytes (or a memory-mapped .jxb file).
+
+    Only the head and the tables are decoded up front; sections and
+    passages are decoded when asked for.
+    """
+
+    def __init__(self, buf):
+        self.buf = memoryview(buf)
+        magic, head_length, section_count, string_count = _HEADER.unpack_from(self.buf)
+        if magic != MAGIC:
+            raise ValueError("Not a packed exam file")
+        self.head_end = _HEADER.size + head_length
+        self._head = None
+
+        self.strings = [_STRING.unpack_from(self.buf, self.head_end + i * _STRING.size)
+                        for i in range(string_count)]
+        table = self.head_end + string_count * _STRING.size
+        self.sections = [_SECTION.unpack_from(self.buf, table + i * _SECTION.size)
+                         for i in range(section_count)]
+        self.strings_start = table + section_count * _SECTION.size
+        self.sections_start = self.strings_start + sum(length for _, length in self.strings)
+        self._passages: Dict[int, str] = {}
+
+    @classmethod
+    def open(cls, path: Path) -> "PackedExam":
+        """Memory-map a .jxb file"""
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def close(self):
+        buf = self.buf.obj
+        self.buf.release()
+        if isinstance(buf, mmap.mmap):
+            buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def head(self) -> dict:
+        """Top-level fields (sections left empty)"""
+        if self._head is None:
+            self._head = json.loads(bytes(self.buf[_HEADER.size:self.head_end]))
+        return self._head
+
+    def parts(self) -> List[Optional[str]]:
+        """Part of each section, from the table alone"""
+        return [PARTS[part] if part != _OTHER_PART else None for _, part, _, _ in self.sections]
+
+    def passage(self, index: int) -> str:
+        if index not in self._passages:
+            offset, length = self.strings[index]
+            start = self.strings_start + offset
+            self._passages[index] = str(self.buf[start:start + length], "utf-8")
+        return self._passages[index]
+
+    def _resolve(self, section: dict) -> dict:
+        for question in section.get("questions", ()):
+            # Only string passages were replaced by an index; null and the like pass through
+            passage = question.get("passage")
+            if isinstance(passage, int) and not isinstance(passage, bool):
+                question["passage"] = self.passage(passage)
+        return section
+
+    def section(self, index: int) -> dict:
+        """Decode one section"""
+        _, _, offset, length = self.sections[index]
+        start = self.sections_start + offset
+        return self._resolve(json.loads(bytes(self.buf[start:start + length])))
+
+    def select(self, mondai: Optional[int] = None, part: Optional[str] = None) -> List[dict]:
+        """Decode only the sections of one mondai and/or one part"""
+        code = PARTS.index(part) if part in PARTS else None
+        if part is not None and code is None:
+            # Not in the table: decode every section and check its part
+            return [s for s in self.select(mondai) if s.get("part") == part]
+        return [self.section(i) for i, (m, p, _, _) in enumerate(self.sections)
+                if (mondai is None or m == mondai) and (code is None or p == code)]
+
+    def load(self) -> dict:
+        """Decode the whole exam"""
+        data = dict(self.head)
+        if "sections" not in data:
+            return data
+        # The section area is comma-separated: one parse for all of it
+        area = b"[" + bytes(self.buf[self.sections_start:]) + b"]"
+        data["sections"] = [self._resolve(section) for section in json.loads(area)]
+        return data
+
+
+def unpack_exam(payload: bytes) -> dict:
+    """Decode packed bytes back into the exam document"""
+    return PackedExam(payload).load()
+
+
+def discover_packed_files(packed_dir: Path,
+                          levels: Optional[Iterable] = None) -> List[Tuple[Path, str, str]]:
+    """(path, level, source) of every .jxb file, in the same order as the JSON tree"""
+    packed_dir = Path(packed_dir)
+    if levels is None:
+        level_names = sorted(d.name for d in packed_dir.glob("N*") if d.is_dir())
+    else:
+        level_names = [normalize_level(level) for level in levels]
+    files = []
+    for level in level_names:
+        for source in SOURCES:
+            names = sorted((p.name for p in (packed_dir / level / source).glob(f"*{SUFFIX}")),
+                           key=natural_key)
+            files.extend((packed_dir / level / source / name, level, source) for name in names)
+    return files
+
+
+def _pack(path: Path, data: dict) -> Tuple[bytes, bool]:
+    """Worker transform: packed bytes, and whether they unpack to the original bytes"""
+    payload = pack_exam(data)
+    with open(path, "rb") as f:
+        original = f.read()
+    try:
+        exact = dumps_exam(unpack_exam(payload)) == original
+    except (ValueError, TypeError, IndexError, struct.error):
+        # e.g. a raw integer passage, read back as a string table index
+        exact = False
+    return payload, exact
+
+
+def pack_tree(out_dir: Path,
+              exams_dir: Path = EXAMS_DIR,
+              levels: Optional[Iterable] = None,
+              workers: Optional[int] = None) -> dict:
+    """
+    Write a packed copy of the exams tree, checking each file's round trip.
+
+    Returns:
+        Report with per-level files/original/packed bytes, written,
+        mismatches (files that would not round-trip, left unpacked) and errors
+    """
+    out_dir = Path(out_dir)
+    report = {"levels": defaultdict(lambda: {"files": 0, "original": 0, "packed": 0}),
+              "written": 0, "mismatches": [], "errors": {}}
+    start = time.perf_counter()
+
+    for record in iter_exams(levels, workers=workers, transform=_pack, exams_dir=exams_dir):
+        relative = record.path.relative_to(exams_dir)
+        if record.error:
+            report["errors"][relative.as_posix()] = record.error
+            continue
+        payload, exact = record.data
+        if not exact:
+            report["mismatches"].append(relative.as_posix())
+            continue
+
+        target = (out_dir / relative).with_suffix(SUFFIX)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if not target.exists() or target.read_bytes() != payload:
+            atomic_write_bytes(target, payload)
+            report["written"] += 1
+
+        level = report["levels"][record.level]
+        level["files"] += 1
+        level["original"] += record.size
+        level["packed"] += len(payload)
+
+    report["seconds"] = time.perf_counter() - start
+    report["levels"] = dict(report["levels"])
+    return report
+
+
+def _unpack(path: Path, data: dict) -> bytes:
+    """Worker transform reading a .jxb file itself (parse=False)"""
+    with open(path, "rb") as f:
+        return dumps_exam(unpack_exam(f.read()))
+
+
+def unpack_tree(packed_dir: Path,
+                out_dir: Optional[Path] = None,
+                verify_dir: Optional[Path] = None,
+                workers: Optional[int] = None) -> dict:
+    """
+    Rebuild the JSON files from a packed tree.
+
+    Args:
+        packed_dir: Tree written by pack_tree
+        out_dir: Where to write the JSON files (None: do not write)
+        verify_dir: Original tree to compare the rebuilt bytes against
+
+    Returns:
+        Report with files, written, mismatches (relative paths) and errors
+    """
+    packed_dir = Path(packed_dir)
+    report = {"files": 0, "written": 0, "mismatches": [], "errors": {}}
+    files = discover_packed_files(packed_dir)
+
+    for record in iter_exams(workers=workers, transform=_unpack, files=files, parse=False):
+        relative = record.path.relative_to(packed_dir).with_suffix(".json")
+        if record.error:
+            report["errors"][relative.as_posix()] = record.error
+            continue
+        report["files"] += 1
+        payload = record.data
+
+        if verify_dir is not None:
+            original = Path(verify_dir) / relative
+            if not original.exists() or original.read_bytes() != payload:
+                report["mismatches"].append(relative.as_posix())
+
+        if out_dir is not None:
+            target = Path(out_dir) / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if not target.exists() or target.read_bytes() != payload:
+                atomic_write_bytes(target, payload)
+                report["written"] += 1
+
+    return report
+
+
+def _best_of(runs: int, fn) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_tree(packed_dir: Path,
+                   exams_dir: Path = EXAMS_DIR,
+                   levels: Optional[Iterable] = None,
+                   runs: int = 3) -> Dict[str, dict]:
+    """
+    Compare loading the JSON tree with loading the packed tree, per level.
+
+    Every file is timed in-process (best of runs): JSON parse of the whole
+    exam, packed decode of the whole exam, and packed decode of just the
+    listening part and of just one mondai (the first section's).
+
+    Returns:
+        level -> files, json_bytes, packed_bytes and seconds for json_load,
+        packed_load, packed_part and packed_mondai
+    """
+    packed_dir = Path(packed_dir)
+    results = {}
+    for level in levels or LEVELS:
+        pairs = []
+        for path, _, _ in discover_packed_files(packed_dir, [level]):
+            original = exams_dir / path.relative_to(packed_dir).with_suffix(".json")
+            if original.exists():
+                pairs.append((original, path))
+        if not pairs:
+            continue
+
+        def load_json():
+            for original, _ in pairs:
+                with open(original, "rb") as f:
+                    json.loads(f.read())
+
+        def load_packed():
+            for _, packed in pairs:
+                with open(packed, "rb") as f:
+                    PackedExam(f.read()).load()
+
+        def load_part():
+            for _, packed in pairs:
+                with open(packed, "rb") as f:
+                    PackedExam(f.read()).select(part="listening")
+
+        def load_mondai():
+            for _, packed in pairs:
+                with open(packed, "rb") as f:
+                    exam = PackedExam(f.read())
+                    if exam.sections:
+                        exam.select(mondai=exam.sections[0][0])
+
+        results[level] = {
+            "files": len(pairs),
+            "json_bytes": sum(original.stat().st_size for original, _ in pairs),
+            "packed_bytes": sum(packed.stat().st_size for _, packed in pairs),
+            "json_load": _best_of(runs, load_json),
+            "packed_load": _best_of(runs, load_packed),
+            "packed_part": _best_of(runs, load_part),
+            "packed_mondai": _best_of(runs, load_mondai),
+        }
+    return results
@@ -0,0 +1,190 @@
+"""
+Content-addressed passage store
+
+Reading questions repeat the same passage HTML on every question of a group,
+and custom exams reuse passages across files. compact_tree writes a copy of
+the exams tree where each inline passage is replaced, in place, by a
+reference object
+
+    "passage": {"ref": "<blake2b-128 hex of the passage>"}
+
+and every distinct passage is stored once in <tree>/passages.json. Because
+the reference keeps the key's position, expand_exam rebuilds the original
+document exactly, and dumps_exam gives back the original bytes.
+"""
+
+import hashlib
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .loader import EXAMS_DIR, iter_exams
+from .writer import atomic_write_bytes, dumps_exam
+
+STORE_NAME = "passages.json"
+REF_KEY = "ref"
+
+
+def passage_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _questions(data: dict):
+    for section in data.get("sections", []):
+        yield from section.get("questions", [])
+
+
+def compact_exam(data: dict, store: Dict[str, str]) -> dict:
+    """Replace inline passages with references (in place), adding them to store"""
+    for question in _questions(data):
+        text = question.get("passage")
+        if isinstance(text, str) and text:
+            digest = passage_hash(text)
+            store.setdefault(digest, text)
+            question["passage"] = {REF_KEY: digest}
+    return data
+
+
+def expand_exam(data: dict, store: Dict[str, str]) -> dict:
+    """
+    Replace passage references with the stored HTML (in place).
+
+    Raises:
+        KeyError: If a reference is missing from the store
+    """
+    for question in _questions(data):
+        ref = question.get("passage")
+        if isinstance(ref, dict) and REF_KEY in ref:
+            question["passage"] = store[ref[REF_KEY]]
+    return data
+
+
+def load_store(tree: Path) -> Dict[str, str]:
+    """Load the passage store of a compacted tree (empty if there is none)"""
+    path = Path(tree) / STORE_NAME
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_store(tree: Path, store: Dict[str, str]):
+    payload = json.dumps(dict(sorted(store.items())), ensure_ascii=False, indent=0)
+    atomic_write_bytes(Path(tree) / STORE_NAME, payload.encode("utf-8"))
+
+
+def _compact(path: Path, data: dict) -> tuple:
+    """Worker transform: (compacted bytes, passages of this file)"""
+    store: Dict[str, str] = {}
+    return dumps_exam(compact_exam(data, store)), store
+
+
+def compact_tree(out_dir: Path,
+                 exams_dir: Path = EXAMS_DIR,
+                 levels: Optional[Iterable] = None,
+                 workers: Optional[int] = None) -> dict:
+    """
+    Write a compacted copy of the exams tree plus its passage store.
+
+    Returns:
+        Report with per-level original/compacted bytes, the store size and
+        errors (relative path -> message)
+    """
+    out_dir = Path(out_dir)
+    store: Dict[str, str] = {}
+    report = {"levels": defaultdict(lambda: {"files": 0, "original": 0, "compacted": 0}),
+              "errors": {}, "written": 0}
+    start = time.perf_counter()
+
+    for record in iter_exams(levels, workers=workers, transform=_compact, exams_dir=exams_dir):
+        relative = record.path.relative_to(exams_dir)
+        if record.error:
+            report["errors"][relative.as_posix()] = record.error
+            continue
+        payload, passages = record.data
+        for digest, text in passages.items():
+            store.setdefault(digest, text)
+
+        target = out_dir / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if not target.exists() or target.read_bytes() != payload:
+            atomic_write_bytes(target, payload)
+            report["written"] += 1
+
+        level = report["levels"][record.level]
+        level["files"] += 1
+        level["original"] += record.size
+        level["compacted"] += len(payload)
+
+    save_store(out_dir, store)
+    report["passages"] = len(store)
+    report["store_bytes"] = (out_dir / STORE_NAME).stat().st_size
+    report["seconds"] = time.perf_counter() - start
+    report["levels"] = dict(report["levels"])
+    return report
+
+
+# Stores loaded by this process, so each worker reads passages.json only once
+_STORES: Dict[Path, Dict[str, str]] = {}
+
+
+def cached_store(tree: Path) -> Dict[str, str]:
+    """load_store, once per process (for worker transforms)"""
+    tree = Path(tree)
+    if tree not in _STORES:
+        _STORES[tree] = load_store(tree)
+    return _STORES[tree]
+
+
+class _Expander:
+    """Picklable worker transform; it ships the tree path, not the store itself"""
+
+    def __init__(self, tree: Path):
+        self.tree = Path(tree)
+
+    def __call__(self, path: Path, data: dict) -> bytes:
+        return dumps_exam(expand_exam(data, cached_store(self.tree)))
+
+
+def expand_tree(compact_dir: Path,
+                out_dir: Optional[Path] = None,
+                verify_dir: Optional[Path] = None,
+                workers: Optional[int] = None) -> dict:
+    """
+    Rebuild the original JSON files from a compacted tree.
+
+    Args:
+        compact_dir: Tree written by compact_tree
+        out_dir: Where to write the expanded files (None: do not write)
+        verify_dir: Original tree to compare the expanded bytes against
+
+    Returns:
+        Report with files, written, mismatches (relative paths) and errors
+    """
+    compact_dir = Path(compact_dir)
+    expander = _Expander(compact_dir)
+    report = {"files": 0, "written": 0, "mismatches": [], "errors": {}}
+
+    for record in iter_exams(workers=workers, transform=expander, exams_dir=compact_dir):
+        relative = record.path.relative_to(compact_dir)
+        if record.error:
+            report["errors"][relative.as_posix()] = record.error
+            continue
+        report["files"] += 1
+        payload = record.data
+
+        if verify_dir is not None:
+            original = Path(verify_dir) / relative
+            if not original.exists() or original.read_bytes() != payload:
+                report["mismatches"].append(relative.as_posix())
+
+        if out_dir is not None:
+            target = Path(out_dir) / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if not target.exists() or target.read_bytes() != payload:
+                atomic_write_bytes(target, payload)
+                report["written"] += 1
+
+    return report
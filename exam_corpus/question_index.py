@@ -0,0 +1,292 @@
+"""
+Columnar, memory-mappable question index
+
+Every question in the corpus becomes one row. Each column is stored as a raw
+native-endian array file (<column>.bin) so readers can mmap it and get a
+zero-copy memoryview; question texts live in one UTF-8 blob addressed by an
+offsets column. Categorical columns (level, source, exam, part) are
+dictionary-encoded, with the dictionaries kept in meta.json.
+
+Aggregates run as group-bys over the memoryviews with C-level iterators
+(zip/map/itertools.compress feeding collections.Counter), so a full-corpus
+count takes milliseconds without parsing a single exam.
+"""
+
+import json
+import mmap
+import operator
+import os
+import sys
+from array import array
+from collections import Counter
+from itertools import compress, repeat
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .loader import EXAMS_DIR, discover_exam_files, iter_exams
+from .writer import atomic_write_bytes
+
+INDEX_DIR = EXAMS_DIR.parent / "question_index"
+INDEX_VERSION = 2
+
+# column -> array typecode
+COLUMNS = {
+    "level": "B",         # code into meta["levels"]
+    "source": "B",        # code into meta["sources"]
+    "exam": "I",          # code into meta["exams"]
+    "mondai": "i",        # 0 when missing
+    "part": "B",          # code into meta["parts"]
+    "number": "i",        # -1 when missing
+    "answer": "i",        # -1 when missing
+    "option_count": "I",
+    "text_length": "I",   # characters
+    "has_passage": "B",
+    "has_audio": "B",
+    "text_offset": "Q",   # rows + 1 byte offsets into text.blob
+}
+
+# Values that do not fit a signed 32-bit column are stored as the missing sentinel
+_INT32 = range(-(1 << 31), 1 << 31)
+
+
+def _int32(value, missing: int) -> int:
+    return value if isinstance(value, int) and value in _INT32 else missing
+
+
+# Columns whose codes are decoded through a meta dictionary
+DICTIONARIES = {"level": "levels", "source": "sources", "exam": "exams", "part": "parts"}
+
+
+def extract_rows(file_path: Path, data: dict) -> dict:
+    """Flatten one parsed exam into per-question values (runs in a worker)"""
+    rows = {
+        "mondai": [], "part": [], "number": [], "answer": [], "option_count": [],
+        "text_length": [], "has_passage": [], "has_audio": [], "text": []
+    }
+    for section in data.get("sections", []):
+        mondai = section.get("mondai")
+        part = section.get("part", "unknown")
+        for question in section.get("questions", []):
+            text = question.get("text") or ""
+            options = question.get("options")
+            number = question.get("number")
+            answer = question.get("answer")
+            rows["mondai"].append(_int32(mondai, 0))
+            rows["part"].append(part if isinstance(part, str) else "unknown")
+            rows["number"].append(_int32(number, -1))
+            rows["answer"].append(_int32(answer, -1))
+            rows["option_count"].append(len(options) if isinstance(options, list) else 0)
+            rows["text_length"].append(len(text))
+            rows["has_passage"].append(1 if question.get("passage") else 0)
+            rows["has_audio"].append(1 if question.get("audioURL") else 0)
+            rows["text"].append(text.encode("utf-8"))
+    return rows
+
+
+def build_index(index_dir: Path = INDEX_DIR,
+                levels: Optional[Iterable] = None,
+                sources: Optional[Iterable[str]] = None,
+                workers: Optional[int] = None,
+                exams_dir: Path = EXAMS_DIR) -> dict:
+    """
+    Flatten every question of the corpus into the columnar index.
+
+    Returns:
+        The index metadata (row count, dictionaries, errors)
+    """
+    columns = {name: array(code) for name, code in COLUMNS.items()}
+    dictionaries: Dict[str, Dict[str, int]] = {"levels": {}, "sources": {}, "parts": {}}
+    exams: List[dict] = []
+    errors = {}
+    blob = bytearray()
+    columns["text_offset"].append(0)
+    files = {}
+
+    def code(dictionary: str, value: str) -> int:
+        return dictionaries[dictionary].setdefault(value, len(dictionaries[dictionary]))
+
+    for record in iter_exams(levels, sources, workers, transform=extract_rows, exams_dir=exams_dir):
+        relative = record.path.relative_to(exams_dir).as_posix()
+        # As of the bytes the worker read, so a later edit makes the index stale
+        files[relative] = [record.size, record.mtime_ns]
+        if record.error:
+            errors[relative] = record.error
+            continue
+
+        rows = record.data
+        count = len(rows["text"])
+        exam_code = len(exams)
+        exams.append({"id": record.path.stem, "level": record.level,
+                      "source": record.source, "file": relative, "questions": count})
+
+        columns["level"].extend(repeat(code("levels", record.level), count))
+        columns["source"].extend(repeat(code("sources", record.source), count))
+        columns["exam"].extend(repeat(exam_code, count))
+        columns["part"].extend(code("parts", part) for part in rows["part"])
+        for name in ("mondai", "number", "answer", "option_count",
+                     "text_length", "has_passage", "has_audio"):
+            columns[name].extend(rows[name])
+        for text in rows["text"]:
+            blob += text
+            columns["text_offset"].append(len(blob))
+
+    index_dir.mkdir(parents=True, exist_ok=True)
+    for name, values in columns.items():
+        atomic_write_bytes(index_dir / f"{name}.bin", values.tobytes())
+    atomic_write_bytes(index_dir / "text.blob", bytes(blob))
+
+    meta = {
+        "version": INDEX_VERSION,
+        "byteorder": sys.byteorder,
+        "rows": len(columns["exam"]),
+        "columns": COLUMNS,
+        "levels": list(dictionaries["levels"]),
+        "sources": list(dictionaries["sources"]),
+        "parts": list(dictionaries["parts"]),
+        "exams": exams,
+        "errors": errors,
+        "files": files,
+    }
+    atomic_write_bytes(index_dir / "meta.json",
+                       json.dumps(meta, ensure_ascii=False, indent=2).encode("utf-8"))
+    return meta
+
+
+class QuestionIndex:
+    """Read-only, memory-mapped view of a built question index"""
+
+    def __init__(self, index_dir: Path = INDEX_DIR):
+        self.index_dir = Path(index_dir)
+        with open(self.index_dir / "meta.json", "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported question index version: {self.meta.get('version')}")
+        if self.meta.get("byteorder") != sys.byteorder:
+            raise ValueError("Question index was built on a machine with a different byte order")
+        self.rows = self.meta["rows"]
+        self._maps: List[mmap.mmap] = []
+        self._columns: Dict[str, memoryview] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for view in self._columns.values():
+            view.release()
+        self._columns.clear()
+        for mapped in self._maps:
+            mapped.close()
+        self._maps.clear()
+
+    def _map(self, file_name: str):
+        with open(self.index_dir / file_name, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return mapped
+
+    def column(self, name: str) -> memoryview:
+        """Zero-copy view of a column's codes/values"""
+        if name not in self._columns:
+            typecode = self.meta["columns"][name]
+            self._columns[name] = memoryview(self._map(f"{name}.bin")).cast(typecode)
+        return self._columns[name]
+
+    def text(self, row: int) -> str:
+        """Question text of a row"""
+        if "text.blob" not in self._columns:
+            self._columns["text.blob"] = memoryview(self._map("text.blob"))
+        offsets = self.column("text_offset")
+        return bytes(self._columns["text.blob"][offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def encode(self, column: str, value) -> int:
+        """Translate a label (e.g. "N2", "grammar") into a column code"""
+        dictionary = DICTIONARIES.get(column)
+        if dictionary is None:
+            return value
+        values = self.meta[dictionary]
+        if dictionary == "exams":
+            values = [exam["id"] for exam in values]
+        return values.index(value) if value in values else -1
+
+    def decode(self, column: str, code: int):
+        dictionary = DICTIONARIES.get(column)
+        if dictionary is None:
+            return code
+        value = self.meta[dictionary][code]
+        return value["id"] if dictionary == "exams" else value
+
+    def mask(self, **where) -> Optional[Iterable[bool]]:
+        """Row selector for column == value conditions (labels are encoded)"""
+        selector = None
+        for column, value in where.items():
+            matches = map(operator.eq, self.column(column), repeat(self.encode(column, value)))
+            selector = matches if selector is None else map(operator.and_, selector, matches)
+        return selector
+
+    def count(self, **where) -> int:
+        """Number of rows matching every column == value condition"""
+        selector = self.mask(**where)
+        if selector is None:
+            return self.rows
+        return sum(selector)
+
+    def count_by(self, *columns: str, **where) -> Counter:
+        """
+        Group-by count, e.g. count_by("level", "part", answer=3).
+
+        Returns:
+            Counter keyed by decoded values (a tuple when grouping by several columns)
+        """
+        views = [self.column(name) for name in columns]
+        keys = zip(*views) if len(views) > 1 else views[0]
+        selector = self.mask(**where)
+        if selector is not None:
+            keys = compress(keys, selector)
+        counts = Counter(keys)
+
+        decoded = Counter()
+        for key, value in counts.items():
+            if len(columns) > 1:
+                key = tuple(self.decode(name, code) for name, code in zip(columns, key))
+            else:
+                key = self.decode(columns[0], key)
+            decoded[key] = value
+        return decoded
+
+    def is_stale(self, exams_dir: Path = EXAMS_DIR) -> bool:
+        """True if exam files were added, removed or modified since the build"""
+        built = self.meta.get("files", {})
+        files = discover_exam_files(exams_dir=exams_dir)
+        if len(files) != len(built):
+            return True
+        for path, _, _ in files:
+            stat = path.stat()
+            if built.get(path.relative_to(exams_dir).as_posix()) != [stat.st_size, stat.st_mtime_ns]:
+                return True
+        return False
+
+
+def open_index(index_dir: Path = INDEX_DIR,
+               workers: Optional[int] = None,
+               exams_dir: Path = EXAMS_DIR) -> QuestionIndex:
+    """Open the question index, (re)building it first if it is missing or stale"""
+    if (Path(index_dir) / "meta.json").exists():
+        try:
+            index = QuestionIndex(index_dir)
+        except ValueError:
+            # Built by another version or on another machine
+            index = None
+        if index is not None and not index.is_stale(exams_dir):
+            return index
+        if index is not None:
+            index.close()
+        print("♻️  Question index is out of date, rebuilding...")
+    else:
+        print("🏗️  Building question index...")
+    build_index(index_dir, workers=workers, exams_dir=exams_dir)
+    return QuestionIndex(index_dir)
@@ -0,0 +1,273 @@
+"""
+Allowlist-based HTML sanitizer for exam text fields
+
+sanitize_html tokenizes a fragment with the stdlib HTMLParser and re-emits
+only allowed tags and attributes; the text inside a removed tag is kept,
+except for "drop_content" elements (lucide <svg> icons, scripts, buttons)
+whose whole subtree is removed. Comments and declarations (e.g. Office
+<!--[if gte mso]> blocks) are dropped, entities are kept as written, and
+allowed tags whose attributes all survive are emitted byte for byte.
+
+Results are cached per distinct string, since the same passages and options
+repeat across hundreds of exams.
+"""
+
+import html
+import json
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from .manifest import fingerprint
+
+# tag -> allowed attributes
+DEFAULT_ALLOWLIST = {
+    "tags": {
+        "ruby": ["style"], "rt": ["style"], "rp": [],
+        "b": ["style"], "strong": [], "em": [], "u": ["class"], "del": [],
+        "sub": [], "sup": [], "br": [], "wbr": [], "hr": ["size", "noshade"],
+        "span": ["class", "style"], "div": ["class", "style"], "p": ["class", "style"],
+        "center": [], "h3": [], "h4": [], "h5": [],
+        "ul": ["class"], "ol": ["class"], "li": ["class", "value", "align"],
+        "table": ["class", "style", "border", "cellpadding", "cellspacing", "width", "align"],
+        "thead": [], "tbody": [], "tr": ["class", "style"],
+        "td": ["class", "style", "colspan", "rowspan", "nowrap", "align", "valign", "width"],
+        "th": ["class", "style", "colspan", "rowspan"],
+        "img": ["src", "alt", "width", "height"],
+        "a": ["href"],
+    },
+    # Removed together with everything inside them
+    "drop_content": ["svg", "script", "style", "button", "head", "title", "template"],
+}
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+             "meta", "source", "track", "wbr"}
+
+# Real HTML elements: when not allowed they are removed (keeping their text).
+# Anything else that merely looks like a tag, e.g. "<yamaguchi @ alc-n1 .co.jp>",
+# is text to the author and is kept, escaped so it is actually displayed.
+HTML_TAGS = VOID_TAGS | {
+    "a", "abbr", "address", "article", "aside", "audio", "b", "bdi", "bdo", "big",
+    "blockquote", "body", "button", "canvas", "caption", "center", "cite", "code",
+    "colgroup", "data", "datalist", "dd", "del", "details", "dfn", "dialog", "div",
+    "dl", "dt", "em", "fieldset", "figcaption", "figure", "font", "footer", "form",
+    "h1", "h2", "h3", "h4", "h5", "h6", "head", "header", "html", "i", "iframe", "ins",
+    "kbd", "label", "legend", "li", "main", "map", "mark", "math", "menu", "meter",
+    "nav", "nobr", "noscript", "object", "ol", "optgroup", "option", "output", "p",
+    "picture", "pre", "progress", "q", "rb", "rp", "rt", "rtc", "ruby", "s", "samp",
+    "script", "section", "select", "small", "span", "strike", "strong", "style", "sub",
+    "summary", "sup", "svg", "table", "tbody", "td", "template", "textarea", "tfoot",
+    "th", "thead", "time", "title", "tr", "tt", "u", "ul", "var", "video",
+}
+
+# URL attributes must use one of these schemes (or be relative)
+URL_ATTRIBUTES = {"href", "src"}
+SAFE_SCHEMES = ("http:", "https:", "data:image/")
+
+
+def load_allowlist(path: Path) -> dict:
+    """Load an allowlist JSON file with the same shape as DEFAULT_ALLOWLIST"""
+    with open(path, "r", encoding="utf-8") as f:
+        allowlist = json.load(f)
+    if not isinstance(allowlist.get("tags"), dict):
+        raise ValueError(f"{path}: 'tags' must map tag names to attribute lists")
+    allowlist.setdefault("drop_content", DEFAULT_ALLOWLIST["drop_content"])
+    return allowlist
+
+
+def _safe_url(value: str) -> bool:
+    value = value.strip().lower()
+    if ":" not in value.split("/", 1)[0]:
+        return True
+    return value.startswith(SAFE_SCHEMES)
+
+
+class _Tokenizer(HTMLParser):
+    """Streams tokens into an output list, filtering them against the allowlist"""
+
+    def __init__(self, text: str, tags: Dict[str, Set[str]], drop_content: Set[str]):
+        super().__init__(convert_charrefs=False)
+        self.text = text
+        self.tags = tags
+        self.drop_content = drop_content
+        self.out = []
+        self.dropping = []
+        self.line_starts = [0]
+        position = text.find("\n")
+        while position != -1:
+            self.line_starts.append(position + 1)
+            position = text.find("\n", position + 1)
+
+    def _offset(self) -> int:
+        """Index in the text of the token being handled"""
+        line, column = self.getpos()
+        return self.line_starts[line - 1] + column
+
+    def _raw_end_tag(self) -> str:
+        start = self._offset()
+        return self.text[start:self.text.index(">", start) + 1]
+
+    @staticmethod
+    def _is_html(tag: str) -> bool:
+        # Namespaced Office markup (v:shape, o:p, w:anchorlock) counts as HTML
+        return tag in HTML_TAGS or ":" in tag
+
+    def _attributes(self, tag: str, attrs) -> Optional[str]:
+        """Serialized allowed attributes, or None if every attribute is allowed"""
+        allowed = self.tags[tag]
+        kept = [(name, value) for name, value in attrs
+                if name in allowed and not (name in URL_ATTRIBUTES and not _safe_url(value or ""))]
+        if len(kept) == len(attrs):
+            return None
+        return "".join(f" {name}" if value is None else f' {name}="{html.escape(value)}"'
+                       for name, value in kept)
+
+    def _start(self, tag: str, attrs, closed: bool):
+        if self.dropping:
+            if tag not in VOID_TAGS and not closed:
+                self.dropping.append(tag)
+            return
+        if tag in self.drop_content:
+            if tag not in VOID_TAGS and not closed:
+                self.dropping.append(tag)
+            return
+        if tag not in self.tags:
+            if not self._is_html(tag):
+                self.out.append(html.escape(self.get_starttag_text(), quote=False))
+            return
+        rebuilt = self._attributes(tag, attrs)
+        if rebuilt is None:
+            self.out.append(self.get_starttag_text())
+        else:
+            self.out.append(f"<{tag}{rebuilt}{' /' if closed else ''}>")
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, closed=False)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, closed=True)
+
+    def handle_endtag(self, tag):
+        if self.dropping:
+            if tag in self.dropping:
+                # Close up to the matching element, tolerating unclosed children
+                while self.dropping.pop() != tag:
+                    pass
+            return
+        if tag in self.tags and tag not in VOID_TAGS:
+            self.out.append(self._raw_end_tag())
+        elif tag == "br" and "br" in self.tags:
+            # Browsers read a stray </br> as <br>
+            self.out.append("<br>")
+        elif not self._is_html(tag):
+            self.out.append(html.escape(self._raw_end_tag(), quote=False))
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.out.append(data)
+
+    def _reference(self, length: int):
+        if not self.dropping:
+            # Keep the reference as written, with or without its ;
+            start = self._offset()
+            end = start + length
+            if self.text.startswith(";", end):
+                end += 1
+            self.out.append(self.text[start:end])
+
+    def handle_entityref(self, name):
+        self._reference(len(name) + 1)
+
+    def handle_charref(self, name):
+        self._reference(len(name) + 2)
+
+    # Comments, doctype/conditional declarations and processing instructions are dropped
+    def handle_comment(self, data):
+        pass
+
+    def handle_decl(self, decl):
+        pass
+
+    def unknown_decl(self, data):
+        pass
+
+    def handle_pi(self, data):
+        pass
+
+
+class Sanitizer:
+    """Sanitizes strings against one allowlist, caching the result per distinct string"""
+
+    def __init__(self, allowlist: dict = None):
+        allowlist = allowlist or DEFAULT_ALLOWLIST
+        self.tags = {tag.lower(): {a.lower() for a in attrs}
+                     for tag, attrs in allowlist["tags"].items()}
+        self.drop_content = {tag.lower() for tag in allowlist.get("drop_content", [])}
+        self.cache: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def sanitize(self, text: str) -> str:
+        cached = self.cache.get(text)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        if "<" not in text:
+            # No markup at all: nothing to remove
+            result = text
+        else:
+            tokenizer = _Tokenizer(text, self.tags, self.drop_content)
+            tokenizer.feed(text)
+            tokenizer.close()
+            result = "".join(tokenizer.out)
+        self.cache[text] = result
+        return result
+
+    def sanitize_value(self, value):
+        """
+        Sanitize every string inside a JSON value in place.
+
+        Returns:
+            (sanitized value, True if anything changed)
+        """
+        if isinstance(value, str):
+            cleaned = self.sanitize(value)
+            return cleaned, cleaned != value
+        modified = False
+        if isinstance(value, list):
+            for i, item in enumerate(value):
+                value[i], changed = self.sanitize_value(item)
+                modified |= changed
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                value[key], changed = self.sanitize_value(item)
+                modified |= changed
+        return value, modified
+
+    def sanitize_exam(self, data: dict) -> bool:
+        """Sanitize every string field of every question; True if anything changed"""
+        modified = False
+        for section in data.get("sections", []):
+            for question in section.get("questions", []):
+                _, changed = self.sanitize_value(question)
+                modified |= changed
+        return modified
+
+
+# One sanitizer per allowlist in each process, so worker caches persist across files
+_SANITIZERS: Dict[str, Sanitizer] = {}
+
+
+def get_sanitizer(allowlist: dict = None) -> Sanitizer:
+    allowlist = allowlist or DEFAULT_ALLOWLIST
+    key = fingerprint(allowlist)
+    if key not in _SANITIZERS:
+        _SANITIZERS[key] = Sanitizer(allowlist)
+    return _SANITIZERS[key]
+
+
+def sanitize_html(text: str, allowlist: dict = None) -> str:
+    """Sanitize one HTML fragment (cached per distinct string)"""
+    return get_sanitizer(allowlist).sanitize(text)
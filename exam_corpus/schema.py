@@ -0,0 +1,278 @@
+"""
+Exam JSON schema compiled into a specialized Python validation function
+
+exam_schema.json at the repository root describes the exam format with a
+JSON Schema (draft-07) subset: type, enum, required, properties,
+additionalProperties, items, minimum/maximum, minLength, minItems and local
+$ref. compile_schema turns it into Python source once - one function per
+$ref target, with every check inlined and property names, enums and pointer
+prefixes resolved at compile time - and exec()s it, so validating a document
+runs straight-line checks with no schema interpretation.
+
+The validator returns (pointer, message) pairs with RFC 6901 pointers, e.g.
+("/sections/3/questions/0/answer", "expected integer or null, got string").
+"""
+
+import json
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from .changeset import escape_token
+from .loader import REPO_DIR
+from .manifest import fingerprint
+
+SCHEMA_FILE = REPO_DIR / "exam_schema.json"
+
+Validator = Callable[[object], List[Tuple[str, str]]]
+
+# Keywords that only document the schema
+_ANNOTATIONS = {"$schema", "$id", "$comment", "title", "description", "definitions",
+                "default", "examples"}
+_SUPPORTED = {"type", "enum", "required", "properties", "additionalProperties", "items",
+              "minimum", "maximum", "minLength", "minItems", "$ref"}
+
+# JSON type -> Python types as they come out of json.loads (bool is not an integer)
+_TYPES = {
+    "object": ("dict",),
+    "array": ("list",),
+    "string": ("str",),
+    "integer": ("int",),
+    "number": ("int", "float"),
+    "boolean": ("bool",),
+    "null": ("NoneType",),
+}
+
+_JSON_NAMES = {dict: "object", list: "array", str: "string", int: "integer",
+               float: "number", bool: "boolean", type(None): "null"}
+
+
+def _json_type(value) -> str:
+    return _JSON_NAMES.get(type(value), type(value).__name__)
+
+
+def load_schema(path: Path = SCHEMA_FILE) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class _Compiler:
+    """Generates the Python source of a validator, one function per $ref target"""
+
+    def __init__(self, schema: dict):
+        self.root = schema
+        self.functions: Dict[str, str] = {}
+        self.blocks: List[List[str]] = []
+        self.constants: Dict[str, object] = {}
+        self.counter = 0
+
+    def _name(self, prefix: str) -> str:
+        self.counter += 1
+        return f"_{prefix}{self.counter}"
+
+    def _constant(self, value) -> str:
+        name = self._name("c")
+        self.constants[name] = value
+        return name
+
+    def _resolve(self, ref: str) -> dict:
+        if not ref.startswith("#"):
+            raise ValueError(f"Only local $ref is supported: {ref}")
+        node = self.root
+        for token in ref[1:].split("/")[1:]:
+            token = token.replace("~1", "/").replace("~0", "~")
+            node = node[int(token)] if isinstance(node, list) else node[token]
+        return node
+
+    def function(self, ref: str) -> str:
+        """Name of the function validating the schema at ref (compiled on first use)"""
+        if ref not in self.functions:
+            name = self._name("ref")
+            self.functions[ref] = name
+            lines = [f"def {name}(v, p, out):"]
+            body = self.checks(self._resolve(ref), "v", "p", 1)
+            self.blocks.append(lines + (body or ["    pass"]))
+        return self.functions[ref]
+
+    def checks(self, schema: dict, var: str, pointer: str, depth: int) -> List[str]:
+        """
+        Source lines checking the value in var against schema.
+
+        pointer is a Python expression for the value's pointer; it is only
+        evaluated when a finding is reported or a $ref function is called.
+        """
+        unknown = set(schema) - _SUPPORTED - _ANNOTATIONS
+        if unknown:
+            raise ValueError(f"Unsupported schema keyword(s): {', '.join(sorted(unknown))}")
+        pad = "    " * depth
+
+        if "$ref" in schema:
+            return [f"{pad}{self.function(schema['$ref'])}({var}, {pointer}, out)"]
+
+        lines: List[str] = []
+        types = schema.get("type")
+        if isinstance(types, str):
+            types = [types]
+        python_types = [t for name in types or [] for t in _TYPES[name]]
+        nested = depth
+
+        if types:
+            check = (f"type({var}) is not {python_types[0]}" if len(python_types) == 1
+                     else f"type({var}) not in ({', '.join(python_types)})")
+            expected = " or ".join(types)
+            lines += [f"{pad}if {check}:",
+                      f"{pad}    out.append(({pointer}, {f'expected {expected}, got '!r} + _json_type({var})))"]
+            nested = depth + 1
+
+        rest = []
+        if "enum" in schema:
+            values = self._constant(tuple(schema["enum"]))
+            inner = "    " * nested
+            rest += [f"{inner}if {var} not in {values}:",
+                     f"{inner}    out.append(({pointer}, repr({var}) + {' is not one of ' + json.dumps(schema['enum'])!r}))"]
+        rest += self._number_checks(schema, var, pointer, types, nested)
+        rest += self._string_checks(schema, var, pointer, types, nested)
+        rest += self._array_checks(schema, var, pointer, types, nested)
+        rest += self._object_checks(schema, var, pointer, types, nested)
+        if rest:
+            if types:
+                lines.append(f"{pad}else:")
+            lines += rest
+        return lines
+
+    @staticmethod
+    def _guard(types, wanted: str, var: str, pad: str, python: str) -> Tuple[List[str], str]:
+        """A type guard for keywords of one JSON type, unless the type is already certain"""
+        if types == [wanted] or (wanted == "number" and types in (["integer"], ["number"])):
+            return [], pad
+        return [f"{pad}if type({var}) in ({python},):"], pad + "    "
+
+    def _number_checks(self, schema, var, pointer, types, depth) -> List[str]:
+        bounds = [(key, op) for key, op in (("minimum", "<"), ("maximum", ">")) if key in schema]
+        if not bounds:
+            return []
+        lines, pad = self._guard(types, "number", var, "    " * depth, "int, float")
+        for key, op in bounds:
+            limit = schema[key]
+            message = f" is {'less' if op == '<' else 'greater'} than the {key} {limit}"
+            lines += [f"{pad}if {var} {op} {limit!r}:",
+                      f"{pad}    out.append(({pointer}, repr({var}) + {message!r}))"]
+        return lines
+
+    def _string_checks(self, schema, var, pointer, types, depth) -> List[str]:
+        if "minLength" not in schema:
+            return []
+        lines, pad = self._guard(types, "string", var, "    " * depth, "str")
+        size = schema["minLength"]
+        return lines + [f"{pad}if len({var}) < {size}:",
+                        f"{pad}    out.append(({pointer}, {f'shorter than {size} character(s)'!r}))"]
+
+    def _array_checks(self, schema, var, pointer, types, depth) -> List[str]:
+        if "minItems" not in schema and "items" not in schema:
+            return []
+        lines, pad = self._guard(types, "array", var, "    " * depth, "list")
+        if "minItems" in schema:
+            size = schema["minItems"]
+            lines += [f"{pad}if len({var}) < {size}:",
+                      f"{pad}    out.append(({pointer}, {f'fewer than {size} item(s)'!r}))"]
+        if "items" in schema:
+            index, item = self._name("i"), self._name("x")
+            body = self.checks(schema["items"], item, f"{pointer} + '/' + str({index})",
+                               len(pad) // 4 + 1)
+            if body:
+                lines += [f"{pad}for {index}, {item} in enumerate({var}):"] + body
+        return lines
+
+    def _object_checks(self, schema, var, pointer, types, depth) -> List[str]:
+        keys = ("required", "properties", "additionalProperties")
+        if not any(key in schema for key in keys):
+            return []
+        lines, pad = self._guard(types, "object", var, "    " * depth, "dict")
+        for name in schema.get("required", []):
+            lines += [f"{pad}if {name!r} not in {var}:",
+                      f"{pad}    out.append(({pointer}, {f'missing required property {name}'!r}))"]
+
+        properties = schema.get("properties", {})
+        for name, subschema in properties.items():
+            value = self._name("x")
+            body = self.checks(subschema, value, f"{pointer} + {'/' + escape_token(name)!r}",
+                               len(pad) // 4 + 1)
+            if body:
+                lines += [f"{pad}{value} = {var}.get({name!r}, _MISSING)",
+                          f"{pad}if {value} is not _MISSING:"] + body
+
+        extra = schema.get("additionalProperties", True)
+        if extra is not True:
+            known = self._constant(frozenset(properties))
+            key = self._name("k")
+            lines += [f"{pad}if not {known}.issuperset({var}):",
+                      f"{pad}    for {key} in {var}:",
+                      f"{pad}        if {key} in {known}:",
+                      f"{pad}            continue"]
+            key_pointer = f"{pointer} + '/' + _escape({key})"
+            if extra is False:
+                lines.append(f"{pad}        out.append(({key_pointer}, 'unexpected property ' + {key}))")
+            else:
+                lines += self.checks(extra, f"{var}[{key}]", key_pointer, len(pad) // 4 + 2)
+        return lines
+
+    def source(self) -> str:
+        self.function("#")
+        return "\n\n".join("\n".join(block) for block in reversed(self.blocks)) + "\n"
+
+
+def compile_schema(schema: dict) -> Validator:
+    """
+    Compile a schema into a validation function.
+
+    Returns:
+        validate(document) -> list of (pointer, message); the generated
+        Python code is available as validate.source
+
+    Raises:
+        ValueError: If the schema uses an unsupported keyword or $ref
+    """
+    compiler = _Compiler(schema)
+    source = compiler.source()
+    namespace = {"_MISSING": object(), "_json_type": _json_type, "_escape": escape_token,
+                 "NoneType": type(None)}
+    namespace.update(compiler.constants)
+    exec(compile(source, "<exam_schema>", "exec"), namespace)
+    root = namespace[compiler.functions["#"]]
+
+    def validate(document) -> List[Tuple[str, str]]:
+        out: List[Tuple[str, str]] = []
+        root(document, "", out)
+        return out
+
+    validate.source = source
+    return validate
+
+
+# Compiled validators per schema file in this process
+_VALIDATORS: Dict[Path, Tuple[str, Validator]] = {}
+
+
+def get_validator(path: Path = SCHEMA_FILE) -> Validator:
+    """The compiled validator of a schema file (compiled once per process)"""
+    path = Path(path)
+    if path not in _VALIDATORS:
+        schema = load_schema(path)
+        _VALIDATORS[path] = (fingerprint(schema), compile_schema(schema))
+    return _VALIDATORS[path][1]
+
+
+def schema_fingerprint(path: Path = SCHEMA_FILE) -> str:
+    """Fingerprint of a schema file, for invalidating cached results"""
+    get_validator(path)
+    return _VALIDATORS[Path(path)][0]
+
+
+def schema_errors(file_path: Path, data: dict = None, schema_path: Path = SCHEMA_FILE) -> List[str]:
+    """
+    Manifest analysis: schema violations of one exam as "pointer: message"
+    strings (reads the file when data is not already parsed).
+    """
+    if data is None:
+        with open(file_path, "rb") as f:
+            data = json.loads(f.read())
+    return [f"{pointer or '/'}: {message}" for pointer, message in get_validator(schema_path)(data)]
@@ -0,0 +1,222 @@
+"""
+Batch scoring of answer sheets against exam keys
+
+An exam compiles once into an AnswerKey: one byte per question holding the
+zero-based answer, a mask byte (0x80) for every question whose answer is
+one of its options, and the question range of each section. Exams that
+store 1-based answers (see answer_bias.answer_base) are shifted to 0-based
+when compiling. Answer sheets use the same layout, one byte per question
+with BLANK for no answer; sheets always hold zero-based option indices.
+
+score_batch concatenates a whole batch of sheets and scores it with a
+handful of big-integer operations: XOR against the key repeated once per
+sheet leaves a zero byte for every correct answer, and a SWAR zero-byte
+test turns those into flags in a single pass over all sheets. Each
+question's flags across the batch are a strided slice of the result, and
+adding those slices as integers with one byte per sheet counts a whole
+section for every sheet at once; sections are then summed into mondai,
+part and total scores. No Python code runs per sheet and question.
+"""
+
+import json
+import os
+import sys
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .answer_bias import exam_answer_base
+from .loader import EXAMS_DIR, find_exam_file
+
+BLANK = 0xFF
+
+# Key byte of questions without an answer; they are masked out, never scored
+NO_ANSWER = 0xFE
+
+_FLAG = 0x80
+
+Sheet = Union[bytes, bytearray, memoryview, Sequence[Optional[int]]]
+
+
+class AnswerKey:
+    """Compiled answer key of one exam"""
+
+    def __init__(self, exam_id: str, data: dict):
+        self.exam_id = exam_id
+        # Answers as stored are this much above the zero-based option index
+        self.base = exam_answer_base(data)
+        key = bytearray()
+        mask = bytearray()
+        # (mondai, part, first question, end) per section
+        self.sections: List[Tuple[Optional[int], Optional[str], int, int]] = []
+        for section in data.get("sections", []):
+            start = len(key)
+            for question in section.get("questions", []):
+                answer = question.get("answer")
+                options = question.get("options")
+                if isinstance(answer, int):
+                    answer -= self.base
+                # An answer no option can match is not scored
+                if (isinstance(answer, int) and isinstance(options, list)
+                        and 0 <= answer < min(len(options), NO_ANSWER)):
+                    key.append(answer)
+                    mask.append(_FLAG)
+                else:
+                    key.append(NO_ANSWER)
+                    mask.append(0)
+            self.sections.append((section.get("mondai"), section.get("part"), start, len(key)))
+        self.key = bytes(key)
+        self.mask = bytes(mask)
+
+        self.parts: List[str] = []
+        self.mondais: List[int] = []
+        for mondai, part, _, _ in self.sections:
+            if part not in self.parts:
+                self.parts.append(part)
+            if mondai not in self.mondais:
+                self.mondais.append(mondai)
+
+    def __len__(self) -> int:
+        return len(self.key)
+
+    def max_scores(self) -> dict:
+        """Scorable questions: total, by_part (as in the exam statistics) and by_mondai"""
+        by_part: Dict[str, int] = defaultdict(int)
+        by_mondai: Dict[int, int] = defaultdict(int)
+        for mondai, part, start, end in self.sections:
+            count = self.mask.count(_FLAG, start, end)
+            by_part[part] += count
+            by_mondai[mondai] += count
+        return {"total": sum(by_part.values()), "by_part": dict(by_part), "by_mondai": dict(by_mondai)}
+
+    def encode(self, answers: Sheet) -> bytes:
+        """
+        One sheet in key layout: a list of chosen option indices (None for
+        blank) or ready-made bytes.
+
+        Raises:
+            ValueError: If the sheet does not have one answer per question, or
+                an answer is neither None nor an integer
+        """
+        try:
+            sheet = bytes(answers)
+        except (TypeError, ValueError):
+            # Blanks (None) or out-of-range choices
+            for position, answer in enumerate(answers):
+                if answer is not None and not isinstance(answer, int):
+                    raise ValueError(f"{self.exam_id}: answer {position + 1} is {answer!r}, "
+                                     f"not an option index") from None
+            sheet = bytes(BLANK if answer is None or not 0 <= answer < NO_ANSWER else answer
+                          for answer in answers)
+        if len(sheet) != len(self.key):
+            raise ValueError(f"{self.exam_id}: sheet has {len(sheet)} answers, "
+                             f"exam has {len(self.key)} questions")
+        return sheet
+
+    def score_batch(self, sheets: Iterable[Sheet], ids: Optional[Sequence] = None) -> "Scores":
+        """
+        Score many sheets at once.
+
+        Raises:
+            ValueError: If a sheet cannot be encoded; the message names the
+                sheet by its entry in ids (default: its 1-based position)
+        """
+        encoded = []
+        for index, sheet in enumerate(sheets):
+            try:
+                encoded.append(self.encode(sheet))
+            except ValueError as e:
+                name = ids[index] if ids is not None else index + 1
+                raise ValueError(f"sheet {name}: {e}") from None
+        count, size = len(encoded), len(self.key)
+        if not count or not size:
+            return Scores(self, count, {})
+
+        width = count * size
+        low7 = int.from_bytes(b"\x7f" * width, "little")
+        diff = (int.from_bytes(b"".join(encoded), "little")
+                ^ int.from_bytes(self.key * count, "little"))
+        # High bit of each byte that is zero: no carry can cross bytes since 0x7f + 0x7f < 0x100
+        zero = (((diff & low7) + low7) | diff | low7) ^ int.from_bytes(b"\xff" * width, "little")
+        # One byte per answer: 1 if correct, else 0
+        hits = ((zero & int.from_bytes(self.mask * count, "little")) >> 7).to_bytes(width, "little")
+
+        # Per section, add up the question columns (every size-th byte) as
+        # integers with one byte per sheet, flushing into 16-bit lanes before
+        # a byte could overflow
+        sections = {}
+        for index, (_, _, start, end) in enumerate(self.sections):
+            total = 0
+            for first in range(start, end, 255):
+                lanes = sum(int.from_bytes(hits[question::size], "little")
+                            for question in range(first, min(first + 255, end)))
+                wide = bytearray(2 * count)
+                wide[0::2] = lanes.to_bytes(count, "little")
+                total += int.from_bytes(wide, "little")
+            sections[index] = total
+        return Scores(self, count, sections)
+
+    def score(self, answers: Sheet) -> dict:
+        """Score a single sheet"""
+        return self.score_batch([answers]).row(0)
+
+
+class Scores:
+    """
+    Scores of a batch, column-wise: totals, by_part[part] and
+    by_mondai[mondai] are arrays with one value per sheet
+    """
+
+    def __init__(self, key: AnswerKey, count: int, sections: Dict[int, int]):
+        self.key = key
+        self.count = count
+        # Sums stay integers with one 16-bit lane per sheet until the end
+        totals = 0
+        by_part = dict.fromkeys(key.parts, 0)
+        by_mondai = dict.fromkeys(key.mondais, 0)
+        for index, lanes in sections.items():
+            mondai, part, _, _ = key.sections[index]
+            totals += lanes
+            by_part[part] += lanes
+            by_mondai[mondai] += lanes
+        self.totals = self._column(totals)
+        self.by_part = {part: self._column(lanes) for part, lanes in by_part.items()}
+        self.by_mondai = {mondai: self._column(lanes) for mondai, lanes in by_mondai.items()}
+
+    def _column(self, lanes: int) -> array:
+        column = array("H", lanes.to_bytes(2 * self.count, "little"))
+        if sys.byteorder == "big":
+            column.byteswap()
+        return column
+
+    def __len__(self) -> int:
+        return self.count
+
+    def row(self, index: int) -> dict:
+        """Scores of one sheet: total, by_part and by_mondai"""
+        return {
+            "total": self.totals[index],
+            "by_part": {part: column[index] for part, column in self.by_part.items()},
+            "by_mondai": {mondai: column[index] for mondai, column in self.by_mondai.items()},
+        }
+
+
+# Keys compiled by this process: path -> (size, mtime_ns, key)
+_KEYS: Dict[Path, Tuple[int, int, AnswerKey]] = {}
+
+
+def load_key(exam: Union[str, Path], exams_dir: Path = EXAMS_DIR) -> AnswerKey:
+    """
+    Compiled key of an exam (an id or a file path), cached until the file
+    changes.
+    """
+    path = Path(exam) if str(exam).endswith(".json") else find_exam_file(str(exam), exams_dir)[0]
+    stat = os.stat(path)
+    cached = _KEYS.get(path)
+    if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        return cached[2]
+    with open(path, "r", encoding="utf-8") as f:
+        key = AnswerKey(path.stem, json.load(f))
+    _KEYS[path] = (stat.st_size, stat.st_mtime_ns, key)
+    return key
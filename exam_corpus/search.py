@@ -0,0 +1,382 @@
+"""
+SQLite question bank with FTS5 trigram search
+
+exam_search.db holds every exam, section and question (indexed by level,
+part and mondai) plus two FTS5 tables using the trigram tokenizer, which
+needs no word segmentation and so works for Japanese:
+
+    question_fts  over questions.search_text / search_options
+    passage_fts   over passages.search_text (each distinct passage once)
+
+The indexed text is the HTML with furigana (<rt>/<rp>) and tags removed and
+entities decoded, so 関<rt>かか</rt>わらず is found as 関わらず. Trigrams
+need queries of 3+ characters; shorter ones scan the plain text of the
+questions left after the level/part/mondai filters. Imports are
+incremental: files whose size and mtime, or else content hash, match the
+stored exam are skipped; changed files are replaced and removed files
+deleted, all in one transaction.
+"""
+
+import html
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from .loader import EXAMS_DIR, discover_exam_files, iter_exams, normalize_level
+from .manifest import bytes_hash
+
+DB_PATH = EXAMS_DIR.parent / "exam_search.db"
+
+# Bump when the tables or the indexed text change; the database is then rebuilt
+SEARCH_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE exams (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    exam_id TEXT NOT NULL,
+    title TEXT,
+    level TEXT NOT NULL,
+    source TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE sections (
+    id INTEGER PRIMARY KEY,
+    exam INTEGER NOT NULL REFERENCES exams(id),
+    position INTEGER NOT NULL,
+    mondai INTEGER,
+    part TEXT,
+    title TEXT
+);
+CREATE TABLE passages (
+    id INTEGER PRIMARY KEY,
+    hash TEXT UNIQUE NOT NULL,
+    html TEXT NOT NULL,
+    search_text TEXT NOT NULL
+);
+CREATE TABLE questions (
+    id INTEGER PRIMARY KEY,
+    exam INTEGER NOT NULL REFERENCES exams(id),
+    section INTEGER NOT NULL REFERENCES sections(id),
+    position INTEGER NOT NULL,
+    level TEXT NOT NULL,
+    part TEXT,
+    mondai INTEGER,
+    number INTEGER,
+    text TEXT,
+    options TEXT,
+    answer INTEGER,
+    audio_url TEXT,
+    passage INTEGER REFERENCES passages(id),
+    search_text TEXT NOT NULL,
+    search_options TEXT NOT NULL
+);
+CREATE INDEX questions_filter ON questions(level, part, mondai);
+CREATE INDEX questions_exam ON questions(exam);
+CREATE INDEX questions_passage ON questions(passage);
+CREATE INDEX sections_exam ON sections(exam);
+CREATE VIRTUAL TABLE question_fts USING fts5(
+    search_text, search_options, content='questions', content_rowid='id', tokenize='trigram');
+CREATE VIRTUAL TABLE passage_fts USING fts5(
+    search_text, content='passages', content_rowid='id', tokenize='trigram');
+"""
+
+SEARCH_FIELDS = ("text", "options", "passage")
+
+_FURIGANA = re.compile(r"<(rt|rp)\b[^>]*>.*?</\1\s*>", re.S | re.I)
+_TAG = re.compile(r"<[^>]*>")
+_SPACE = re.compile(r"\s+")
+
+
+def plain_text(value) -> str:
+    """Searchable text of an HTML fragment: no furigana, tags or entities"""
+    if not isinstance(value, str):
+        return ""
+    if "<" in value:
+        value = _TAG.sub("", _FURIGANA.sub("", value))
+    if "&" in value:
+        value = html.unescape(value)
+    return _SPACE.sub(" ", value).strip()
+
+
+def exam_rows(file_path: Path, data: dict) -> dict:
+    """
+    Worker transform: everything the importer stores for one exam, with the
+    searchable text already extracted (the file's hash comes from the loader).
+    """
+    sections = []
+    for section in data.get("sections", []):
+        questions = []
+        for question in section.get("questions", []):
+            options = question.get("options")
+            passage = question.get("passage")
+            questions.append({
+                "number": question.get("number"),
+                "text": question.get("text"),
+                "options": json.dumps(options, ensure_ascii=False) if options is not None else None,
+                "answer": question.get("answer"),
+                "audio_url": question.get("audioURL"),
+                "passage": passage if isinstance(passage, str) and passage else None,
+                "search_text": plain_text(question.get("text")),
+                "search_options": "\n".join(plain_text(o) for o in options or []),
+            })
+        sections.append({"mondai": section.get("mondai"), "part": section.get("part"),
+                         "title": section.get("title"), "questions": questions})
+    return {"exam_id": data.get("id"), "title": data.get("title"),
+            "sections": sections}
+
+
+def connect(db_path: Path = DB_PATH) -> sqlite3.Connection:
+    """Open the database, (re)creating the tables if missing or outdated"""
+    db = sqlite3.connect(db_path)
+    db.row_factory = sqlite3.Row
+    if db.execute("PRAGMA user_version").fetchone()[0] != SEARCH_VERSION:
+        db.close()
+        Path(db_path).unlink(missing_ok=True)
+        db = sqlite3.connect(db_path)
+        db.row_factory = sqlite3.Row
+        db.executescript(SCHEMA)
+        db.execute(f"PRAGMA user_version = {SEARCH_VERSION}")
+    return db
+
+
+def _delete_exam(db: sqlite3.Connection, exam: int):
+    # External-content FTS rows are deleted by handing back the indexed values
+    db.execute("INSERT INTO question_fts (question_fts, rowid, search_text, search_options) "
+               "SELECT 'delete', id, search_text, search_options FROM questions WHERE exam = ?",
+               (exam,))
+    db.execute("DELETE FROM questions WHERE exam = ?", (exam,))
+    db.execute("DELETE FROM sections WHERE exam = ?", (exam,))
+    db.execute("DELETE FROM exams WHERE id = ?", (exam,))
+
+
+class _Importer:
+    """Inserts exams, sharing passages by hash across the whole database"""
+
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+        self.passages = {row[0]: row[1] for row in db.execute("SELECT hash, id FROM passages")}
+
+    def passage_id(self, passage: str) -> int:
+        digest = bytes_hash(passage.encode("utf-8"))
+        if digest not in self.passages:
+            passage_id = self.db.execute(
+                "INSERT INTO passages (hash, html, search_text) VALUES (?, ?, ?)",
+                (digest, passage, plain_text(passage))).lastrowid
+            self.db.execute("INSERT INTO passage_fts (rowid, search_text) "
+                            "SELECT id, search_text FROM passages WHERE id = ?", (passage_id,))
+            self.passages[digest] = passage_id
+        return self.passages[digest]
+
+    def insert(self, record, relative: str, rows: dict):
+        db = self.db
+        exam = db.execute(
+            "INSERT INTO exams (path, exam_id, title, level, source, size, mtime_ns, hash) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (relative, rows["exam_id"] or record.path.stem, rows["title"], record.level,
+             record.source, record.size, record.mtime_ns, record.hash)).lastrowid
+
+        questions = []
+        for position, section in enumerate(rows["sections"]):
+            section_id = db.execute(
+                "INSERT INTO sections (exam, position, mondai, part, title) VALUES (?, ?, ?, ?, ?)",
+                (exam, position, section["mondai"], section["part"], section["title"])).lastrowid
+            for number, q in enumerate(section["questions"]):
+                questions.append((
+                    exam, section_id, number, record.level, section["part"], section["mondai"],
+                    q["number"], q["text"], q["options"], q["answer"], q["audio_url"],
+                    self.passage_id(q["passage"]) if q["passage"] else None,
+                    q["search_text"], q["search_options"]))
+        db.executemany(
+            "INSERT INTO questions (exam, section, position, level, part, mondai, number, text, "
+            "options, answer, audio_url, passage, search_text, search_options) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", questions)
+        db.execute("INSERT INTO question_fts (rowid, search_text, search_options) "
+                   "SELECT id, search_text, search_options FROM questions WHERE exam = ?", (exam,))
+
+
+def import_exams(db_path: Path = DB_PATH,
+                 exams_dir: Path = EXAMS_DIR,
+                 workers: Optional[int] = None,
+                 full: bool = False) -> dict:
+    """
+    Bring the database in line with the exams tree.
+
+    Returns:
+        Report with files, imported, unchanged, removed, errors and seconds
+    """
+    start = time.perf_counter()
+    exams_dir = Path(exams_dir)
+    db = connect(db_path)
+    report = {"files": 0, "imported": 0, "unchanged": 0, "removed": 0, "errors": {}}
+
+    try:
+        with db:
+            if full:
+                for table in ("questions", "passages", "sections", "exams"):
+                    db.execute(f"DELETE FROM {table}")
+                for table in ("question_fts", "passage_fts"):
+                    db.execute(f"INSERT INTO {table} ({table}) VALUES ('delete-all')")
+            stored = {row["path"]: row for row in
+                      db.execute("SELECT id, path, size, mtime_ns, hash FROM exams")}
+
+            files = discover_exam_files(exams_dir=exams_dir)
+            report["files"] = len(files)
+            pending = []
+            seen = set()
+            for path, level, source in files:
+                relative = path.relative_to(exams_dir).as_posix()
+                seen.add(relative)
+                row = stored.get(relative)
+                stat = path.stat()
+                if row is not None and row["size"] == stat.st_size and row["mtime_ns"] == stat.st_mtime_ns:
+                    report["unchanged"] += 1
+                else:
+                    pending.append((path, level, source))
+
+            for relative, row in stored.items():
+                if relative not in seen:
+                    _delete_exam(db, row["id"])
+                    report["removed"] += 1
+
+            importer = _Importer(db)
+            # Size, mtime and hash are those of the bytes each worker parsed
+            for record in iter_exams(workers=workers, transform=exam_rows, files=pending,
+                                     checksum=True):
+                relative = record.path.relative_to(exams_dir).as_posix()
+                if record.error:
+                    report["errors"][relative] = record.error
+                    continue
+                row = stored.get(relative)
+                if row is not None and row["hash"] == record.hash:
+                    # Touched but identical
+                    db.execute("UPDATE exams SET mtime_ns = ? WHERE id = ?", (record.mtime_ns, row["id"]))
+                    report["unchanged"] += 1
+                    continue
+                if row is not None:
+                    _delete_exam(db, row["id"])
+                importer.insert(record, relative, record.data)
+                report["imported"] += 1
+
+            if report["imported"] or report["removed"]:
+                # Passages no question refers to any more
+                unused = "SELECT id FROM passages WHERE id NOT IN " \
+                         "(SELECT passage FROM questions WHERE passage IS NOT NULL)"
+                db.execute("INSERT INTO passage_fts (passage_fts, rowid, search_text) "
+                           f"SELECT 'delete', id, search_text FROM passages WHERE id IN ({unused})")
+                db.execute(f"DELETE FROM passages WHERE id IN ({unused})")
+        if report["imported"] or report["removed"]:
+            db.execute("INSERT INTO question_fts (question_fts) VALUES ('optimize')")
+            db.execute("INSERT INTO passage_fts (passage_fts) VALUES ('optimize')")
+            db.commit()
+    finally:
+        db.close()
+
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def _phrase(query: str) -> str:
+    return '"' + query.replace('"', '""') + '"'
+
+
+class QuestionSearch:
+    """Query API over an imported database"""
+
+    def __init__(self, db_path: Path = DB_PATH):
+        self.db = sqlite3.connect(f"file:{Path(db_path)}?mode=ro", uri=True)
+        self.db.row_factory = sqlite3.Row
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _where(self, query: str, fields: Iterable[str], level, part, mondai, source) -> Tuple[str, list]:
+        """
+        FROM/WHERE clauses: with 3+ characters the FTS hits are collected
+        first and then filtered; shorter queries filter first and then scan.
+        """
+        fields = list(fields)
+        unknown = set(fields) - set(SEARCH_FIELDS)
+        if unknown or not fields:
+            raise ValueError(f"Search fields must be among {', '.join(SEARCH_FIELDS)}")
+        columns = [f"search_{field}" for field in fields if field != "passage"]
+
+        filters, filter_params = [], []
+        for clause, value in (("q.level = ?", level and normalize_level(level)),
+                              ("q.part = ?", part),
+                              ("q.mondai = ?", mondai if mondai is None else int(mondai)),
+                              ("e.source = ?", source)):
+            if value is not None:
+                filters.append(clause)
+                filter_params.append(value)
+
+        if len(query) >= 3:
+            hits, params = [], []
+            if columns:
+                hits.append("SELECT rowid AS id FROM question_fts WHERE question_fts MATCH ?")
+                params.append("{" + " ".join(columns) + "} : " + _phrase(query))
+            if "passage" in fields:
+                hits.append("SELECT q2.id FROM questions q2 WHERE q2.passage IN "
+                            "(SELECT rowid FROM passage_fts WHERE passage_fts MATCH ?)")
+                params.append(_phrase(query))
+            source_clause = (f"({' UNION '.join(hits)}) h CROSS JOIN questions q ON q.id = h.id "
+                             "JOIN exams e ON e.id = q.exam")
+            where = " AND ".join(filters) or "1"
+            return f"{source_clause} WHERE {where}", params + filter_params
+
+        # Too short for trigrams: LIKE over the filtered questions
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        likes, like_params = [], []
+        for column in columns:
+            likes.append(f"q.{column} LIKE ? ESCAPE '\\'")
+            like_params.append(pattern)
+        if "passage" in fields:
+            likes.append("q.passage IN (SELECT id FROM passages WHERE search_text LIKE ? ESCAPE '\\')")
+            like_params.append(pattern)
+        where = " AND ".join(filters + ["(" + " OR ".join(likes) + ")"])
+        return (f"questions q JOIN exams e ON e.id = q.exam WHERE {where}",
+                filter_params + like_params)
+
+    def search(self, query: str,
+               fields: Iterable[str] = SEARCH_FIELDS,
+               level=None, part: Optional[str] = None, mondai: Optional[int] = None,
+               source: Optional[str] = None, limit: int = 50, offset: int = 0) -> List[dict]:
+        """
+        Questions whose text, options and/or passage contain query (a literal
+        substring, not FTS syntax), in corpus order.
+
+        Returns:
+            Dicts with exam_id, path, level, source, part, mondai, number,
+            text, options, answer and passage (HTML)
+        """
+        clauses, params = self._where(query, fields, level, part, mondai, source)
+        rows = self.db.execute(
+            "SELECT e.exam_id, e.path, q.level, e.source, q.part, q.mondai, q.number, q.text, "
+            "q.options, q.answer, (SELECT html FROM passages WHERE id = q.passage) AS passage "
+            f"FROM {clauses} ORDER BY q.id LIMIT ? OFFSET ?",
+            params + [limit, offset])
+        results = []
+        for row in rows:
+            result = dict(row)
+            result["options"] = json.loads(row["options"]) if row["options"] is not None else None
+            results.append(result)
+        return results
+
+    def count(self, query: str,
+              fields: Iterable[str] = SEARCH_FIELDS,
+              level=None, part: Optional[str] = None, mondai: Optional[int] = None,
+              source: Optional[str] = None) -> int:
+        """Number of matching questions"""
+        clauses, params = self._where(query, fields, level, part, mondai, source)
+        return self.db.execute(f"SELECT COUNT(*) FROM {clauses}", params).fetchone()[0]
@@ -0,0 +1,176 @@
+"""
+Per-skill exam slices for serving ?skills= requests without parsing the exam
+
+Each exam gets one slice file, exam_slices/<level>/<source>/<id>.slices:
+
+    {"version": 2, "size": ..., "mtime_ns": "...", "hash": "...",
+     "head": {"id": ..., "title": ..., "level": ...},
+     "sections": [["vocabulary", 0, 5123], ["grammar", 5124, 9876], ...]}\\n
+    <section 0 JSON>,<section 1 JSON>,...
+
+The first line is a header with the source file's size, mtime and content
+hash plus a byte-offset table (part, start, end) into the body that follows;
+each section is serialized compactly, so the server answers a filtered
+request by joining the byte ranges of the matching sections. The size,
+mtime and hash are those of the bytes the worker parsed, so an exam edited
+while its slice is built is rebuilt on the next run. Passages of a
+compacted tree (passages.json) are expanded, so slices never hold
+references.
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from .loader import EXAMS_DIR, discover_exam_files, iter_exams
+from .manifest import content_hash
+from .passages import cached_store, expand_exam
+from .writer import atomic_write_bytes
+
+SLICES_DIR = EXAMS_DIR.parent / "exam_slices"
+SLICES_VERSION = 2
+SLICE_SUFFIX = ".slices"
+
+
+def slice_path(exam_path: Path, exams_dir: Path = EXAMS_DIR, slices_dir: Path = SLICES_DIR) -> Path:
+    return (slices_dir / exam_path.relative_to(exams_dir)).with_suffix(SLICE_SUFFIX)
+
+
+def encode_sections(data: dict) -> Tuple[dict, List[list], bytes]:
+    """An exam's head fields, offset table and body of section fragments"""
+    offsets = []
+    fragments = []
+    position = 0
+    for section in data.get("sections", []):
+        fragment = json.dumps(section, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        offsets.append([section.get("part"), position, position + len(fragment)])
+        fragments.append(fragment)
+        position += len(fragment) + 1
+    head = {key: data[key] for key in ("id", "title", "level") if key in data}
+    return head, offsets, b",".join(fragments)
+
+
+def encode_slices(sections: Tuple[dict, List[list], bytes], size: int, mtime_ns: int,
+                  digest: str) -> bytes:
+    """The slice file of encode_sections output, for a source of this size, mtime and hash"""
+    head, offsets, body = sections
+    header = {
+        "version": SLICES_VERSION,
+        "size": size,
+        # A string: nanosecond mtimes do not fit in a JavaScript number
+        "mtime_ns": str(mtime_ns),
+        "hash": digest,
+        "head": head,
+        "sections": offsets,
+    }
+    return json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n" + body
+
+
+def read_header(path: Path) -> Optional[dict]:
+    """Return a slice file's header, or None if it is missing or unreadable"""
+    try:
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    return header if header.get("version") == SLICES_VERSION else None
+
+
+def is_current(header: Optional[dict], exam_path: Path) -> Tuple[bool, bool]:
+    """
+    Check a slice header against its source exam.
+
+    Returns:
+        (current, touched): touched means the content matched but the mtime
+        recorded in the header is outdated
+    """
+    if header is None:
+        return False, False
+    stat = exam_path.stat()
+    if header.get("size") != stat.st_size:
+        return False, False
+    if header.get("mtime_ns") == str(stat.st_mtime_ns):
+        return True, False
+    # Touched but possibly unchanged (checkout, copy): compare content
+    return header.get("hash") == content_hash(exam_path), True
+
+
+def read_sections(path: Path, parts: Iterable[str]) -> Optional[Tuple[dict, bytes]]:
+    """
+    Read the sections of the given parts from a slice file.
+
+    Returns:
+        (head, JSON array bytes of the matching sections in document order),
+        or None if the slice file is missing
+    """
+    wanted = set(parts)
+    try:
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            body = f.read()
+    except (OSError, ValueError):
+        return None
+    chunks = [body[start:end] for part, start, end in header["sections"] if part in wanted]
+    return header["head"], b"[" + b",".join(chunks) + b"]"
+
+
+class _SliceEncoder:
+    """Worker transform: one exam's sections, with compacted passages expanded"""
+
+    def __init__(self, exams_dir: Path):
+        self.exams_dir = exams_dir
+
+    def __call__(self, path: Path, data: dict) -> Tuple[dict, List[list], bytes]:
+        return encode_sections(expand_exam(data, cached_store(self.exams_dir)))
+
+
+def build_slices(levels: Optional[Iterable] = None,
+                 workers: Optional[int] = None,
+                 full: bool = False,
+                 exams_dir: Path = EXAMS_DIR,
+                 slices_dir: Path = SLICES_DIR) -> dict:
+    """
+    Write slice files for every exam whose source changed since its slice
+    was built, and delete slices whose exam no longer exists.
+
+    Returns:
+        Summary with files, built, unchanged, removed, bytes and errors
+    """
+    files = discover_exam_files(levels, exams_dir=exams_dir)
+    summary = {"files": len(files), "built": 0, "unchanged": 0, "removed": 0,
+               "bytes": 0, "errors": {}}
+
+    pending = []
+    for path, level, source in files:
+        target = slice_path(path, exams_dir, slices_dir)
+        current, touched = (False, False) if full else is_current(read_header(target), path)
+        if current and not touched:
+            summary["unchanged"] += 1
+        else:
+            # Touched files are rewritten too, so the header's mtime is fresh
+            # and the next run (and the server) can trust it without hashing
+            pending.append((path, level, source))
+
+    encoder = _SliceEncoder(exams_dir)
+    for record in iter_exams(workers=workers, transform=encoder, files=pending, checksum=True):
+        if record.error:
+            summary["errors"][record.path.relative_to(exams_dir).as_posix()] = record.error
+            continue
+        # Stamped with the bytes the worker parsed, not the file as it is now
+        payload = encode_slices(record.data, record.size, record.mtime_ns, record.hash)
+        target = slice_path(record.path, exams_dir, slices_dir)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(target, payload)
+        summary["built"] += 1
+        summary["bytes"] += len(payload)
+
+    # Drop slices of deleted exams within the scanned levels
+    expected = {slice_path(path, exams_dir, slices_dir) for path, _, _ in files}
+    scanned = {level for _, level, _ in files} if levels is not None else None
+    for stale in slices_dir.glob(f"N*/*/*{SLICE_SUFFIX}"):
+        level = stale.relative_to(slices_dir).parts[0]
+        if stale not in expected and (scanned is None or level in scanned):
+            stale.unlink()
+            summary["removed"] += 1
+
+    return summary
@@ -0,0 +1,87 @@
+"""
+Per-level question statistics shared by generate_statistics and validate_exams
+
+Per-exam counts come from count_questions (a manifest analysis, cached under
+COUNTS_VERSION) and are folded into an accumulator with add_exam_counts;
+statistics_from_index builds the same accumulator from the question index.
+save_statistics_json writes exam_statistics.json next to the exams tree.
+"""
+
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict
+
+from .loader import EXAMS_DIR
+from .streaming import count_questions_parsed, count_questions_streaming
+
+STATISTICS_PATH = EXAMS_DIR.parent / "exam_statistics.json"
+
+# Bump when count_questions changes so cached counts are recomputed
+COUNTS_VERSION = "1"
+
+
+def count_questions(file_path: Path, data: dict = None) -> Dict[str, int]:
+    """Count questions by part (streams the file when data is not already parsed)"""
+    if data is None:
+        return count_questions_streaming(file_path)
+    return count_questions_parsed(data)
+
+
+def new_statistics() -> dict:
+    """Create an empty statistics accumulator"""
+    return {
+        "total_exams": 0,
+        "by_level": defaultdict(lambda: {
+            "count": 0,
+            "total_questions": 0,
+            "by_part": defaultdict(int),
+            "by_type": defaultdict(int)
+        })
+    }
+
+
+def add_exam_counts(stats: dict, level: str, source: str, counts: Dict[str, int]):
+    """Fold one exam's per-part question counts into the accumulator"""
+    stats["total_exams"] += 1
+    level_stats = stats["by_level"][level]
+    level_stats["count"] += 1
+    level_stats["by_type"][source] += 1
+
+    for part, questions in counts.items():
+        level_stats["by_part"][part] += questions
+        level_stats["total_questions"] += questions
+
+
+def statistics_from_index(index) -> dict:
+    """Build the same statistics as a manifest pass with group-bys over the question index"""
+    stats = new_statistics()
+    for exam in index.meta["exams"]:
+        add_exam_counts(stats, exam["level"], exam["source"], {})
+    for (level, part), questions in index.count_by("level", "part").items():
+        level_stats = stats["by_level"][level]
+        level_stats["by_part"][part] += questions
+        level_stats["total_questions"] += questions
+    return stats
+
+
+def save_statistics_json(stats, output_file: Path = STATISTICS_PATH):
+    """Save statistics to JSON file"""
+    # Convert defaultdict to regular dict for JSON serialization
+    json_stats = {
+        "total_exams": stats["total_exams"],
+        "by_level": {}
+    }
+
+    for level, level_stats in stats["by_level"].items():
+        json_stats["by_level"][level] = {
+            "count": level_stats["count"],
+            "total_questions": level_stats["total_questions"],
+            "by_part": dict(level_stats["by_part"]),
+            "by_type": dict(level_stats["by_type"])
+        }
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(json_stats, f, ensure_ascii=False, indent=2)
+
+    print(f"\n💾 Statistics saved to: {output_file}")
@@ -0,0 +1,160 @@
+"""
+Synthetic exam corpus generator for benchmarks
+
+Every real exam is used as a template for `scale` synthetic exams with the
+same layout: sections (mondai, part), question counts, option counts,
+answers, audio URLs and statistics are kept, and every text node of the
+question text, passage and option HTML is replaced by random kana of the
+same length, with the markup (furigana, highlights, SVG icons) left intact.
+Passages shared by several questions stay shared. Sizes and structure per
+level therefore match the real corpus while the content is random.
+"""
+
+import json
+import random
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+
+from .loader import EXAMS_DIR, iter_exams
+from .writer import dumps_exam
+
+MARKER_NAME = ".synthetic.json"
+
+# Bump to regenerate existing trees (version 1 trees were rewritten in place
+# by the benchmarked scripts)
+SYNTHETIC_VERSION = 2
+
+_TEXT_NODE = re.compile(r"[^<>]+(?=<|$)")
+_KANA = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをん日本語学校先生時間"
+_POOL_SIZE = 1 << 20
+
+# Random text shared by all exams generated in this process, per seed
+_POOLS: Dict[int, str] = {}
+
+
+def _pool(seed: int) -> str:
+    if seed not in _POOLS:
+        rng = random.Random(seed)
+        _POOLS[seed] = "".join(rng.choices(_KANA, k=_POOL_SIZE))
+    return _POOLS[seed]
+
+
+class _Scrambler:
+    """Replaces text nodes with pool slices, caching so shared strings stay shared"""
+
+    def __init__(self, rng: random.Random, pool: str):
+        self.rng = rng
+        self.pool = pool
+        self.cache: Dict[str, str] = {}
+
+    def _node(self, match) -> str:
+        text = match.group(0)
+        if text.isspace():
+            return text
+        length = min(len(text), len(self.pool))
+        start = self.rng.randrange(len(self.pool) - length + 1)
+        return self.pool[start:start + length]
+
+    def __call__(self, text):
+        if not isinstance(text, str) or not text:
+            return text
+        if text not in self.cache:
+            self.cache[text] = _TEXT_NODE.sub(self._node, text)
+        return self.cache[text]
+
+
+def synthesize_exam(template: dict, copy: int, rng: random.Random, pool: str) -> dict:
+    """Build one synthetic exam from a real one"""
+    scramble = _Scrambler(rng, pool)
+    exam = dict(template)
+    exam["id"] = f"{template.get('id')}_x{copy}"
+    exam["title"] = f"{template.get('title')} #{copy}"
+
+    sections = []
+    for section in template.get("sections", []):
+        section = dict(section)
+        questions = []
+        for question in section.get("questions", []):
+            question = dict(question)
+            question["text"] = scramble(question.get("text"))
+            if "passage" in question:
+                question["passage"] = scramble(question["passage"])
+            if isinstance(question.get("options"), list):
+                question["options"] = [scramble(option) for option in question["options"]]
+            questions.append(question)
+        section["questions"] = questions
+        sections.append(section)
+    exam["sections"] = sections
+    return exam
+
+
+class _Generator:
+    """Worker transform writing the synthetic copies of one template exam"""
+
+    def __init__(self, exams_dir: Path, out_dir: Path, scale: int, seed: int):
+        self.exams_dir = exams_dir
+        self.out_dir = out_dir
+        self.scale = scale
+        self.seed = seed
+
+    def __call__(self, path: Path, data: dict) -> int:
+        relative = path.relative_to(self.exams_dir)
+        target_dir = self.out_dir / relative.parent
+        target_dir.mkdir(parents=True, exist_ok=True)
+        pool = _pool(self.seed)
+
+        written = 0
+        for copy in range(self.scale):
+            rng = random.Random(f"{self.seed}:{relative.as_posix()}:{copy}")
+            payload = dumps_exam(synthesize_exam(data, copy, rng, pool))
+            with open(target_dir / f"{path.stem}_x{copy}.json", "wb") as f:
+                f.write(payload)
+            written += len(payload)
+        return written
+
+
+def read_marker(out_dir: Path) -> Optional[dict]:
+    try:
+        with open(Path(out_dir) / MARKER_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def generate_corpus(out_dir: Path,
+                    scale: int = 1,
+                    seed: int = 0,
+                    workers: Optional[int] = None,
+                    exams_dir: Path = EXAMS_DIR) -> dict:
+    """
+    Generate a synthetic exams tree with `scale` exams per real exam.
+
+    A marker file records the parameters; an existing tree generated with the
+    same version, scale and seed is reused as-is, one generated with other
+    parameters is deleted first. Callers must not modify the tree.
+
+    Returns:
+        Marker contents: version, scale, seed, files, bytes
+    """
+    out_dir = Path(out_dir)
+    marker = read_marker(out_dir)
+    if marker and (marker.get("version"), marker.get("scale"), marker.get("seed")) == (
+            SYNTHETIC_VERSION, scale, seed):
+        return marker
+    if marker:
+        shutil.rmtree(out_dir)
+
+    generator = _Generator(exams_dir, out_dir, scale, seed)
+    marker = {"version": SYNTHETIC_VERSION, "scale": scale, "seed": seed, "files": 0, "bytes": 0}
+    for record in iter_exams(workers=workers, transform=generator, exams_dir=exams_dir):
+        if record.error:
+            continue
+        marker["files"] += scale
+        marker["bytes"] += record.data
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(out_dir / MARKER_NAME, "w", encoding="utf-8") as f:
+        json.dump(marker, f)
+    return marker
@@ -0,0 +1,458 @@
+"""
+Rule-based validation engine producing structured findings
+
+A finding is a small dict:
+
+    {"file": "N1/custom/jlpt4you_N1_1.json", "rule": "part-mismatch",
+     "pointer": "/sections/3/part", "severity": "error",
+     "message": "Mondai 4: Incorrect part 'reading', should be 'grammar'"}
+
+Checks are Rule plugins registered with @register. A rule declares the
+fields it reads and implements any of the start/section/question/finish
+hooks; RuleEngine runs all enabled rules in one traversal of each document,
+only descends as deep as the enabled rules need, reads just the exam header
+(no full parse) when every enabled rule only needs header fields, and
+records each rule's cumulative time.
+
+iter_findings runs the engine over the corpus through the manifest (so
+unchanged files are not re-validated) on the process pool and streams the
+findings in discovery order, stopping early for --fail-fast / --max-issues.
+"""
+
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .changeset import escape_token
+from .listing import _read_head
+from .loader import ExamFile
+from .manifest import Manifest, fingerprint
+from .mapping import MONDAI_PART_MAPPING, PARTS, part_for
+from .schema import get_validator, schema_fingerprint
+
+# Bump when a rule changes so cached findings are recomputed
+VALIDATION_VERSION = "4"
+
+ERROR = "error"
+WARNING = "warning"
+
+# Top-level fields available without parsing the sections
+HEAD_FIELDS = {"id", "title", "level", "type", "source", "duration"}
+
+SECTION_FIELD = "sections[]"
+QUESTION_FIELD = "sections[].questions[]"
+
+
+def make_finding(rule: str, pointer: str, message: str, severity: str = ERROR) -> dict:
+    return {"rule": rule, "pointer": pointer, "severity": severity, "message": message}
+
+
+class Context:
+    """Per-document state shared by the rules"""
+
+    def __init__(self, data: dict):
+        self.data = data
+        level = data.get("level")
+        self.level = f"N{level}" if level and f"N{level}" in MONDAI_PART_MAPPING else None
+        self.findings: List[dict] = []
+        # Set by a rule when nothing else can be checked (e.g. unknown level)
+        self.stop = False
+
+    def report(self, rule: "Rule", pointer: str, message: str):
+        self.findings.append(make_finding(rule.id, pointer, message, rule.severity))
+
+
+class Rule:
+    """
+    Base class for validation rules; override only the hooks the rule needs.
+
+    fields lists what the rule reads: top-level keys ("level"), section keys
+    ("sections[].part") or question keys ("sections[].questions[].answer").
+    """
+    id = ""
+    description = ""
+    severity = ERROR
+    fields: Tuple[str, ...] = ()
+
+    @classmethod
+    def config(cls):
+        """Anything besides the code that the rule's results depend on"""
+        return None
+
+    def start(self, data: dict, ctx: Context):
+        pass
+
+    def section(self, section: dict, pointer: str, ctx: Context):
+        pass
+
+    def question(self, question: dict, pointer: str, section: dict, ctx: Context):
+        pass
+
+    def finish(self, ctx: Context):
+        pass
+
+
+RULES: Dict[str, type] = {}
+
+
+def register(rule: type) -> type:
+    """Class decorator adding a rule to the registry (in definition order)"""
+    if rule.id in RULES:
+        raise ValueError(f"Duplicate rule id: {rule.id}")
+    RULES[rule.id] = rule
+    return rule
+
+
+@register
+class SchemaRule(Rule):
+    id = "schema"
+    description = "The document matches exam_schema.json (fields, types, enums)"
+    fields = tuple(sorted(HEAD_FIELDS)) + ("statistics", "sections[].questions[]")
+
+    @classmethod
+    def config(cls):
+        return schema_fingerprint()
+
+    def start(self, data, ctx):
+        # The compiled schema walks the document on its own, in generated code
+        for pointer, message in get_validator()(data):
+            ctx.findings.append(make_finding(self.id, pointer, message, self.severity))
+
+
+@register
+class LevelRule(Rule):
+    id = "level"
+    description = "The level has a mondai mapping (the section checks need it)"
+    fields = ("level",)
+
+    def start(self, data, ctx):
+        if ctx.level is None:
+            level = data.get("level")
+            # A missing or mistyped level is reported by the schema
+            if level and isinstance(level, int):
+                ctx.report(self, "/level", f"Unknown level: N{level}")
+            ctx.stop = True
+
+
+@register
+class DuplicateMondaiRule(Rule):
+    id = "duplicate-mondai"
+    description = "No mondai number appears twice"
+    fields = ("sections[].mondai",)
+
+    def __init__(self):
+        self.seen = set()
+
+    def section(self, section, pointer, ctx):
+        if "mondai" not in section:
+            return
+        mondai = section.get("mondai")
+        if mondai in self.seen:
+            ctx.report(self, f"{pointer}/mondai", f"Duplicate mondai: {mondai}")
+        self.seen.add(mondai)
+
+
+@register
+class PartMismatchRule(Rule):
+    id = "part-mismatch"
+    description = "Each section's part matches the mondai mapping of its level"
+    fields = ("level", "sections[].mondai", "sections[].part")
+
+    def section(self, section, pointer, ctx):
+        if "mondai" not in section or ctx.level is None:
+            return
+        mondai = section.get("mondai")
+        expected_part = part_for(ctx.level, mondai)
+        actual_part = section.get("part")
+        if expected_part and actual_part != expected_part:
+            ctx.report(self, f"{pointer}/part",
+                       f"Mondai {mondai}: Incorrect part '{actual_part}', should be '{expected_part}'")
+        elif not expected_part:
+            ctx.report(self, f"{pointer}/mondai",
+                       f"Mondai {mondai}: Not in mapping for level {ctx.level}")
+
+
+@register
+class StatisticsMismatchRule(Rule):
+    id = "statistics-mismatch"
+    description = "statistics.by_part matches the number of questions per part"
+    fields = ("statistics", "sections[].part", "sections[].questions")
+
+    def __init__(self):
+        self.actual = defaultdict(int)
+
+    def section(self, section, pointer, ctx):
+        part = section.get("part")
+        if part:
+            self.actual[part] += len(_items(section.get("questions")))
+
+    def finish(self, ctx):
+        stats = ctx.data.get("statistics")
+        if not isinstance(stats, dict) or "by_part" not in stats:
+            return
+        reported = stats.get("by_part", {})
+        for part in PARTS:
+            if reported.get(part) != self.actual.get(part, 0):
+                ctx.report(self, f"/statistics/by_part/{part}",
+                           f"Statistics mismatch for {part}: "
+                           f"reported {reported.get(part)}, actual {self.actual.get(part, 0)}")
+
+
+@register
+class AnswerBoundsRule(Rule):
+    id = "answer-bounds"
+    description = "answer is a 0-based index within options"
+    severity = WARNING
+    fields = ("sections[].questions[].answer", "sections[].questions[].options")
+
+    def question(self, question, pointer, section, ctx):
+        answer = question.get("answer")
+        options = question.get("options")
+        if not isinstance(options, list):
+            return
+        if not isinstance(answer, int) or isinstance(answer, bool):
+            ctx.report(self, f"{pointer}/answer", f"Answer {answer!r} is not an option index")
+        elif not 0 <= answer < len(options):
+            ctx.report(self, f"{pointer}/answer",
+                       f"Answer {answer} is out of range for {len(options)} options")
+
+
+@register
+class QuestionNumberingRule(Rule):
+    id = "question-numbering"
+    description = "Question numbers are contiguous within each section"
+    severity = WARNING
+    fields = ("sections[].questions[].number",)
+
+    def __init__(self):
+        self.previous = None
+
+    def section(self, section, pointer, ctx):
+        # Many exams restart numbering in every section
+        self.previous = None
+
+    def question(self, question, pointer, section, ctx):
+        number = question.get("number")
+        if not isinstance(number, int):
+            ctx.report(self, f"{pointer}/number", f"Question number {number!r} is not an integer")
+            return
+        if self.previous is not None and number != self.previous + 1:
+            ctx.report(self, f"{pointer}/number",
+                       f"Question number {number} follows {self.previous}")
+        self.previous = number
+
+
+@register
+class NonEmptyOptionsRule(Rule):
+    id = "non-empty-options"
+    description = "Every question has options and none of them is blank"
+    severity = WARNING
+    fields = ("sections[].questions[].options",)
+
+    def question(self, question, pointer, section, ctx):
+        options = question.get("options")
+        if not isinstance(options, list) or not options:
+            ctx.report(self, f"{pointer}/options", "Question has no options")
+            return
+        for index, option in enumerate(options):
+            if not isinstance(option, str) or not option.strip():
+                ctx.report(self, f"{pointer}/options/{index}", f"Option {index} is empty")
+
+
+@register
+class ListeningAudioRule(Rule):
+    id = "listening-audio"
+    description = "Questions of listening sections have an audioURL"
+    severity = WARNING
+    fields = ("sections[].part", "sections[].questions[].audioURL")
+
+    def question(self, question, pointer, section, ctx):
+        if section.get("part") == "listening" and not question.get("audioURL"):
+            ctx.report(self, f"{pointer}/audioURL", "Listening question has no audioURL")
+
+
+def _items(value) -> list:
+    return value if isinstance(value, list) else []
+
+
+def _overrides(rule: type, hook: str) -> bool:
+    return getattr(rule, hook) is not getattr(Rule, hook)
+
+
+class RuleEngine:
+    """Runs a set of registered rules over documents in a single traversal"""
+
+    def __init__(self, rule_ids: Optional[Iterable[str]] = None):
+        ids = list(RULES) if rule_ids is None else list(rule_ids)
+        unknown = [rule_id for rule_id in ids if rule_id not in RULES]
+        if unknown:
+            raise ValueError(f"Unknown rule(s): {', '.join(unknown)}")
+        # Keep registry order so findings come out in a stable order
+        self.rules = [RULES[rule_id] for rule_id in RULES if rule_id in ids]
+
+        fields = {field for rule in self.rules for field in rule.fields}
+        self.walk_questions = any(field.startswith(QUESTION_FIELD) for field in fields)
+        self.walk_sections = self.walk_questions or any(
+            field.startswith(SECTION_FIELD) for field in fields)
+        # When only header fields are read, exams are not fully parsed
+        self.head_only = fields <= HEAD_FIELDS
+        self.seconds: Dict[str, float] = defaultdict(float)
+
+    @property
+    def fingerprint(self) -> str:
+        return fingerprint([VALIDATION_VERSION, MONDAI_PART_MAPPING,
+                            [[rule.id, rule.config()] for rule in self.rules]])
+
+    def _hooks(self, rules: list, hook: str) -> list:
+        return [(rule.id, getattr(rule, hook)) for rule in rules if _overrides(type(rule), hook)]
+
+    def validate(self, data: dict) -> List[dict]:
+        """Check one document; findings come without the "file" key"""
+        ctx = Context(data)
+        rules = [rule() for rule in self.rules]
+        seconds = self.seconds
+        clock = time.perf_counter
+
+        for rule_id, hook in self._hooks(rules, "start"):
+            start = clock()
+            hook(data, ctx)
+            seconds[rule_id] += clock() - start
+        if ctx.stop:
+            return ctx.findings
+
+        section_hooks = self._hooks(rules, "section")
+        question_hooks = self._hooks(rules, "question")
+        if self.walk_sections:
+            # Malformed sections and questions are the schema rule's to report
+            for index, section in enumerate(_items(data.get("sections"))):
+                if not isinstance(section, dict):
+                    continue
+                pointer = f"/sections/{index}"
+                for rule_id, hook in section_hooks:
+                    start = clock()
+                    hook(section, pointer, ctx)
+                    seconds[rule_id] += clock() - start
+                if not (self.walk_questions and question_hooks):
+                    continue
+                for number, question in enumerate(_items(section.get("questions"))):
+                    if not isinstance(question, dict):
+                        continue
+                    question_pointer = f"{pointer}/questions/{number}"
+                    for rule_id, hook in question_hooks:
+                        start = clock()
+                        hook(question, question_pointer, section, ctx)
+                        seconds[rule_id] += clock() - start
+
+        for rule_id, hook in self._hooks(rules, "finish"):
+            start = clock()
+            hook(ctx)
+            seconds[rule_id] += clock() - start
+        return ctx.findings
+
+    def validate_file(self, file_path: Path, data: dict = None) -> dict:
+        """
+        Manifest analysis: findings for one file plus the time spent per rule.
+
+        The file is read here when data is not given (header only if possible).
+        """
+        self.seconds = defaultdict(float)
+        if data is None:
+            try:
+                with open(file_path, "rb") as f:
+                    raw = f.read()
+                data = _read_head(raw) if self.head_only else None
+                if data is None:
+                    data = json.loads(raw)
+            except Exception as e:
+                return {"findings": [make_finding("read-error", "", f"Cannot read file: {e}")],
+                        "rule_seconds": {}}
+        findings = self.validate(data)
+        return {"findings": findings,
+                "rule_seconds": {rule_id: round(s, 6) for rule_id, s in self.seconds.items()}}
+
+    # Picklable transform for the worker pool
+    def __call__(self, file_path: Path, data: dict = None) -> dict:
+        return self.validate_file(file_path, data)
+
+
+def validate_document(data: dict, rule_ids: Optional[Iterable[str]] = None) -> List[dict]:
+    """Check one parsed exam with the given (default: all) rules"""
+    return RuleEngine(rule_ids).validate(data)
+
+
+def validate_file(file_path: Path, data: dict = None,
+                  rule_ids: Optional[Iterable[str]] = None) -> List[dict]:
+    """Findings for one file (reads it when data is not given)"""
+    return RuleEngine(rule_ids).validate_file(file_path, data)["findings"]
+
+
+def record_findings(record: ExamFile, exams_dir: Path, name: str = "validate") -> List[dict]:
+    """Findings of a manifest record, each tagged with the file's relative path"""
+    relative = record.path.relative_to(exams_dir).as_posix()
+    if record.error:
+        findings = [make_finding("read-error", "", record.error)]
+    else:
+        findings = record.data[name]["findings"]
+    return [dict(finding, file=relative) for finding in findings]
+
+
+def iter_findings(manifest: Manifest,
+                  workers: Optional[int] = None,
+                  full: bool = False,
+                  fail_fast: bool = False,
+                  max_issues: Optional[int] = None,
+                  analyses: dict = None,
+                  engine: RuleEngine = None,
+                  rule_seconds: Optional[Dict[str, float]] = None,
+                  outcome: Optional[dict] = None,
+                  archive: Optional[Path] = None) -> Iterator[tuple]:
+    """
+    Validate the corpus on the process pool.
+
+    Args:
+        manifest: Manifest used to skip unchanged files
+        fail_fast: Stop after the first file with an error finding
+        max_issues: Stop before producing more findings than this
+        analyses: Extra manifest analyses to run in the same pass
+        engine: Rules to run (default: every registered rule)
+        rule_seconds: Filled with the cumulative time per rule over the
+            files validated in this run (cached files cost nothing)
+        outcome: Filled with "stopped": True when fail_fast or max_issues
+            cut the run short (files left unchecked or findings dropped)
+        archive: Read changed files from this exam archive (see Manifest.refresh)
+
+    Yields:
+        (record, findings) per file in discovery order
+    """
+    engine = engine or RuleEngine()
+    all_analyses = {"validate": (engine, engine.fingerprint)}
+    all_analyses.update(analyses or {})
+    # Header-only rule sets let the engine read the files itself
+    parse = not engine.head_only
+
+    if outcome is not None:
+        outcome["stopped"] = False
+    emitted = 0
+    records = manifest.refresh(all_analyses, workers=workers, full=full, parse=parse,
+                               archive=archive)
+    for record in records:
+        if rule_seconds is not None and not record.cached and not record.error:
+            for rule_id, seconds in record.data["validate"]["rule_seconds"].items():
+                rule_seconds[rule_id] = rule_seconds.get(rule_id, 0.0) + seconds
+
+        findings = record_findings(record, manifest.exams_dir)
+        if max_issues is not None and emitted + len(findings) > max_issues:
+            # Findings beyond the limit are dropped, with the files after them
+            if emitted < max_issues:
+                yield record, findings[:max_issues - emitted]
+            if outcome is not None:
+                outcome["stopped"] = True
+            return
+        emitted += len(findings)
+        yield record, findings
+        if fail_fast and any(f["severity"] == ERROR for f in findings):
+            if outcome is not None:
+                outcome["stopped"] = next(records, None) is not None
+            return
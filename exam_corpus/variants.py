@@ -0,0 +1,157 @@
+"""
+Per-student exam variants with shuffled options
+
+A variant is identified by (exam id, seed) and never stored: make_variant
+reads one SHAKE-256 stream keyed by a server-side secret (SECRET_ENV), the
+exam id and the seed and turns the 8 bytes at each question's position
+into that question's permutation, so the same pair always yields the same
+variant, variants for different seeds are unrelated, and knowing a seed
+is not enough to recompute its variant.
+
+Answers are permuted as zero-based option indices: exams that store
+1-based answers (answer_bias.answer_base) are shifted down before the
+permutation and back up in the variant, so a variant keeps its exam's
+answer base.
+
+The variant is built in one pass without copying the exam: the top-level
+document and every section are shallow copies, only the question dicts are
+new, and all strings (text, passages, options) are shared with the
+canonical exam, which is left untouched. The returned VariantMapping maps
+answers both ways, so answer sheets filled in on a variant can be scored
+against the canonical key.
+"""
+
+import hashlib
+import os
+from itertools import permutations
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .answer_bias import exam_answer_base
+
+# Environment variable holding the server-side secret mixed into every variant
+SECRET_ENV = "EXAM_VARIANT_SECRET"
+
+# Option counts whose permutations are listed up front (6! = 720)
+_TABLE_LIMIT = 6
+_PERMUTATIONS: Dict[int, List[Tuple[int, ...]]] = {
+    count: list(permutations(range(count))) for count in range(1, _TABLE_LIMIT + 1)
+}
+
+
+def variant_secret() -> bytes:
+    """
+    The server-side secret from SECRET_ENV.
+
+    Raises:
+        ValueError: If it is not set
+    """
+    secret = os.environ.get(SECRET_ENV)
+    if not secret:
+        raise ValueError(f"{SECRET_ENV} is not set: variants need a server-side secret")
+    return secret.encode("utf-8")
+
+
+def permutation_stream(exam_id: str, seed, questions: int, secret: bytes) -> bytes:
+    """8 pseudo-random bytes per question of one variant"""
+    # Length-prefixed, so no secret/id split can collide with another
+    message = len(secret).to_bytes(4, "little") + secret + f"{exam_id}\x1f{seed}".encode("utf-8")
+    return hashlib.shake_256(message).digest(8 * questions)
+
+
+def question_permutation(stream: bytes, position: int, count: int) -> Tuple[int, ...]:
+    """
+    Permutation of count options for the question at position (its index
+    in the whole exam): entry j is the canonical index of the option shown
+    in place j.
+    """
+    value = int.from_bytes(stream[8 * position:8 * position + 8], "little")
+    if count <= _TABLE_LIMIT:
+        table = _PERMUTATIONS[count]
+        return table[value % len(table)]
+    # Fisher-Yates, drawing from the 64-bit value (enough for 20 options)
+    order = list(range(count))
+    for i in range(count - 1, 0, -1):
+        value, j = divmod(value, i + 1)
+        order[i], order[j] = order[j], order[i]
+    return tuple(order)
+
+
+class VariantMapping:
+    """
+    Per-question permutations of a variant, in exam order (None: not
+    shuffled). Both directions work on zero-based option indices; base is
+    what the exam adds to them in its stored answers.
+    """
+
+    def __init__(self, exam_id: str, seed, permutations: List[Optional[Tuple[int, ...]]],
+                 base: int = 0):
+        self.exam_id = exam_id
+        self.seed = seed
+        self.permutations = permutations
+        self.base = base
+
+    def __len__(self) -> int:
+        return len(self.permutations)
+
+    def to_canonical(self, answers: Sequence[Optional[int]]) -> List[Optional[int]]:
+        """Choices made on the variant, as canonical option indices (None stays None)"""
+        return [answer if perm is None or not isinstance(answer, int) or not 0 <= answer < len(perm)
+                else perm[answer]
+                for perm, answer in zip(self.permutations, answers)]
+
+    def to_variant(self, answers: Sequence[Optional[int]]) -> List[Optional[int]]:
+        """Canonical option indices (e.g. the key) as positions in the variant"""
+        return [answer if perm is None or answer is None or not 0 <= answer < len(perm)
+                else perm.index(answer)
+                for perm, answer in zip(self.permutations, answers)]
+
+
+def make_variant(data: dict, exam_id: str, seed,
+                 secret: Optional[bytes] = None) -> Tuple[dict, VariantMapping]:
+    """
+    The variant of an exam for a seed, and its answer mapping.
+
+    Questions with fewer than two options, or options that are not a list,
+    are kept as they are, and so are answers that are not one of the
+    question's options.
+
+    Args:
+        secret: Server-side secret (default: variant_secret())
+
+    Raises:
+        ValueError: If no secret is given and SECRET_ENV is not set
+    """
+    if secret is None:
+        secret = variant_secret()
+    base = exam_answer_base(data)
+    stream = permutation_stream(exam_id, seed, sum(
+        len(section.get("questions", [])) for section in data.get("sections", [])), secret)
+    mapping = []
+    sections = []
+    position = 0
+    for section in data.get("sections", []):
+        questions = []
+        for question in section.get("questions", []):
+            options = question.get("options")
+            if not isinstance(options, list) or len(options) < 2:
+                questions.append(question)
+                mapping.append(None)
+                position += 1
+                continue
+            perm = question_permutation(stream, position, len(options))
+            shuffled = dict(question)
+            shuffled["options"] = [options[index] for index in perm]
+            answer = question.get("answer")
+            if isinstance(answer, int) and 0 <= answer - base < len(perm):
+                shuffled["answer"] = perm.index(answer - base) + base
+            questions.append(shuffled)
+            mapping.append(perm)
+            position += 1
+        variant_section = dict(section)
+        variant_section["questions"] = questions
+        sections.append(variant_section)
+
+    variant = dict(data)
+    if "sections" in data:
+        variant["sections"] = sections
+    return variant, VariantMapping(exam_id, seed, mapping, base)
@@ -0,0 +1,73 @@
+"""
+Atomic, minimal-diff writer for exam JSON rewrites
+
+Exams are stored as json.dumps(..., ensure_ascii=False, indent=2) with no
+trailing newline. write_exam serializes in exactly that format (keeping the
+document's key order), skips the write when the bytes on disk are already
+identical, and otherwise replaces the file atomically so a crash can never
+leave a truncated exam behind.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+
+def dumps_exam(data) -> bytes:
+    """Serialize an exam in the corpus' canonical on-disk format"""
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def atomic_write_bytes(path: Path, payload: bytes):
+    """Write to a temp file in the same directory, fsync, then rename into place"""
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_name, path.stat().st_mode & 0o777)
+        except FileNotFoundError:
+            os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+    # Persist the rename itself
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def write_exam(path: Path, data) -> bool:
+    """
+    Write an exam only if its serialized bytes differ from the file on disk.
+
+    Args:
+        path: Target exam file
+        data: Exam document
+
+    Returns:
+        True if the file was written, False if it was already up to date
+    """
+    payload = dumps_exam(data)
+    try:
+        if os.path.getsize(path) == len(payload):
+            with open(path, "rb") as f:
+                if f.read() == payload:
+                    return False
+    except FileNotFoundError:
+        pass
+
+    atomic_write_bytes(path, payload)
+    return True
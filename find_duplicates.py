@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Find duplicate and near-duplicate questions across exams (MinHash + LSH)
+and optionally write a deduplicated question pool
+"""
+
+import argparse
+from pathlib import Path
+
+from exam_corpus import LEVELS, PARTS
+from exam_corpus.duplicates import BANDS, NUM_HASHES, POOL_PATH, THRESHOLD, find_duplicates, write_pool
+
+
+def print_report(report: dict, show: int):
+    """Print duplicates per level and part, then the largest clusters"""
+    print("\n" + "="*60)
+    print("📊 DUPLICATE QUESTIONS REPORT")
+    print("="*60)
+    print(f"{'Level':<7} {'Part':<12} {'Questions':>10} {'Clusters':>9} {'Duplicates':>11} {'Share':>7}")
+    print("-"*60)
+    order = {part: i for i, part in enumerate(PARTS)}
+    for level in sorted(report["levels"]):
+        parts = report["levels"][level]
+        for part in sorted(parts, key=lambda part: order.get(part, len(order))):
+            stats = parts[part]
+            share = stats["duplicates"] / stats["questions"] * 100 if stats["questions"] else 0
+            print(f"{level:<7} {str(part):<12} {stats['questions']:>10} {stats['clusters']:>9} "
+                  f"{stats['duplicates']:>11} {share:>6.1f}%")
+    print("-"*60)
+
+    duplicates = sum(stats["duplicates"] for parts in report["levels"].values()
+                     for stats in parts.values())
+    near = sum(1 for cluster in report["clusters"] if cluster["kind"] == "near")
+    print(f"🔁 {duplicates} of {report['questions']} questions repeat another one "
+          f"({len(report['clusters'])} clusters, {near} with near-duplicates)")
+    print(f"⏱️  {report['distinct']} distinct texts compared in {report['seconds']:.2f}s")
+
+    if show:
+        print("\n🔝 Largest clusters:")
+        largest = sorted(report["clusters"], key=lambda cluster: -len(cluster["members"]))
+        for cluster in largest[:show]:
+            exam_id, _, _, mondai, number = cluster["members"][0]
+            print(f"   {cluster['level']} {cluster['part']}: {len(cluster['members'])} copies of "
+                  f"{exam_id} mondai {mondai} #{number} ({cluster['kind']}, "
+                  f"similarity ≥ {cluster['similarity']:.2f})")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Find duplicate questions")
+    parser.add_argument("--levels", nargs="+", choices=LEVELS, default=None,
+                        help="levels to check (default: all)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"estimated Jaccard similarity for near-duplicates (default: {THRESHOLD})")
+    parser.add_argument("--bands", type=int, default=BANDS,
+                        help=f"LSH bands, a divisor of {NUM_HASHES}; more bands find "
+                             f"less similar pairs (default: {BANDS})")
+    parser.add_argument("--show", type=int, default=10,
+                        help="largest clusters to list (default: 10)")
+    parser.add_argument("--pool", type=Path, nargs="?", const=POOL_PATH, default=None,
+                        help=f"write the deduplicated question pool (default: {POOL_PATH.name})")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    args = parser.parse_args()
+    if NUM_HASHES % args.bands:
+        parser.error(f"--bands must divide {NUM_HASHES}")
+
+    print("🔍 Looking for duplicate questions...")
+    report = find_duplicates(levels=args.levels, threshold=args.threshold, bands=args.bands,
+                             workers=args.workers)
+    print_report(report, args.show)
+    for relative, error in report["errors"].items():
+        print(f"  ❌ Error processing {relative}: {error}")
+
+    if args.pool:
+        written = write_pool(report, args.pool, levels=args.levels)
+        print(f"\n💾 {written} questions written to {args.pool}")
+
+
+if __name__ == "__main__":
+    main()
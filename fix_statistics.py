@@ -4,44 +4,17 @@ Script to recalculate and update statistics in all exam files
 based on new part mapping
 """
 
+import argparse
 import json
 import os
 from pathlib import Path
 from collections import defaultdict
 
-# Updated MONDAI to PART mapping
-MONDAI_PART_MAPPING = {
-    "N1": {
-        "vocabulary": list(range(1, 5)),
-        "grammar": list(range(5, 8)),
-        "reading": list(range(8, 14)),
-        "listening": list(range(14, 100))
-    },
-    "N2": {
-        "vocabulary": list(range(1, 7)),
-        "grammar": list(range(7, 10)),
-        "reading": list(range(10, 15)),
-        "listening": list(range(15, 100))
-    },
-    "N3": {
-        "vocabulary": list(range(1, 6)),
-        "grammar": list(range(6, 9)),
-        "reading": list(range(9, 13)),
-        "listening": list(range(13, 100))
-    },
-    "N4": {
-        "vocabulary": list(range(1, 6)),
-        "grammar": list(range(6, 9)),
-        "reading": list(range(9, 12)),
-        "listening": list(range(12, 100))
-    },
-    "N5": {
-        "vocabulary": list(range(1, 5)),
-        "grammar": list(range(5, 8)),
-        "reading": list(range(8, 11)),
-        "listening": list(range(11, 100))
-    }
-}
+from exam_corpus import LEVELS, write_exam
+from exam_corpus.schema import get_validator
+from exam_corpus.changeset import (
+    add_changeset_arguments, apply_changes, diff_documents, run_changeset_command
+)
 
 
 def recalculate_statistics(data):
@@ -58,26 +31,44 @@ def recalculate_statistics(data):
     return dict(stats)
 
 
-def update_file_statistics(file_path: Path) -> bool:
-    """Update statistics in a single exam file"""
+def plan_file_statistics(file_path: Path, data: dict) -> list:
+    """
+    Plan the statistics changes for a single exam without writing it.
+
+    Raises:
+        ValueError: If the exam does not match exam_schema.json
+    """
+    errors = get_validator()(data)
+    if errors:
+        pointer, message = errors[0]
+        raise ValueError(f"does not match the schema at {pointer or '/'}: {message}"
+                         + (f" (+{len(errors) - 1} more)" if len(errors) > 1 else ""))
+
+    new_stats = recalculate_statistics(data)
+    
+    # Check if statistics need updating
+    old_stats = data.get('statistics', {})
+    if old_stats == new_stats:
+        return []
+    
+    current = {'statistics': data['statistics']} if 'statistics' in data else {}
+    return diff_documents(current, {'statistics': new_stats})
+
+
+def update_file_statistics(file_path: Path, data: dict = None) -> bool:
+    """Update statistics in a single exam file (pass data when it is already parsed)"""
     try:
         # Read the file
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Recalculate statistics
-        new_stats = recalculate_statistics(data)
+        if data is None:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
         
-        # Check if statistics need updating
-        old_stats = data.get('statistics', {})
-        if old_stats != new_stats:
-            data['statistics'] = new_stats
+        changes = plan_file_statistics(file_path, data)
+        if changes:
+            apply_changes(data, changes)
             
             # Write back
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            
-            return True
+            return write_exam(file_path, data)
         
         return False
         
@@ -88,7 +79,13 @@ def update_file_statistics(file_path: Path) -> bool:
 
 def main():
     """Main function"""
-    base_dir = Path(__file__).parent / "exams"
+    parser = argparse.ArgumentParser(description="Recalculate statistics in all exam files")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    add_changeset_arguments(parser)
+    args = parser.parse_args()
+
+    base_dir = args.exams_dir
     
     if not base_dir.exists():
         print(f"❌ Exams directory not found: {base_dir}")
@@ -105,21 +102,12 @@ def main():
         "N5": {"total": 0, "updated": 0}
     }
     
-    for level in ["N1", "N2", "N3", "N4", "N5"]:
-        level_dir = base_dir / level
-        
-        if not level_dir.exists():
-            continue
-        
-        print(f"\n📂 Processing {level}...")
-        
-        json_files = list(level_dir.rglob("*.json"))
-        
-        for json_file in json_files:
-            stats[level]["total"] += 1
-            if update_file_statistics(json_file):
-                stats[level]["updated"] += 1
-                print(f"  ✅ Updated: {json_file.name}")
+    # Plan every change in parallel, then apply them in one batched pass
+    counts = run_changeset_command(args, plan_file_statistics, LEVELS)
+    if counts is None:
+        return
+    for level, level_counts in counts.items():
+        stats.setdefault(level, {"total": 0, "updated": 0}).update(level_counts)
     
     # Summary
     print("\n" + "=" * 60)
@@ -3,56 +3,68 @@
 Generate comprehensive statistics for all exam files
 """
 
-import json
+import argparse
 from pathlib import Path
-from collections import defaultdict
 
-def analyze_exams():
-    """Analyze all exam files and generate statistics"""
-    exams_dir = Path(__file__).parent / "exams"
-    
-    stats = {
-        "total_exams": 0,
-        "by_level": defaultdict(lambda: {
-            "count": 0,
-            "total_questions": 0,
-            "by_part": defaultdict(int),
-            "by_type": defaultdict(int)
-        })
+from exam_corpus import EXAMS_DIR, Manifest, timing_report
+from exam_corpus.archive import ARCHIVE_PATH, update_archive
+from exam_corpus.listing import (
+    LISTING_DIR, LISTING_VERSION, build_listings, directory_generations, listing_entry,
+    save_listings
+)
+from exam_corpus.question_index import open_index
+from exam_corpus.schema import schema_errors, schema_fingerprint
+from exam_corpus.statistics import (
+    COUNTS_VERSION, add_exam_counts, count_questions, new_statistics, save_statistics_json,
+    statistics_from_index
+)
+
+
+def analyze_exams(workers: int = None, timings: list = None, full: bool = False,
+                  schema: bool = False, archive: Path = None):
+    """
+    Analyze all exam files and generate statistics (only changed files are re-read).
+
+    Counts and exam headers alone are read from a streaming scan; with
+    schema, changed files are parsed once for the schema check and the
+    counts and headers come from that parse. With archive, changed files
+    are parsed from the exam archive instead of read from the tree.
+    """
+    stats = new_statistics()
+    manifest = Manifest()
+    analyses = {
+        "counts": (count_questions, COUNTS_VERSION),
+        "listing": (listing_entry, LISTING_VERSION),
     }
-    
-    # Process each level
-    for level_dir in sorted(exams_dir.glob("N*")):
-        if not level_dir.is_dir():
+    if schema:
+        analyses["schema"] = (schema_errors, schema_fingerprint())
+    records = []
+    invalid = 0
+    generations = directory_generations(manifest.exams_dir)
+
+    for record in manifest.refresh(analyses, workers=workers, full=full, parse=schema,
+                                   archive=archive):
+        records.append(record)
+        if timings is not None and not record.cached:
+            timings.append(record)
+        if record.error:
+            print(f"Error processing {record.path}: {record.error}")
             continue
-        
-        level_name = level_dir.name
-        
-        for subdir in ["custom", "official"]:
-            exam_dir = level_dir / subdir
-            if not exam_dir.exists():
-                continue
-            
-            for json_file in exam_dir.glob("*.json"):
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    stats["total_exams"] += 1
-                    level_stats = stats["by_level"][level_name]
-                    level_stats["count"] += 1
-                    level_stats["by_type"][subdir] += 1
-                    
-                    # Count questions by part
-                    for section in data.get("sections", []):
-                        part = section.get("part", "unknown")
-                        questions = len(section.get("questions", []))
-                        level_stats["by_part"][part] += questions
-                        level_stats["total_questions"] += questions
-                
-                except Exception as e:
-                    print(f"Error processing {json_file}: {e}")
-    
+        errors = record.data.get("schema")
+        if errors:
+            # Exams that do not match exam_schema.json are left out of the totals
+            invalid += 1
+            print(f"⚠️  Skipping {record.path} (schema): {errors[0]}"
+                  + (f" (+{len(errors) - 1} more)" if len(errors) > 1 else ""))
+            continue
+        add_exam_counts(stats, record.level, record.source, record.data["counts"])
+
+    manifest.save()
+    written = save_listings(build_listings(records), generations=generations)
+    print(f"📇 Listing index: {written} file(s) updated in {LISTING_DIR}")
+    if invalid:
+        print(f"⚠️  {invalid} exam(s) not matching the schema were left out of the statistics")
+    print()
     return stats
 
 
@@ -112,37 +124,45 @@ def print_statistics(stats):
     print("="*70)
 
 
-def save_statistics_json(stats):
-    """Save statistics to JSON file"""
-    output_file = Path(__file__).parent / "exam_statistics.json"
-    
-    # Convert defaultdict to regular dict for JSON serialization
-    json_stats = {
-        "total_exams": stats["total_exams"],
-        "by_level": {}
-    }
-    
-    for level, level_stats in stats["by_level"].items():
-        json_stats["by_level"][level] = {
-            "count": level_stats["count"],
-            "total_questions": level_stats["total_questions"],
-            "by_part": dict(level_stats["by_part"]),
-            "by_type": dict(level_stats["by_type"])
-        }
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(json_stats, f, ensure_ascii=False, indent=2)
-    
-    print(f"\n💾 Statistics saved to: {output_file}")
-
-
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Generate exam statistics")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--timings", action="store_true",
+                        help="print per-file load timings")
+    parser.add_argument("--full", action="store_true",
+                        help="ignore the manifest and re-parse every file")
+    parser.add_argument("--schema", action="store_true",
+                        help="leave exams that do not match exam_schema.json out of the totals")
+    parser.add_argument("--index", action="store_true",
+                        help="aggregate from the columnar question index (rebuilt if stale)")
+    parser.add_argument("--archive", type=Path, nargs="?", const=ARCHIVE_PATH, default=None,
+                        metavar="FILE",
+                        help=f"read changed exams from the single-file archive, updated first "
+                             f"(default: {ARCHIVE_PATH.name} next to the exams tree)")
+    args = parser.parse_args()
+
     print("🔍 Analyzing exam database...\n")
-    stats = analyze_exams()
+    timings = [] if args.timings else None
+    if args.archive is not None and not args.index:
+        report = update_archive(args.archive, EXAMS_DIR)
+        print(f"🗄️  Archive {args.archive.name}: {report['entries']} exams, "
+              f"{report['written']} written\n")
+    if args.index:
+        with open_index(workers=args.workers) as index:
+            stats = statistics_from_index(index)
+    else:
+        stats = analyze_exams(workers=args.workers, timings=timings, full=args.full,
+                              schema=args.schema, archive=args.archive)
     print_statistics(stats)
     save_statistics_json(stats)
 
+    if timings is not None:
+        print("\n⏱️  Load timings:")
+        for line in timing_report(timings):
+            print(f"   {line}")
+
 
 if __name__ == "__main__":
     main()
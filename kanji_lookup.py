@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Build the inverted kanji index (kanji_index/) and look up the questions
+using a word, e.g. every question with 緊張
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from exam_corpus import EXAMS_DIR
+from exam_corpus.kanji_index import INDEX_DIR, KanjiIndex, build_index, parse_query
+from exam_corpus.mapping import PARTS
+from exam_corpus.search import plain_text
+
+
+def print_results(results: list, limit: int, seconds: float):
+    """Print the first matches with their question text"""
+    exams = {}
+    for result in results[:limit]:
+        if result["path"] not in exams:
+            with open(EXAMS_DIR / result["path"], "r", encoding="utf-8") as f:
+                data = json.load(f)
+            exams[result["path"]] = [q for s in data.get("sections", []) for q in s.get("questions", [])]
+        question = exams[result["path"]][result["position"]]
+        passage = " 📖" if question.get("passage") else ""
+        print(f"[{result['level']} {result['exam']} mondai {result['mondai']} "
+              f"#{question.get('number', result['position'] + 1)}]{passage} "
+              f"{plain_text(question.get('text'))[:80]}")
+    print("-"*60)
+    print(f"🔎 {len(results)} matching questions ({min(limit, len(results))} shown) "
+          f"in {seconds * 1000:.1f}ms")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Inverted kanji index over the exam questions")
+    parser.add_argument("--index", type=Path, default=INDEX_DIR,
+                        help=f"index directory (default: {INDEX_DIR.name} next to the exams tree)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="index new and changed exams")
+    build.add_argument("--full", action="store_true",
+                       help="rebuild the whole index instead of updating it")
+    build.add_argument("--workers", type=int, default=None,
+                       help="worker processes (default: all cores)")
+
+    query = commands.add_parser("query", help="look up questions")
+    query.add_argument("terms", nargs="+",
+                       help="words, all required; OR separates alternatives (緊張 試験 OR 不安)")
+    query.add_argument("--levels", nargs="+", help="only these levels (N1-N5)")
+    query.add_argument("--parts", nargs="+", choices=PARTS, help="only these parts")
+    query.add_argument("--limit", type=int, default=20, help="questions to show (default: 20)")
+    query.add_argument("--count", action="store_true", help="only print the number of matches")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(f"🈳 Indexing {EXAMS_DIR} into {args.index}...")
+        report = build_index(args.index, EXAMS_DIR, workers=args.workers, full=args.full)
+        print(f"   {report['exams']} files: {report['tokenized']} tokenized, "
+              f"{report['removed']} removed{' (full rebuild)' if report['rebuilt'] else ''} "
+              f"in {report['seconds']:.2f}s")
+        print(f"   {report['tokens']} tokens, {report['postings_bytes'] / 1024 / 1024:.1f}MB of postings, "
+              f"{report['garbage'] * 100:.1f}% garbage")
+        for relative, error in report["errors"].items():
+            print(f"  ❌ Error processing {relative}: {error}")
+        return
+
+    try:
+        with KanjiIndex(args.index) as index:
+            start = time.perf_counter()
+            results = index.query(parse_query(" ".join(args.terms)), levels=args.levels, parts=args.parts)
+            seconds = time.perf_counter() - start
+    except FileNotFoundError:
+        print(f"❌ No index in {args.index}, run: python3 kanji_lookup.py build", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.count:
+        print(len(results))
+    else:
+        print_results(results, args.limit, seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Assemble fresh mock exams from questions of the whole corpus, following
+each level's usual mondai layout
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from exam_corpus import LEVELS, dumps_exam, write_exam
+from exam_corpus.mock import QuestionPools
+
+
+def print_template(pools: QuestionPools, level: str):
+    """Print a level's layout and how many units each mondai can draw from"""
+    template = pools.templates[level]
+    print(f"\n📋 {level} template ({template['duration']} min):")
+    for spec in template["sections"]:
+        units, questions = pools.pool_size(level, spec["mondai"])
+        print(f"   Mondai {spec['mondai']:>2} {spec['part']:<11} {spec['count']:>3} questions "
+              f"from {units} units ({questions} questions)")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Generate mock exams")
+    parser.add_argument("--levels", nargs="+", choices=LEVELS, required=True,
+                        help="levels to generate")
+    parser.add_argument("--count", type=int, default=1, help="exams per level (default: 1)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed; the same seed and corpus give the same exams (default: 0)")
+    parser.add_argument("--first", type=int, default=0,
+                        help="index of the first exam, to continue a series (default: 0)")
+    parser.add_argument("--out", type=Path, default=None,
+                        help="directory to write <id>.json files to (default: JSON Lines on stdout)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes for reading the corpus (default: all cores)")
+    args = parser.parse_args()
+
+    print("🧩 Building question pools...", file=sys.stderr)
+    pools = QuestionPools.build(levels=args.levels, workers=args.workers)
+    units = sum(len(sizes) for sizes in pools.sizes.values())
+    print(f"   {units} distinct units in {pools.seconds:.2f}s", file=sys.stderr)
+
+    if args.out:
+        args.out.mkdir(parents=True, exist_ok=True)
+        for level in args.levels:
+            print_template(pools, level)
+
+    start = time.perf_counter()
+    written = 0
+    for level in args.levels:
+        for exam in pools.generate(level, args.count, seed=args.seed, first=args.first):
+            if args.out:
+                write_exam(args.out / f"{exam['id']}.json", exam)
+            else:
+                sys.stdout.write(json.dumps(exam, ensure_ascii=False) + "\n")
+            written += 1
+    seconds = time.perf_counter() - start
+    print(f"✅ {written} exams assembled in {seconds:.2f}s "
+          f"({seconds / max(written, 1) * 1000:.2f}ms each)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
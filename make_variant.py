@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Serve an exam variant with shuffled options for a seed, score variant
+answer sheets against the canonical key, or benchmark variant generation
+"""
+
+import argparse
+import copy
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+from exam_corpus import EXAMS_DIR, discover_exam_files, dumps_exam
+from exam_corpus.loader import find_exam_file
+from exam_corpus.scoring import load_key
+from exam_corpus.variants import make_variant
+from score_sheets import read_sheets, write_scores
+
+
+def shuffle_deepcopy(data: dict, seed) -> dict:
+    """Baseline: deep-copy the exam, then shuffle each question's options"""
+    variant = copy.deepcopy(data)
+    rng = random.Random(seed)
+    for section in variant.get("sections", []):
+        for question in section.get("questions", []):
+            options = question.get("options")
+            if not isinstance(options, list) or len(options) < 2:
+                continue
+            order = list(range(len(options)))
+            rng.shuffle(order)
+            question["options"] = [options[index] for index in order]
+            if isinstance(question.get("answer"), int) and 0 <= question["answer"] < len(order):
+                question["answer"] = order.index(question["answer"])
+    return variant
+
+
+def check_variant(data: dict, variant: dict, mapping) -> bool:
+    """Every variant answer points at the same option text as the canonical one"""
+    base = mapping.base
+    canonical = [q for s in data.get("sections", []) for q in s.get("questions", [])]
+    shuffled = [q for s in variant.get("sections", []) for q in s.get("questions", [])]
+    for original, question, perm in zip(canonical, shuffled, mapping.permutations):
+        answer = original.get("answer")
+        if perm is None or not isinstance(answer, int) or not 0 <= answer - base < len(perm):
+            if question.get("answer") != answer:
+                return False
+        elif question["options"][question["answer"] - base] != original["options"][answer - base]:
+            return False
+    return True
+
+
+def benchmark(files: int, variants: int):
+    """Time make_variant against deepcopy + shuffle on the largest N1 exams"""
+    paths = sorted((path for path, _, _ in discover_exam_files(levels=["N1"])),
+                   key=lambda path: path.stat().st_size, reverse=True)[:files]
+    print("\n" + "="*72)
+    print(f"⏱️  VARIANT BENCHMARK ({variants} variants per exam)")
+    print("="*72)
+    print(f"{'Exam':<26} {'Size':>8} {'Questions':>10} {'deepcopy':>10} {'variant':>10} {'Speedup':>8}")
+    print("-"*72)
+    for path in paths:
+        with open(path, "rb") as f:
+            raw = f.read()
+        data = json.loads(raw)
+
+        start = time.perf_counter()
+        for seed in range(variants):
+            shuffle_deepcopy(data, seed)
+        baseline = (time.perf_counter() - start) / variants
+
+        start = time.perf_counter()
+        for seed in range(variants):
+            variant, mapping = make_variant(data, path.stem, seed, secret=b"benchmark")
+        keyed = (time.perf_counter() - start) / variants
+
+        ok = check_variant(data, variant, mapping) and dumps_exam(data) == raw
+        questions = len(mapping)
+        print(f"{path.stem:<26} {len(raw) / 1024:>6.0f}KB {questions:>10} {baseline * 1000:>8.2f}ms "
+              f"{keyed * 1000:>8.2f}ms {baseline / keyed:>7.1f}x{'' if ok else '  ❌'}")
+    print("-"*72)
+    print("variant: keyed permutations, shallow copies; the canonical exam is left unchanged")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Exam variants with shuffled options")
+    parser.add_argument("exam", nargs="?", help="exam id (e.g. jlpt4you_N1_1)")
+    parser.add_argument("--seed", default=None, help="variant seed, e.g. a student id")
+    parser.add_argument("--out", type=Path, default=None,
+                        help="file to write the variant (or the scores) to (default: stdout)")
+    parser.add_argument("--score", type=Path, default=None, metavar="SHEETS",
+                        help="score JSON Lines answer sheets filled in on this variant")
+    parser.add_argument("--bench", action="store_true",
+                        help="compare with deepcopy + shuffle on the largest N1 exams")
+    parser.add_argument("--bench-files", type=int, default=5,
+                        help="exams to benchmark (default: 5)")
+    parser.add_argument("--bench-variants", type=int, default=200,
+                        help="variants per exam (default: 200)")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench_files, args.bench_variants)
+        return
+    if not args.exam or args.seed is None:
+        parser.error("an exam id and --seed are required")
+
+    try:
+        path = find_exam_file(args.exam, EXAMS_DIR)[0]
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        variant, mapping = make_variant(data, args.exam, args.seed)
+
+        if args.score:
+            ids, sheets = read_sheets(args.score)
+            scores = load_key(path).score_batch([mapping.to_canonical(sheet) for sheet in sheets], ids)
+            out = open(args.out, "w", encoding="utf-8", newline="") if args.out else sys.stdout
+            try:
+                write_scores(ids, scores, out)
+            finally:
+                if args.out:
+                    out.close()
+            print(f"✅ {len(scores)} variant sheets scored against the canonical key", file=sys.stderr)
+            return
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    payload = dumps_exam(variant)
+    if args.out:
+        args.out.write_bytes(payload)
+    else:
+        sys.stdout.buffer.write(payload + b"\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Convert exams to the packed binary format (.jxb) and back, and benchmark it
+"""
+
+import argparse
+from pathlib import Path
+
+from exam_corpus import EXAMS_DIR
+from exam_corpus.packed import benchmark_tree, pack_tree, unpack_tree
+
+
+def print_pack_report(report: dict):
+    """Print sizes per level"""
+    print("\n" + "="*60)
+    print("📊 PACKING REPORT")
+    print("="*60)
+    print(f"{'Level':<8} {'Files':<8} {'JSON':>12} {'Packed':>12} {'Ratio':>8}")
+    print("-"*60)
+    for level in sorted(report["levels"]):
+        stats = report["levels"][level]
+        ratio = stats["packed"] / stats["original"] * 100 if stats["original"] else 0
+        print(f"{level:<8} {stats['files']:<8} {stats['original'] / 1024 / 1024:>10.1f}MB "
+              f"{stats['packed'] / 1024 / 1024:>10.1f}MB {ratio:>7.1f}%")
+    print("-"*60)
+    print(f"⏱️  {report['written']} files written in {report['seconds']:.2f}s")
+    if report["mismatches"]:
+        print(f"⚠️  {len(report['mismatches'])} files would not round-trip and were not packed:")
+        for relative in report["mismatches"][:20]:
+            print(f"   - {relative}")
+
+
+def print_benchmark(results: dict):
+    """Print load times per level"""
+    print("\n" + "="*78)
+    print("⏱️  LOAD BENCHMARK (all files of a level, best of 3)")
+    print("="*78)
+    print(f"{'Level':<7} {'Files':>6} {'JSON':>9} {'Packed':>9} {'JSON load':>10} {'Packed load':>12} "
+          f"{'1 part':>9} {'1 mondai':>9}")
+    print("-"*78)
+    for level, stats in results.items():
+        print(f"{level:<7} {stats['files']:>6} "
+              f"{stats['json_bytes'] / 1024 / 1024:>7.1f}MB {stats['packed_bytes'] / 1024 / 1024:>7.1f}MB "
+              f"{stats['json_load'] * 1000:>8.0f}ms {stats['packed_load'] * 1000:>10.0f}ms "
+              f"{stats['packed_part'] * 1000:>7.0f}ms {stats['packed_mondai'] * 1000:>7.0f}ms")
+    print("-"*78)
+    print("1 part: only the listening sections; 1 mondai: only the first mondai")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Pack exams into the binary .jxb format")
+    parser.add_argument("command", choices=["pack", "unpack", "bench"],
+                        help="pack: exams tree -> packed tree; unpack: the reverse; "
+                             "bench: compare load times of a packed tree with the JSON tree")
+    parser.add_argument("--source", type=Path, default=None,
+                        help="tree to read (default: exams/ for pack)")
+    parser.add_argument("--out", type=Path, default=None,
+                        help="tree to write")
+    parser.add_argument("--verify", type=Path, default=None, metavar="DIR",
+                        help="unpack: check the rebuilt bytes against the original tree")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        if args.out is None:
+            parser.error("pack requires --out")
+        source = args.source or EXAMS_DIR
+        print(f"📦 Packing {source} -> {args.out}...")
+        report = pack_tree(args.out, exams_dir=source, workers=args.workers)
+        print_pack_report(report)
+    elif args.command == "unpack":
+        if args.source is None:
+            parser.error("unpack requires --source")
+        print(f"📤 Unpacking {args.source}...")
+        report = unpack_tree(args.source, args.out, args.verify, workers=args.workers)
+        print(f"   {report['files']} files unpacked, {report['written']} written")
+        if args.verify is not None:
+            if report["mismatches"]:
+                print(f"❌ {len(report['mismatches'])} files differ from {args.verify}:")
+                for relative in report["mismatches"][:20]:
+                    print(f"   - {relative}")
+            else:
+                print(f"✅ Round trip is byte-identical to {args.verify}")
+    else:
+        if args.source is None:
+            parser.error("bench requires --source (a packed tree)")
+        print_benchmark(benchmark_tree(args.source, EXAMS_DIR))
+        return
+
+    for relative, error in report["errors"].items():
+        print(f"  ❌ Error processing {relative}: {error}")
+
+
+if __name__ == "__main__":
+    main()
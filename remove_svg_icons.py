@@ -4,97 +4,120 @@ Remove SVG icons (lucide icons) from exam JSON files.
 Targets: circle-question-mark, highlighter, triangle-alert icons
 """
 
+import argparse
 import json
 import re
+import time
 from pathlib import Path
 
+from exam_corpus import EXAMS_DIR, discover_exam_files, iter_exams, write_exam
+
+# A lucide <svg> element; the body stops at the first </svg>
+_SVG = r'<svg[^>]*class="[^"]*lucide[^"]*"[^>]*>(?:[^<]|<(?!/svg>))*</svg>'
+
+# One pass for both clean-ups: a lucide icon anywhere, or the closing </span>
+# (plus <br>s, whitespace and icons) left dangling at the end of the text
+SVG_PATTERN = re.compile(rf'</span>(?:<br>|{_SVG})*(?:\s|{_SVG})*$|{_SVG}')
+
+SVG_MARKER = "<svg"
+
+
 def remove_svg_icons(text):
     """Remove all lucide SVG icons from text."""
-    # Pattern to match any SVG tag with lucide class
-    svg_pattern = r'<svg[^>]*class="[^"]*lucide[^"]*"[^>]*>.*?</svg>'
-    
-    # Remove SVG tags
-    cleaned = re.sub(svg_pattern, '', text, flags=re.DOTALL)
-    
-    # Also remove any standalone closing span tags that might be left
-    # and extra <br> tags that often accompany these icons
-    cleaned = re.sub(r'</span>(<br>)*\s*$', '', cleaned)
-    
-    return cleaned
-
-def process_exam_file(file_path):
-    """Process a single exam JSON file."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
+    if SVG_MARKER not in text:
+        return text
+    return SVG_PATTERN.sub("", text)
+
+
+def clean_strings(value):
+    """
+    Remove icons from every string in a JSON value.
+
+    Returns:
+        (cleaned value, True if anything changed)
+    """
+    if isinstance(value, str):
+        cleaned = remove_svg_icons(value)
+        return cleaned, cleaned != value
+    if isinstance(value, list):
         modified = False
-        
-        # Process each section (mondai)
-        if 'sections' in data:
-            for section in data['sections']:
-                if 'questions' in section:
-                    for question in section['questions']:
-                        # Clean passage field if it exists
-                        if 'passage' in question and question['passage']:
-                            original = question['passage']
-                            cleaned = remove_svg_icons(original)
-                            if cleaned != original:
-                                question['passage'] = cleaned
-                                modified = True
-                        
-                        # Clean text field if it contains HTML
-                        if 'text' in question and question['text'] and '<svg' in question['text']:
-                            original = question['text']
-                            cleaned = remove_svg_icons(original)
-                            if cleaned != original:
-                                question['text'] = cleaned
-                                modified = True
-                        
-                        # Clean options if they contain HTML
-                        if 'options' in question:
-                            for i, option in enumerate(question['options']):
-                                if option and '<svg' in option:
-                                    original = option
-                                    cleaned = remove_svg_icons(original)
-                                    if cleaned != original:
-                                        question['options'][i] = cleaned
-                                        modified = True
-        
-        # Save if modified
-        if modified:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            return True
-        
-        return False
-    
-    except Exception as e:
-        print(f"Error processing {file_path}: {e}")
-        return False
+        for i, item in enumerate(value):
+            value[i], changed = clean_strings(item)
+            modified |= changed
+        return value, modified
+    if isinstance(value, dict):
+        modified = False
+        for key, item in value.items():
+            value[key], changed = clean_strings(item)
+            modified |= changed
+        return value, modified
+    return value, False
+
+
+def process_exam_file(file_path, data=None):
+    """
+    Process a single exam JSON file.
+
+    Files whose raw bytes contain no <svg are skipped without being parsed.
+
+    Returns:
+        True if the file was rewritten, None if it was skipped by the prefilter
+    """
+    if data is None:
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        if SVG_MARKER.encode() not in raw:
+            return None
+        data = json.loads(raw)
+
+    data, modified = clean_strings(data)
+    if modified:
+        return write_exam(file_path, data)
+    return False
+
 
 def main():
-    exams_dir = Path('/Users/nguyenbahoanglong/Desktop/exams-api/exams')
-    
+    parser = argparse.ArgumentParser(description="Remove lucide SVG icons from exam files")
+    parser.add_argument("--exams-dir", type=Path, default=EXAMS_DIR,
+                        help="root of the exams tree")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
     # Find all JSON files
-    json_files = list(exams_dir.rglob('*.json'))
-    
-    print(f"Found {len(json_files)} JSON files")
+    total = len(discover_exam_files(exams_dir=args.exams_dir))
+
+    print(f"Found {total} JSON files")
     print("Removing SVG icons...")
-    
+
     modified_count = 0
-    
-    for i, file_path in enumerate(json_files, 1):
-        if process_exam_file(file_path):
+    skipped_count = 0
+    total_bytes = 0
+    start = time.perf_counter()
+
+    # Files are read by the transform itself so the <svg prefilter runs before parsing
+    records = iter_exams(workers=args.workers, transform=process_exam_file,
+                         exams_dir=args.exams_dir, parse=False)
+    for i, record in enumerate(records, 1):
+        total_bytes += record.size
+        if record.error:
+            print(f"Error processing {record.path}: {record.error}")
+        elif record.data:
             modified_count += 1
-            print(f"[{i}/{len(json_files)}] ✓ {file_path.name}")
+            print(f"[{i}/{total}] ✓ {record.name}")
         else:
+            if record.data is None:
+                skipped_count += 1
             if i % 50 == 0:
-                print(f"[{i}/{len(json_files)}] Processed...")
-    
+                print(f"[{i}/{total}] Processed...")
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
     print(f"\n✅ Complete!")
     print(f"   Modified: {modified_count} files")
-    print(f"   Total processed: {len(json_files)} files")
+    print(f"   Skipped without parsing (no <svg): {skipped_count} files")
+    print(f"   Total processed: {total} files")
+    print(f"   Throughput: {total / elapsed:,.0f} files/s, "
+          f"{total_bytes / 1024 / 1024 / elapsed:.1f} MB/s ({elapsed:.2f}s)")
 
 if __name__ == '__main__':
     main()
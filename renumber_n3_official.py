@@ -4,38 +4,25 @@ Script to renumber mondai in N3 official exams
 Remove duplicate mondai numbers, renumber sequentially from 1
 """
 
+import argparse
 import json
 from pathlib import Path
 
-# Updated MONDAI to PART mapping for N3
-MONDAI_PART_MAPPING_N3 = {
-    "vocabulary": list(range(1, 6)),    # Mondai 1-5
-    "grammar": list(range(6, 9)),       # Mondai 6-8
-    "reading": list(range(9, 13)),      # Mondai 9-12
-    "listening": list(range(13, 100))   # Mondai 13-last
-}
+from exam_corpus import EXAMS_DIR, iter_exams, part_for, write_exam
 
 
 def get_part_from_mondai(mondai: int) -> str:
     """Get part based on mondai number for N3"""
-    if mondai in MONDAI_PART_MAPPING_N3["vocabulary"]:
-        return "vocabulary"
-    elif mondai in MONDAI_PART_MAPPING_N3["grammar"]:
-        return "grammar"
-    elif mondai in MONDAI_PART_MAPPING_N3["reading"]:
-        return "reading"
-    elif mondai in MONDAI_PART_MAPPING_N3["listening"]:
-        return "listening"
-    else:
-        return "listening"  # Default for mondai > 12
+    return part_for("N3", mondai) or "listening"  # Default for mondai > 12
 
 
-def renumber_file(file_path: Path) -> bool:
-    """Renumber mondai in a single N3 official file"""
+def renumber_file(file_path: Path, data: dict = None) -> bool:
+    """Renumber mondai in a single N3 official file (pass data when it is already parsed)"""
     try:
         # Read file
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if data is None:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
         
         # Check if it's N3
         level = data.get('level')
@@ -58,11 +45,8 @@ def renumber_file(file_path: Path) -> bool:
         
         data['statistics'] = stats
         
-        # Write back
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        
-        return True
+        # Write back (only files whose content actually changed)
+        return write_exam(file_path, data)
         
     except Exception as e:
         print(f"❌ Error processing {file_path.name}: {e}")
@@ -71,7 +55,12 @@ def renumber_file(file_path: Path) -> bool:
 
 def main():
     """Main function"""
-    base_dir = Path(__file__).parent / "exams" / "N3" / "official"
+    parser = argparse.ArgumentParser(description="Renumber mondai in N3 official exams")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    base_dir = EXAMS_DIR / "N3" / "official"
     
     if not base_dir.exists():
         print(f"❌ N3 official directory not found: {base_dir}")
@@ -80,16 +69,19 @@ def main():
     print("🚀 Starting N3 official files renumbering...")
     print("=" * 60)
     
-    json_files = sorted(base_dir.glob("*.json"))
-    
+    total_files = 0
     updated_count = 0
-    for json_file in json_files:
-        if renumber_file(json_file):
+    for record in iter_exams(levels=["N3"], sources=["official"], workers=args.workers,
+                             transform=renumber_file):
+        total_files += 1
+        if record.error:
+            print(f"❌ Error processing {record.name}: {record.error}")
+        elif record.data:
             updated_count += 1
-            print(f"  ✅ Renumbered: {json_file.name}")
+            print(f"  ✅ Renumbered: {record.name}")
     
     print("\n" + "=" * 60)
-    print(f"📊 SUMMARY: {updated_count}/{len(json_files)} files renumbered")
+    print(f"📊 SUMMARY: {updated_count}/{total_files} files renumbered")
     print("=" * 60)
     
     if updated_count > 0:
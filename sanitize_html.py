@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Sanitize the inline HTML of every question field against a tag/attribute allowlist
+"""
+
+import argparse
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from exam_corpus import EXAMS_DIR, dumps_exam, iter_exams, write_exam
+from exam_corpus.sanitizer import DEFAULT_ALLOWLIST, get_sanitizer, load_allowlist
+
+
+class SanitizeFile:
+    """Worker transform: sanitize one exam and report its size before and after"""
+
+    def __init__(self, allowlist: dict, dry_run: bool):
+        self.allowlist = allowlist
+        self.dry_run = dry_run
+
+    def __call__(self, file_path: Path, data: dict) -> dict:
+        sanitizer = get_sanitizer(self.allowlist)
+        hits, misses = sanitizer.hits, sanitizer.misses
+        original = file_path.stat().st_size
+
+        modified = sanitizer.sanitize_exam(data)
+        size = len(dumps_exam(data)) if modified else original
+        written = modified and not self.dry_run and write_exam(file_path, data)
+        return {
+            "original": original,
+            "sanitized": size,
+            "modified": modified,
+            "written": bool(written),
+            "cache_hits": sanitizer.hits - hits,
+            "cache_misses": sanitizer.misses - misses,
+        }
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Sanitize inline HTML in exam files")
+    parser.add_argument("--exams-dir", type=Path, default=EXAMS_DIR,
+                        help="root of the exams tree")
+    parser.add_argument("--allowlist", type=Path, default=None,
+                        help="JSON allowlist ({\"tags\": {tag: [attributes]}, \"drop_content\": [tags]})")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="report the size changes without writing any file")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    allowlist = load_allowlist(args.allowlist) if args.allowlist else DEFAULT_ALLOWLIST
+    transform = SanitizeFile(allowlist, args.dry_run)
+
+    print("🧼 Sanitizing exam HTML...")
+    levels = defaultdict(lambda: {"files": 0, "modified": 0, "original": 0, "sanitized": 0})
+    hits = misses = written = 0
+    start = time.perf_counter()
+
+    for record in iter_exams(workers=args.workers, transform=transform, exams_dir=args.exams_dir):
+        if record.error:
+            print(f"  ❌ Error processing {record.path}: {record.error}")
+            continue
+        result = record.data
+        level = levels[record.level]
+        level["files"] += 1
+        level["modified"] += result["modified"]
+        level["original"] += result["original"]
+        level["sanitized"] += result["sanitized"]
+        hits += result["cache_hits"]
+        misses += result["cache_misses"]
+        written += result["written"]
+
+    elapsed = time.perf_counter() - start
+    print("\n" + "="*60)
+    print("📊 SANITIZER REPORT")
+    print("="*60)
+    print(f"{'Level':<8} {'Files':<8} {'Modified':<10} {'Before':>12} {'After':>12} {'Delta':>12}")
+    print("-"*60)
+    for name in sorted(levels):
+        level = levels[name]
+        delta = level["sanitized"] - level["original"]
+        print(f"{name:<8} {level['files']:<8} {level['modified']:<10} {level['original']:>12,} "
+              f"{level['sanitized']:>12,} {delta:>+12,}")
+
+    lookups = hits + misses
+    if lookups:
+        print(f"\n🗃️  String cache: {hits:,} hits / {lookups:,} lookups ({hits / lookups:.1%})")
+    if args.dry_run:
+        print("ℹ️  Dry run: no files were modified")
+    else:
+        print(f"✍️  {written} files written")
+    print(f"⏱️  {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Score answer sheets against an exam's answer key, or benchmark batch scoring
+"""
+
+import argparse
+import csv
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+from exam_corpus import EXAMS_DIR
+from exam_corpus.answer_bias import exam_answer_base
+from exam_corpus.loader import find_exam_file
+from exam_corpus.scoring import BLANK, load_key
+
+
+def read_sheets(path: Path) -> tuple:
+    """Read a JSON Lines file of {"id": ..., "answers": [...]}; returns (ids, answers)"""
+    ids, sheets = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            sheet = json.loads(line)
+            ids.append(sheet.get("id", number))
+            sheets.append(sheet["answers"])
+    return ids, sheets
+
+
+def write_scores(ids: list, scores, out):
+    """Write one CSV row per sheet: id, total, parts, then mondai"""
+    writer = csv.writer(out)
+    writer.writerow(["id", "total"] + list(scores.by_part)
+                    + [f"mondai_{mondai}" for mondai in scores.by_mondai])
+    columns = [scores.totals] + list(scores.by_part.values()) + list(scores.by_mondai.values())
+    for index, sheet_id in enumerate(ids):
+        writer.writerow([sheet_id] + [column[index] for column in columns])
+
+
+def score_loop(data: dict, answers: list) -> dict:
+    """Reference scorer: one Python step per question"""
+    result = {"total": 0, "by_part": {}, "by_mondai": {}}
+    base = exam_answer_base(data)
+    position = 0
+    for section in data.get("sections", []):
+        for question in section.get("questions", []):
+            options = question.get("options")
+            answer = question.get("answer")
+            correct = int(answers[position] is not None and isinstance(answer, int)
+                          and answers[position] == answer - base
+                          and isinstance(options, list) and answers[position] < len(options))
+            result["total"] += correct
+            result["by_part"][section["part"]] = result["by_part"].get(section["part"], 0) + correct
+            result["by_mondai"][section["mondai"]] = result["by_mondai"].get(section["mondai"], 0) + correct
+            position += 1
+    return result
+
+
+def benchmark(exam_id: str, count: int):
+    """Score random sheets with the batch engine and with the reference loop"""
+    path = find_exam_file(exam_id, EXAMS_DIR)[0]
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    start = time.perf_counter()
+    key = load_key(path)
+    compile_seconds = time.perf_counter() - start
+    rng = random.Random(0)
+    choices = [0, 1, 2, 3, BLANK]
+    sheets = [bytes(rng.choices(choices, k=len(key))) for _ in range(count)]
+    answers = [[None if answer == BLANK else answer for answer in sheet] for sheet in sheets]
+
+    start = time.perf_counter()
+    scores = key.score_batch(sheets)
+    batch_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    reference = [score_loop(data, sheet) for sheet in answers]
+    loop_seconds = time.perf_counter() - start
+    matches = all(scores.row(index) == reference[index] for index in range(count))
+
+    print("\n" + "="*60)
+    print(f"⏱️  SCORING BENCHMARK: {exam_id}, {len(key)} questions, {count} sheets")
+    print("="*60)
+    print(f"   Compile key:      {compile_seconds * 1000:>8.1f}ms (once, then cached)")
+    print(f"   Batch engine:     {batch_seconds * 1000:>8.1f}ms")
+    print(f"   Per-question loop:{loop_seconds * 1000:>8.1f}ms ({loop_seconds / batch_seconds:.0f}x slower)")
+    print(f"{'✅' if matches else '❌'} Scores {'match' if matches else 'differ from'} the reference loop")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Score answer sheets")
+    parser.add_argument("exam", help="exam id (e.g. jlpt4you_N1_1) or path to the exam file")
+    parser.add_argument("--sheets", type=Path,
+                        help='JSON Lines file, one {"id": ..., "answers": [index or null, ...]} per sheet')
+    parser.add_argument("--out", type=Path, default=None,
+                        help="CSV file to write (default: stdout)")
+    parser.add_argument("--bench", type=int, metavar="N", default=None,
+                        help="score N random sheets and compare with a per-question loop")
+    args = parser.parse_args()
+
+    try:
+        if args.bench:
+            benchmark(Path(args.exam).stem, args.bench)
+            return
+        if args.sheets is None:
+            parser.error("--sheets or --bench is required")
+        key = load_key(args.exam)
+        ids, sheets = read_sheets(args.sheets)
+        start = time.perf_counter()
+        scores = key.score_batch(sheets, ids)
+        seconds = time.perf_counter() - start
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8", newline="") as f:
+            write_scores(ids, scores, f)
+    else:
+        write_scores(ids, scores, sys.stdout)
+    maximum = key.max_scores()["total"]
+    average = sum(scores.totals) / len(scores) if len(scores) else 0
+    print(f"✅ {len(scores)} sheets scored in {seconds * 1000:.1f}ms "
+          f"(average {average:.1f} / {maximum})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Import exams into the SQLite question bank (exam_search.db) and search it
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from exam_corpus import EXAMS_DIR, SOURCES
+from exam_corpus.mapping import PARTS
+from exam_corpus.search import DB_PATH, SEARCH_FIELDS, QuestionSearch, import_exams, plain_text
+
+
+def print_results(results: list, total: int, seconds: float):
+    """Print matching questions, one line each"""
+    for result in results:
+        passage = " 📖" if result["passage"] else ""
+        print(f"[{result['level']} {result['exam_id']} mondai {result['mondai']} "
+              f"#{result['number']}]{passage} {plain_text(result['text'])[:80]}")
+        if result["options"]:
+            options = " / ".join(plain_text(option) for option in result["options"])
+            print(f"    {options[:100]}")
+    print("-"*60)
+    print(f"🔎 {total} matching questions ({len(results)} shown) in {seconds * 1000:.1f}ms")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Full-text search over the exam questions")
+    parser.add_argument("--db", type=Path, default=DB_PATH,
+                        help=f"database file (default: {DB_PATH.name} next to the exams tree)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("import", help="import new and changed exams")
+    load.add_argument("--full", action="store_true",
+                      help="re-import every exam instead of only changed ones")
+    load.add_argument("--workers", type=int, default=None,
+                      help="worker processes (default: all cores)")
+
+    query = commands.add_parser("query", help="search questions")
+    query.add_argument("text", help="text to look for (a literal substring)")
+    query.add_argument("--level", help="only this level (N1-N5)")
+    query.add_argument("--part", choices=PARTS, help="only this part")
+    query.add_argument("--mondai", type=int, help="only this mondai")
+    query.add_argument("--source", choices=SOURCES, help="only this source directory")
+    query.add_argument("--in", dest="fields", nargs="+", choices=SEARCH_FIELDS,
+                       default=list(SEARCH_FIELDS), help="where to look (default: everywhere)")
+    query.add_argument("--limit", type=int, default=20, help="questions to show (default: 20)")
+    query.add_argument("--count", action="store_true", help="only print the number of matches")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        print(f"🗃️  Importing {EXAMS_DIR} into {args.db}...")
+        report = import_exams(args.db, EXAMS_DIR, workers=args.workers, full=args.full)
+        print(f"   {report['files']} files: {report['imported']} imported, "
+              f"{report['unchanged']} unchanged, {report['removed']} removed "
+              f"in {report['seconds']:.2f}s")
+        for relative, error in report["errors"].items():
+            print(f"  ❌ Error processing {relative}: {error}")
+        return
+
+    if not args.db.exists():
+        print(f"❌ {args.db} does not exist, run: python3 search_exams.py import", file=sys.stderr)
+        sys.exit(1)
+
+    filters = {"level": args.level, "part": args.part, "mondai": args.mondai, "source": args.source}
+    with QuestionSearch(args.db) as search:
+        start = time.perf_counter()
+        total = search.count(args.text, args.fields, **filters)
+        results = [] if args.count else search.search(args.text, args.fields, limit=args.limit, **filters)
+        seconds = time.perf_counter() - start
+    if args.count:
+        print(total)
+    else:
+        print_results(results, total, seconds)
+
+
+if __name__ == "__main__":
+    main()
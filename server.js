@@ -6,7 +6,29 @@ const path = require('path');
 const app = express();
 const port = 3001;
 
-const examsDirectory = path.join(__dirname, 'exams');
+// EXAMS_DIR may point at a tree compacted by dedupe_passages.py
+const examsDirectory = process.env.EXAMS_DIR || path.join(__dirname, 'exams');
+
+// Passage store of a compacted tree: { hash: html }, referenced as "passage": { "ref": hash }
+const passageStorePath = path.join(examsDirectory, 'passages.json');
+const passageStore = fs.existsSync(passageStorePath)
+  ? JSON.parse(fs.readFileSync(passageStorePath, 'utf8'))
+  : null;
+
+const expandPassages = (examData) => {
+  if (!passageStore || !Array.isArray(examData.sections)) {
+    return examData;
+  }
+  for (const section of examData.sections) {
+    for (const question of section.questions || []) {
+      const passage = question.passage;
+      if (passage && typeof passage === 'object' && passage.ref in passageStore) {
+        question.passage = passageStore[passage.ref];
+      }
+    }
+  }
+  return examData;
+};
 
 
 // --- Security ---
@@ -26,52 +48,30 @@ const apiKeyAuth = (req, res, next) => {
 app.use('/exams', apiKeyAuth);
 
 
-// Updated part classification system based on MONDAI_PART_MAPPING.md
+// Part classification shared with the Python maintenance scripts.
+// Each part maps to an inclusive [first, last] mondai range; last === null means "and later".
+const mondaiPartMapping = JSON.parse(
+  fs.readFileSync(path.join(__dirname, 'mondai_part_mapping.json'), 'utf8')
+);
+
+const partForMondai = (level, mondai) => {
+  const ranges = mondaiPartMapping[level];
+  if (!ranges) {
+    return null;
+  }
+  for (const [part, [first, last]] of Object.entries(ranges)) {
+    if (mondai >= first && (last === null || mondai <= last)) {
+      return part;
+    }
+  }
+  return null;
+};
+
 const skillDetails = {
-  vocabulary: {
-    id: 'vocabulary',
-    name: 'Từ vựng',
-    levels: {
-      N1: [1, 2, 3, 4, 5],  // Mondai 1-5
-      N2: [1, 2, 3, 4, 5],  // Mondai 1-5
-      N3: [1, 2, 3, 4, 5],  // Mondai 1-5
-      N4: [1, 2, 3, 4, 5],  // Mondai 1-5
-      N5: [1, 2, 3, 4],     // Mondai 1-4
-    },
-  },
-  grammar: {
-    id: 'grammar',
-    name: 'Ngữ pháp',
-    levels: {
-      N1: [6, 7, 8],        // Mondai 6-8
-      N2: [6, 7, 8],        // Mondai 6-8
-      N3: [6, 7, 8],        // Mondai 6-8
-      N4: [6, 7, 8],        // Mondai 6-8
-      N5: [5, 6, 7],        // Mondai 5-7
-    },
-  },
-  reading: {
-    id: 'reading',
-    name: 'Đọc hiểu',
-    levels: {
-      N1: [9, 10, 11, 12, 13],    // Mondai 9-13
-      N2: [9, 10, 11, 12, 13],    // Mondai 9-13
-      N3: [9, 10, 11, 12],        // Mondai 9-12
-      N4: [9, 10, 11],            // Mondai 9-11
-      N5: [8, 9, 10],             // Mondai 8-10
-    },
-  },
-  listening: {
-    id: 'listening',
-    name: 'Nghe hiểu',
-    levels: {
-      N1: [14, 15, 16, 17, 18],       // Mondai 14-18
-      N2: [14, 15, 16, 17, 18, 19],   // Mondai 14-19 (some exams have 19)
-      N3: [13, 14, 15, 16, 17],       // Mondai 13-17
-      N4: [12, 13, 14, 15],           // Mondai 12-15
-      N5: [11, 12, 13, 14],           // Mondai 11-14
-    },
-  },
+  vocabulary: { id: 'vocabulary', name: 'Từ vựng' },
+  grammar: { id: 'grammar', name: 'Ngữ pháp' },
+  reading: { id: 'reading', name: 'Đọc hiểu' },
+  listening: { id: 'listening', name: 'Nghe hiểu' },
 };
 app.get('/', (req, res) => {
   const html = `
@@ -162,6 +162,65 @@ app.get('/exams/:source/:level', (req, res) => {
     res.json(['jlpt_test']);
 });
 
+const listingDirectory = process.env.LISTING_DIR || path.join(__dirname, 'exam_listing');
+
+const readListing = async (level, source) => {
+  try {
+    const data = await fs.promises.readFile(path.join(listingDirectory, level, `${source}.json`), 'utf8');
+    return JSON.parse(data);
+  } catch (e) {
+    return null;
+  }
+};
+
+// The listing is current while its directory's mtime still matches the generation
+// it was built against: adding, removing or rewriting an exam changes it.
+const isCurrentListing = async (listing, directoryPath) => {
+  if (!listing || !listing.generation) {
+    return false;
+  }
+  try {
+    const stat = await fs.promises.stat(directoryPath, { bigint: true });
+    return listing.generation === String(stat.mtimeNs);
+  } catch (e) {
+    return false;
+  }
+};
+
+// Fallback without a current listing: list the directory and read each title,
+// reusing listing entries whose file size and mtime still match
+const listDirectory = async (directoryPath, listing) => {
+  const files = await fs.promises.readdir(directoryPath);
+  const examIds = files
+    .filter(file => file.endsWith('.json'))
+    .map(file => path.basename(file, '.json'))
+    .sort((a, b) => a.localeCompare(b, undefined, { numeric: true, sensitivity: 'base' }));
+  const listed = new Map((listing ? listing.items : []).map(item => [item.id, item]));
+
+  const readTitles = async (ids) => Promise.all(ids.map(async (id) => {
+    const filePath = path.join(directoryPath, `${id}.json`);
+    const item = listed.get(id);
+    if (item) {
+      try {
+        const stat = await fs.promises.stat(filePath, { bigint: true });
+        if (BigInt(item.size) === stat.size && item.mtime_ns === String(stat.mtimeNs)) {
+          return { id, title: item.title || null };
+        }
+      } catch (e) {
+        // Fall through to reading the file
+      }
+    }
+    try {
+      const data = await fs.promises.readFile(filePath, 'utf8');
+      const parsed = JSON.parse(data);
+      return { id, title: parsed.title || null };
+    } catch (e) {
+      return { id, title: null };
+    }
+  }));
+  return { examIds, readTitles };
+};
+
 // List exams (id and title) for jlpt_test (supports pagination with ?page=&limit=)
 app.get('/exams/:source/:level/jlpt_test', async (req, res) => {
     const { source, level } = req.params;
@@ -169,25 +228,18 @@ app.get('/exams/:source/:level/jlpt_test', async (req, res) => {
     const directoryPath = path.join(examsDirectory, level, source);
 
     try {
-        const files = await fs.promises.readdir(directoryPath);
-        const examIds = files
-            .filter(file => file.endsWith('.json'))
-            .map(file => path.basename(file, '.json'))
-            .sort((a, b) => a.localeCompare(b, undefined, { numeric: true, sensitivity: 'base' }));
-
-        const readTitles = async (ids) => {
-            const entries = await Promise.all(ids.map(async (id) => {
-                const filePath = path.join(directoryPath, `${id}.json`);
-                try {
-                    const data = await fs.promises.readFile(filePath, 'utf8');
-                    const parsed = JSON.parse(data);
-                    return { id, title: parsed.title || null };
-                } catch (e) {
-                    return { id, title: null };
-                }
-            }));
-            return entries;
-        };
+        // Listing index written by generate_statistics.py: served as is after one
+        // stat of the directory, without listing it or touching the exams
+        const listing = await readListing(level, source);
+        let examIds;
+        let readTitles;
+        if (await isCurrentListing(listing, directoryPath)) {
+            const titles = new Map(listing.items.map(item => [item.id, item.title || null]));
+            examIds = listing.items.map(item => item.id);
+            readTitles = async (ids) => ids.map(id => ({ id, title: titles.get(id) }));
+        } else {
+            ({ examIds, readTitles } = await listDirectory(directoryPath, listing));
+        }
 
         // If page or limit is provided, return paginated result with items (id,title)
         if (typeof page !== 'undefined' || typeof limit !== 'undefined') {
@@ -224,18 +276,70 @@ app.get('/exams/:source/:level/jlpt_test', async (req, res) => {
 
 // --- Specific Content Endpoints ---
 
+// Per-skill slices written by build_exam_slices.py: a JSON header line with the
+// source file's size/mtime and a [part, start, end] offset table, then the
+// compact JSON of each section, with compacted passages already expanded.
+const slicesDirectory = process.env.SLICES_DIR || path.join(__dirname, 'exam_slices');
+
+// Resolves to the filtered response body built from prebuilt fragments, or null
+// when the slice is missing, out of date or has no matching section.
+const readSkillSlices = async (filePath, slicePath, skills) => {
+  try {
+    const [stat, buffer] = await Promise.all([
+      fs.promises.stat(filePath, { bigint: true }),
+      fs.promises.readFile(slicePath),
+    ]);
+    const newline = buffer.indexOf(0x0a);
+    const header = JSON.parse(buffer.subarray(0, newline).toString('utf8'));
+    if (header.version !== 2 || BigInt(header.size) !== stat.size || header.mtime_ns !== String(stat.mtimeNs)) {
+      return null;
+    }
+
+    const body = buffer.subarray(newline + 1);
+    const parts = [];
+    for (const [part, start, end] of header.sections) {
+      if (skills.includes(part)) {
+        parts.push(parts.length ? Buffer.from(',') : Buffer.alloc(0), body.subarray(start, end));
+      }
+    }
+    if (parts.length === 0) {
+      return null;
+    }
+
+    // Same key order as the parsed path: id, title, level, skills, sections
+    const head = JSON.stringify({ ...header.head, skills });
+    return Buffer.concat([Buffer.from(`${head.slice(0, -1)},"sections":[`), ...parts, Buffer.from(']}')]);
+  } catch (e) {
+    return null;
+  }
+};
+
 // Get Full or Filtered Exam Content (preferred endpoint)
-app.get('/exams/:source/:level/jlpt_test/:id', (req, res) => {
+app.get('/exams/:source/:level/jlpt_test/:id', async (req, res) => {
   const { source, level, id } = req.params;
   const { skills } = req.query;
   const filePath = path.join(examsDirectory, level, source, `${id}.json`);
 
+  // A repeated ?skills= arrives as an array; only the plain string form has slices
+  if (typeof skills === 'string' && skills) {
+    const requested = [...new Set(skills.split(',').map(s => s.trim()).filter(Boolean))];
+    const allSkills = Object.keys(skillDetails);
+    const coversAll = requested.length === allSkills.length && requested.every(s => allSkills.includes(s));
+    if (!coversAll) {
+      const slicePath = path.join(slicesDirectory, level, source, `${id}.slices`);
+      const sliced = await readSkillSlices(filePath, slicePath, requested);
+      if (sliced) {
+        return res.type('application/json').send(sliced);
+      }
+    }
+  }
+
   fs.readFile(filePath, 'utf8', (err, data) => {
     if (err) {
       return res.status(404).json({ error: `Exam '${id}' not found in source '${source}' and level '${level}'.` });
     }
     try {
-      const examData = JSON.parse(data);
+      const examData = expandPassages(JSON.parse(data));
 
       // If no skills specified, return full exam
       if (!skills) {
@@ -265,23 +369,13 @@ app.get('/exams/:source/:level/jlpt_test/:id', (req, res) => {
       // Fallback: if no sections match by part, try mondai-based filtering
       // (for backward compatibility or edge cases)
       if (filteredSections.length === 0) {
-        let mondaisForSkills = [];
-        for (const skillId of uniqueRequested) {
-          const info = skillDetails[skillId];
-          if (info && info.levels[level]) {
-            mondaisForSkills.push(...info.levels[level]);
-          }
-        }
-        
-        if (mondaisForSkills.length > 0) {
-          mondaisForSkills = [...new Set(mondaisForSkills)];
-          const fallbackSections = examData.sections.filter(section =>
-            mondaisForSkills.includes(section.mondai)
-          );
-          
-          if (fallbackSections.length > 0) {
-            filteredSections.push(...fallbackSections);
-          }
+        const knownSkills = uniqueRequested.filter(skillId => skillDetails[skillId]);
+        const fallbackSections = examData.sections.filter(section =>
+          knownSkills.includes(partForMondai(level, section.mondai))
+        );
+
+        if (fallbackSections.length > 0) {
+          filteredSections.push(...fallbackSections);
         }
       }
 
@@ -4,56 +4,18 @@ Script to update and validate exam files with correct part assignments
 Based on MONDAI_PART_MAPPING.md
 """
 
+import argparse
 import json
 import os
 from pathlib import Path
 from typing import Dict, List
 
-# Mondai to Part mapping for each level
-MONDAI_PART_MAPPING = {
-    "N1": {
-        "vocabulary": list(range(1, 6)),  # Mondai 1-5
-        "grammar": list(range(6, 9)),     # Mondai 6-8
-        "reading": list(range(9, 14)),    # Mondai 9-13
-        "listening": list(range(14, 19))  # Mondai 14-18
-    },
-    "N2": {
-        "vocabulary": list(range(1, 6)),  # Mondai 1-5
-        "grammar": list(range(6, 9)),     # Mondai 6-8
-        "reading": list(range(9, 14)),    # Mondai 9-13
-        "listening": list(range(14, 20))  # Mondai 14-19 (some exams have 19)
-    },
-    "N3": {
-        "vocabulary": list(range(1, 6)),  # Mondai 1-5
-        "grammar": list(range(6, 9)),     # Mondai 6-8
-        "reading": list(range(9, 13)),    # Mondai 9-12
-        "listening": list(range(13, 18))  # Mondai 13-17
-    },
-    "N4": {
-        "vocabulary": list(range(1, 6)),  # Mondai 1-5
-        "grammar": list(range(6, 9)),     # Mondai 6-8
-        "reading": list(range(9, 12)),    # Mondai 9-11
-        "listening": list(range(12, 16))  # Mondai 12-15
-    },
-    "N5": {
-        "vocabulary": list(range(1, 5)),  # Mondai 1-4
-        "grammar": list(range(5, 8)),     # Mondai 5-7
-        "reading": list(range(8, 11)),    # Mondai 8-10
-        "listening": list(range(11, 15))  # Mondai 11-14
-    }
-}
+from exam_corpus import EXAMS_DIR, MONDAI_PART_MAPPING, iter_exams, part_for, write_exam
 
 
 def get_part_for_mondai(level: str, mondai: int) -> str:
     """Get the part name for a given level and mondai number"""
-    mapping = MONDAI_PART_MAPPING.get(level)
-    if not mapping:
-        return None
-    
-    for part, mondai_list in mapping.items():
-        if mondai in mondai_list:
-            return part
-    return None
+    return part_for(level, mondai)
 
 
 def calculate_statistics(sections: List[Dict]) -> Dict:
@@ -73,11 +35,12 @@ def calculate_statistics(sections: List[Dict]) -> Dict:
     return stats
 
 
-def update_exam_file(file_path: Path) -> Dict:
+def update_exam_file(file_path: Path, data: Dict = None) -> Dict:
     """Update a single exam file with correct part assignments"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if data is None:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
         
         # Get level from filename or data
         level = data.get("level")
@@ -137,9 +100,7 @@ def update_exam_file(file_path: Path) -> Dict:
             updated = True
         
         # Save if updated
-        if updated:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+        if updated and write_exam(file_path, data):
             return {"status": "updated", "file": str(file_path), "level": level_str}
         else:
             return {"status": "ok", "file": str(file_path), "level": level_str}
@@ -148,7 +109,7 @@ def update_exam_file(file_path: Path) -> Dict:
         return {"status": "error", "message": str(e), "file": str(file_path)}
 
 
-def process_directory(base_path: Path) -> Dict:
+def process_directory(base_path: Path, workers: int = None) -> Dict:
     """Process all exam JSON files in the directory"""
     results = {
         "updated": [],
@@ -156,43 +117,40 @@ def process_directory(base_path: Path) -> Dict:
         "errors": []
     }
     
-    # Process each level
-    for level_dir in base_path.glob("N*"):
-        if not level_dir.is_dir():
-            continue
+    current_dir = None
+    for record in iter_exams(workers=workers, transform=update_exam_file,
+                             exams_dir=base_path):
+        if record.level != current_dir:
+            current_dir = record.level
+            print(f"\n📂 Processing {current_dir}...")
         
-        print(f"\n📂 Processing {level_dir.name}...")
+        if record.error:
+            result = {"status": "error", "message": record.error, "file": str(record.path)}
+        else:
+            result = record.data
+        status = result["status"]
         
-        # Process custom and official subdirectories
-        for subdir in ["custom", "official"]:
-            exam_dir = level_dir / subdir
-            if not exam_dir.exists():
-                continue
-            
-            json_files = list(exam_dir.glob("*.json"))
-            print(f"   Found {len(json_files)} files in {subdir}/")
-            
-            for json_file in json_files:
-                result = update_exam_file(json_file)
-                status = result["status"]
-                
-                if status == "updated":
-                    results["updated"].append(result)
-                    print(f"   ✅ Updated: {json_file.name}")
-                elif status == "ok":
-                    results["ok"].append(result)
-                elif status == "error":
-                    results["errors"].append(result)
-                    print(f"   ❌ Error: {json_file.name} - {result.get('message')}")
+        if status == "updated":
+            results["updated"].append(result)
+            print(f"   ✅ Updated: {record.name}")
+        elif status == "ok":
+            results["ok"].append(result)
+        elif status == "error":
+            results["errors"].append(result)
+            print(f"   ❌ Error: {record.name} - {result.get('message')}")
     
     return results
 
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Update and validate exam part assignments")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
     # Get the exams directory
-    script_dir = Path(__file__).parent
-    exams_dir = script_dir / "exams"
+    exams_dir = EXAMS_DIR
     
     if not exams_dir.exists():
         print(f"❌ Error: exams directory not found at {exams_dir}")
@@ -201,7 +159,7 @@ def main():
     print("🚀 Starting exam files update...")
     print(f"📁 Base directory: {exams_dir}")
     
-    results = process_directory(exams_dir)
+    results = process_directory(exams_dir, workers=args.workers)
     
     # Print summary
     print("\n" + "="*60)
@@ -4,43 +4,15 @@ Script to update part classification in all JLPT exam JSON files
 Version 2.0 - Updated mapping based on new requirements
 """
 
+import argparse
 import json
 import os
 from pathlib import Path
 
-# Updated MONDAI to PART mapping for each level
-MONDAI_PART_MAPPING = {
-    "N1": {
-        "vocabulary": list(range(1, 5)),    # Mondai 1-4
-        "grammar": list(range(5, 8)),       # Mondai 5-7
-        "reading": list(range(8, 14)),      # Mondai 8-13
-        "listening": list(range(14, 100))   # Mondai 14-last
-    },
-    "N2": {
-        "vocabulary": list(range(1, 7)),    # Mondai 1-6
-        "grammar": list(range(7, 10)),      # Mondai 7-9
-        "reading": list(range(10, 15)),     # Mondai 10-14
-        "listening": list(range(15, 100))   # Mondai 15-last
-    },
-    "N3": {
-        "vocabulary": list(range(1, 6)),    # Mondai 1-5
-        "grammar": list(range(6, 9)),       # Mondai 6-8
-        "reading": list(range(9, 13)),      # Mondai 9-12
-        "listening": list(range(13, 100))   # Mondai 13-last
-    },
-    "N4": {
-        "vocabulary": list(range(1, 6)),    # Mondai 1-5
-        "grammar": list(range(6, 9)),       # Mondai 6-8
-        "reading": list(range(9, 12)),      # Mondai 9-11
-        "listening": list(range(12, 100))   # Mondai 12-last
-    },
-    "N5": {
-        "vocabulary": list(range(1, 5)),    # Mondai 1-4
-        "grammar": list(range(5, 8)),       # Mondai 5-7
-        "reading": list(range(8, 11)),      # Mondai 8-10
-        "listening": list(range(11, 100))   # Mondai 11-last
-    }
-}
+from exam_corpus import LEVELS, MONDAI_PART_MAPPING, part_for, write_exam
+from exam_corpus.changeset import (
+    add_changeset_arguments, apply_changes, make_change, run_changeset_command
+)
 
 
 def get_part_from_mondai(level: str, mondai: int) -> str:
@@ -55,67 +27,78 @@ def get_part_from_mondai(level: str, mondai: int) -> str:
     Returns:
         Part name: 'vocabulary', 'grammar', 'reading', or 'listening'
     """
-    mapping = MONDAI_PART_MAPPING.get(level)
-    
-    if not mapping:
+    if level not in MONDAI_PART_MAPPING:
         raise ValueError(f"Unknown level: {level}")
     
-    # Check each part
-    if mondai in mapping["vocabulary"]:
-        return "vocabulary"
-    elif mondai in mapping["grammar"]:
-        return "grammar"
-    elif mondai in mapping["reading"]:
-        return "reading"
-    elif mondai in mapping["listening"]:
-        return "listening"
-    else:
+    part = part_for(level, mondai)
+    if part is None:
         raise ValueError(f"Mondai {mondai} not mapped for level {level}")
+    return part
+
+
+def plan_exam_parts(file_path: Path, data: dict) -> list:
+    """
+    Plan the part classification changes for a single exam without writing it.
+    
+    Args:
+        file_path: Path to the exam JSON file
+        data: Parsed contents of the file
+        
+    Returns:
+        List of changes (JSON pointer, old part, new part)
+        
+    Raises:
+        ValueError: If the level is invalid or a mondai is not mapped
+    """
+    # Get level from data
+    level = data.get('level')
+    if isinstance(level, int):
+        level = f"N{level}"
+    elif not level or not level.startswith('N'):
+        raise ValueError(f"Invalid level in {file_path.name}")
+    
+    # Check each section against the correct part
+    changes = []
+    for index, section in enumerate(data.get('sections', [])):
+        mondai = section.get('mondai')
+        if mondai:
+            correct_part = get_part_from_mondai(level, mondai)
+            if section.get('part') != correct_part:
+                pointer = f"/sections/{index}/part"
+                if 'part' in section:
+                    changes.append(make_change(pointer, old=section['part'], new=correct_part))
+                else:
+                    changes.append(make_change(pointer, new=correct_part))
+    return changes
 
 
-def update_exam_file(file_path: Path) -> bool:
+def update_exam_file(file_path: Path, data: dict = None) -> bool:
     """
     Update a single exam JSON file with correct part classification.
     
     Args:
         file_path: Path to the exam JSON file
+        data: Already parsed contents of the file (read from disk if None)
         
     Returns:
         True if file was updated, False otherwise
     """
     try:
         # Read the exam file
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if data is None:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
         
-        # Get level from data
-        level = data.get('level')
-        if isinstance(level, int):
-            level = f"N{level}"
-        elif not level or not level.startswith('N'):
-            print(f"⚠️  Invalid level in {file_path.name}")
+        try:
+            changes = plan_exam_parts(file_path, data)
+        except ValueError as e:
+            print(f"⚠️  Error in {file_path.name}: {e}")
             return False
         
-        # Update each section with correct part
-        updated = False
-        if 'sections' in data:
-            for section in data['sections']:
-                mondai = section.get('mondai')
-                if mondai:
-                    try:
-                        correct_part = get_part_from_mondai(level, mondai)
-                        if section.get('part') != correct_part:
-                            section['part'] = correct_part
-                            updated = True
-                    except ValueError as e:
-                        print(f"⚠️  Error in {file_path.name}: {e}")
-                        return False
-        
         # Write back if updated
-        if updated:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            return True
+        if changes:
+            apply_changes(data, changes)
+            return write_exam(file_path, data)
         
         return False
         
@@ -126,9 +109,14 @@ def update_exam_file(file_path: Path) -> bool:
 
 def main():
     """Main function to update all exam files."""
+    parser = argparse.ArgumentParser(description="Update part classification in all exam files")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    add_changeset_arguments(parser)
+    args = parser.parse_args()
     
     # Base directory for exams
-    base_dir = Path(__file__).parent / "exams"
+    base_dir = args.exams_dir
     
     if not base_dir.exists():
         print(f"❌ Exams directory not found: {base_dir}")
@@ -146,23 +134,12 @@ def main():
         "N5": {"total": 0, "updated": 0}
     }
     
-    # Process each level
-    for level in ["N1", "N2", "N3", "N4", "N5"]:
-        level_dir = base_dir / level
-        
-        if not level_dir.exists():
-            continue
-        
-        print(f"\n📂 Processing {level}...")
-        
-        # Find all JSON files recursively
-        json_files = list(level_dir.rglob("*.json"))
-        
-        for json_file in json_files:
-            stats[level]["total"] += 1
-            if update_exam_file(json_file):
-                stats[level]["updated"] += 1
-                print(f"  ✅ Updated: {json_file.name}")
+    # Plan every change in parallel, then apply them in one batched pass
+    counts = run_changeset_command(args, plan_exam_parts, LEVELS)
+    if counts is None:
+        return
+    for level, level_counts in counts.items():
+        stats.setdefault(level, {"total": 0, "updated": 0}).update(level_counts)
     
     # Print summary
     print("\n" + "=" * 60)
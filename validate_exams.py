@@ -3,206 +3,226 @@
 Script to validate exam files structure and part assignments
 """
 
+import argparse
 import json
-import os
+import sys
+from contextlib import redirect_stdout
 from pathlib import Path
 from collections import defaultdict
 
-# Mondai to Part mapping (Version 2.0 - Updated)
-MONDAI_PART_MAPPING = {
-    "N1": {
-        "vocabulary": list(range(1, 5)),    # Mondai 1-4
-        "grammar": list(range(5, 8)),       # Mondai 5-7
-        "reading": list(range(8, 14)),      # Mondai 8-13
-        "listening": list(range(14, 100))   # Mondai 14-last
-    },
-    "N2": {
-        "vocabulary": list(range(1, 7)),    # Mondai 1-6
-        "grammar": list(range(7, 10)),      # Mondai 7-9
-        "reading": list(range(10, 15)),     # Mondai 10-14
-        "listening": list(range(15, 100))   # Mondai 15-last
-    },
-    "N3": {
-        "vocabulary": list(range(1, 6)),    # Mondai 1-5
-        "grammar": list(range(6, 9)),       # Mondai 6-8
-        "reading": list(range(9, 13)),      # Mondai 9-12
-        "listening": list(range(13, 100))   # Mondai 13-last
-    },
-    "N4": {
-        "vocabulary": list(range(1, 6)),    # Mondai 1-5
-        "grammar": list(range(6, 9)),       # Mondai 6-8
-        "reading": list(range(9, 12)),      # Mondai 9-11
-        "listening": list(range(12, 100))   # Mondai 12-last
-    },
-    "N5": {
-        "vocabulary": list(range(1, 5)),    # Mondai 1-4
-        "grammar": list(range(5, 8)),       # Mondai 5-7
-        "reading": list(range(8, 11)),      # Mondai 8-10
-        "listening": list(range(11, 100))   # Mondai 11-last
-    }
-}
+from exam_corpus import EXAMS_DIR, Manifest, part_for, timing_report
+from exam_corpus.archive import ARCHIVE_PATH, update_archive
+from exam_corpus.validation import ERROR, RULES, RuleEngine, iter_findings, validate_file
+from exam_corpus.question_index import open_index
+from exam_corpus.statistics import (
+    COUNTS_VERSION, add_exam_counts, count_questions, new_statistics, save_statistics_json,
+    statistics_from_index
+)
 
 
-def validate_exam_file(file_path: Path) -> dict:
-    """Validate a single exam file"""
-    issues = []
-    
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except Exception as e:
-        return {"valid": False, "error": f"Cannot read file: {str(e)}"}
-    
-    # Check required fields
-    required_fields = ["id", "title", "level", "type", "sections"]
-    for field in required_fields:
-        if field not in data:
-            issues.append(f"Missing required field: {field}")
-    
-    level = data.get("level")
-    if level:
-        level_str = f"N{level}"
-    else:
-        issues.append("Level field is missing or invalid")
-        return {"valid": False, "issues": issues}
-    
-    if level_str not in MONDAI_PART_MAPPING:
-        issues.append(f"Unknown level: {level_str}")
-        return {"valid": False, "issues": issues}
-    
-    # Validate sections
-    sections = data.get("sections", [])
-    if not sections:
-        issues.append("No sections found")
-    
-    seen_mondai = set()
-    for idx, section in enumerate(sections):
-        # Check section structure
-        if "mondai" not in section:
-            issues.append(f"Section {idx}: Missing mondai field")
-            continue
-        
-        if "part" not in section:
-            issues.append(f"Section {idx} (Mondai {section.get('mondai')}): Missing part field")
-        
-        if "questions" not in section:
-            issues.append(f"Section {idx} (Mondai {section.get('mondai')}): Missing questions field")
-        
-        mondai = section.get("mondai")
-        
-        # Check for duplicate mondai
-        if mondai in seen_mondai:
-            issues.append(f"Duplicate mondai: {mondai}")
-        seen_mondai.add(mondai)
-        
-        # Validate part assignment
-        expected_part = None
-        for part, mondai_list in MONDAI_PART_MAPPING[level_str].items():
-            if mondai in mondai_list:
-                expected_part = part
-                break
-        
-        actual_part = section.get("part")
-        if expected_part and actual_part != expected_part:
-            issues.append(
-                f"Mondai {mondai}: Incorrect part '{actual_part}', should be '{expected_part}'"
-            )
-        elif not expected_part:
-            issues.append(f"Mondai {mondai}: Not in mapping for level {level_str}")
-    
-    # Validate statistics
-    if "statistics" in data:
-        stats = data["statistics"]
-        if "by_part" in stats:
-            # Recalculate and compare
-            actual_stats = defaultdict(int)
-            for section in sections:
-                part = section.get("part")
-                if part:
-                    actual_stats[part] += len(section.get("questions", []))
-            
-            reported_stats = stats.get("by_part", {})
-            for part in ["vocabulary", "grammar", "reading", "listening"]:
-                if reported_stats.get(part) != actual_stats.get(part, 0):
-                    issues.append(
-                        f"Statistics mismatch for {part}: "
-                        f"reported {reported_stats.get(part)}, actual {actual_stats.get(part, 0)}"
-                    )
-    
+def validate_exam_file(file_path: Path, data: dict = None) -> dict:
+    """Validate a single exam file (pass data when it is already parsed)"""
+    findings = validate_file(file_path, data)
     return {
-        "valid": len(issues) == 0,
-        "issues": issues,
-        "level": level_str,
-        "sections": len(sections)
+        "valid": not any(f["severity"] == ERROR for f in findings),
+        "issues": [f["message"] for f in findings],
+        "findings": findings
     }
 
 
+def part_mismatches_from_index(index) -> dict:
+    """
+    Count questions whose section part disagrees with the mondai mapping,
+    as one group-by over the question index.
+
+    Returns:
+        (level, mondai, actual part, expected part) -> number of questions
+    """
+    mismatches = {}
+    for (level, mondai, part), count in index.count_by("level", "mondai", "part").items():
+        expected = part_for(level, mondai)
+        if expected != part:
+            mismatches[(level, mondai, part, expected)] = count
+    return mismatches
+
+
 def main():
     """Main validation function"""
-    script_dir = Path(__file__).parent
-    exams_dir = script_dir / "exams"
-    
-    if not exams_dir.exists():
-        print(f"❌ Error: exams directory not found")
+    parser = argparse.ArgumentParser(description="Validate exam files")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--stats", action="store_true",
+                        help="also regenerate exam_statistics.json from the same pass")
+    parser.add_argument("--timings", action="store_true",
+                        help="print per-file load timings")
+    parser.add_argument("--full", action="store_true",
+                        help="ignore the manifest and re-validate every file")
+    parser.add_argument("--index", action="store_true",
+                        help="run the aggregate checks and --stats from the columnar question index")
+    parser.add_argument("--archive", type=Path, nargs="?", const=ARCHIVE_PATH, default=None,
+                        metavar="FILE",
+                        help=f"read changed exams from the single-file archive, updated first "
+                             f"(default: {ARCHIVE_PATH.name} next to the exams tree)")
+    parser.add_argument("--format", choices=["text", "jsonl"], default="text",
+                        help="jsonl: one JSON finding per line on stdout (file, rule, pointer, "
+                             "severity, message), summary on stderr")
+    parser.add_argument("--warnings", action="store_true",
+                        help="also list warnings in text mode (default: errors only)")
+    parser.add_argument("--fail-fast", action="store_true",
+                        help="stop at the first file with an error")
+    parser.add_argument("--max-issues", type=int, default=None, metavar="N",
+                        help="stop after N findings")
+    parser.add_argument("--rules", nargs="+", default=None, metavar="RULE",
+                        help="run only these rules (default: all)")
+    parser.add_argument("--skip-rules", nargs="+", default=[], metavar="RULE",
+                        help="disable these rules")
+    parser.add_argument("--list-rules", action="store_true",
+                        help="list the available rules and exit")
+    parser.add_argument("--rule-timings", action="store_true",
+                        help="print the cumulative time spent in each rule")
+    args = parser.parse_args()
+
+    if args.list_rules:
+        for rule in RULES.values():
+            print(f"{rule.id:<22} {rule.severity:<8} {rule.description}")
         return
-    
-    print("🔍 Starting validation...\n")
+
+    unknown = [r for r in (args.rules or []) + args.skip_rules if r not in RULES]
+    if unknown:
+        print(f"❌ Error: unknown rule(s): {', '.join(unknown)} (see --list-rules)", file=sys.stderr)
+        sys.exit(2)
+    engine = RuleEngine(r for r in (args.rules or RULES) if r not in args.skip_rules)
+
+    # Exit codes: 0 = no errors, 1 = errors found, 2 = cannot run
+    if not EXAMS_DIR.exists():
+        print(f"❌ Error: exams directory not found: {EXAMS_DIR}", file=sys.stderr)
+        sys.exit(2)
+
+    jsonl = args.format == "jsonl"
+    # In jsonl mode stdout carries only findings
+    out = sys.stderr if jsonl else sys.stdout
+    print("🔍 Starting validation...", file=out)
+    if len(engine.rules) < len(RULES):
+        print(f"   Rules: {', '.join(rule.id for rule in engine.rules)}", file=out)
+    if args.archive is not None:
+        report = update_archive(args.archive, EXAMS_DIR)
+        print(f"🗄️  Archive {args.archive.name}: {report['entries']} exams, "
+              f"{report['written']} written", file=out)
+    print(file=out)
     
     total_files = 0
     valid_files = 0
     invalid_files = 0
+    error_count = 0
+    warning_count = 0
     level_stats = defaultdict(lambda: {"valid": 0, "invalid": 0})
+    exam_stats = new_statistics() if args.stats and not args.index else None
+    timings = []
+    rule_seconds = {}
+    outcome = {}
+    current_level = None
+    
+    # Cached findings are invalidated whenever the checks or the mapping change
+    analyses = {}
+    if exam_stats is not None:
+        analyses["counts"] = (count_questions, COUNTS_VERSION)
+    manifest = Manifest()
     
-    # Process each level
-    for level_dir in sorted(exams_dir.glob("N*")):
-        if not level_dir.is_dir():
-            continue
+    results = iter_findings(manifest, workers=args.workers, full=args.full,
+                            fail_fast=args.fail_fast, max_issues=args.max_issues,
+                            analyses=analyses, engine=engine, rule_seconds=rule_seconds,
+                            outcome=outcome, archive=args.archive)
+    for record, findings in results:
+        if not record.cached:
+            timings.append(record)
+        if record.level != current_level and not jsonl:
+            current_level = record.level
+            print(f"📂 Validating {current_level}...")
         
-        print(f"📂 Validating {level_dir.name}...")
+        total_files += 1
+        errors = sum(1 for f in findings if f["severity"] == ERROR)
+        error_count += errors
+        warning_count += len(findings) - errors
+        if exam_stats is not None and not record.error:
+            add_exam_counts(exam_stats, record.level, record.source, record.data["counts"])
         
-        for subdir in ["custom", "official"]:
-            exam_dir = level_dir / subdir
-            if not exam_dir.exists():
-                continue
-            
-            json_files = list(exam_dir.glob("*.json"))
-            
-            for json_file in json_files:
-                total_files += 1
-                result = validate_exam_file(json_file)
-                
-                if result.get("valid"):
-                    valid_files += 1
-                    level_stats[level_dir.name]["valid"] += 1
-                else:
-                    invalid_files += 1
-                    level_stats[level_dir.name]["invalid"] += 1
-                    print(f"   ⚠️  {json_file.name}:")
-                    for issue in result.get("issues", [])[:5]:
-                        print(f"      - {issue}")
-                    if len(result.get("issues", [])) > 5:
-                        print(f"      ... and {len(result.get('issues', [])) - 5} more issues")
+        if errors == 0:
+            valid_files += 1
+            level_stats[record.level]["valid"] += 1
+        else:
+            invalid_files += 1
+            level_stats[record.level]["invalid"] += 1
+
+        if jsonl:
+            for finding in findings:
+                print(json.dumps(finding, ensure_ascii=False))
+        else:
+            shown = findings if args.warnings else [f for f in findings if f["severity"] == ERROR]
+            if shown:
+                print(f"   ⚠️  {record.name}:")
+                for finding in shown[:5]:
+                    print(f"      - {finding['message']}")
+                if len(shown) > 5:
+                    print(f"      ... and {len(shown) - 5} more issues")
     
     # Print summary
-    print("\n" + "="*60)
-    print("📊 VALIDATION SUMMARY")
-    print("="*60)
-    print(f"✅ Valid files: {valid_files}")
-    print(f"❌ Invalid files: {invalid_files}")
-    print(f"📝 Total files: {total_files}")
-    print(f"✓  Success rate: {valid_files/total_files*100:.1f}%")
+    print("\n" + "="*60, file=out)
+    print("📊 VALIDATION SUMMARY", file=out)
+    print("="*60, file=out)
+    print(f"✅ Valid files: {valid_files}", file=out)
+    print(f"❌ Invalid files: {invalid_files}", file=out)
+    print(f"📝 Total files: {total_files}", file=out)
+    print(f"🧾 Findings: {error_count} errors, {warning_count} warnings"
+          + ("" if jsonl or args.warnings or not warning_count else " (list them with --warnings)"),
+          file=out)
+    if total_files:
+        print(f"✓  Success rate: {valid_files/total_files*100:.1f}%", file=out)
     
-    print("\n📊 By Level:")
+    print("\n📊 By Level:", file=out)
     for level in sorted(level_stats.keys()):
         stats = level_stats[level]
         total = stats["valid"] + stats["invalid"]
         print(f"   {level}: {stats['valid']}/{total} valid "
-              f"({stats['valid']/total*100:.1f}%)")
+              f"({stats['valid']/total*100:.1f}%)", file=out)
     
     if invalid_files == 0:
-        print("\n✨ All files are valid!")
+        print("\n✨ All files are valid!", file=out)
     else:
-        print(f"\n⚠️  Found {invalid_files} files with issues")
+        print(f"\n⚠️  Found {invalid_files} files with issues", file=out)
+    stopped = outcome["stopped"]
+    if stopped:
+        print("⏹️  Stopped early (--fail-fast / --max-issues)", file=out)
+
+    manifest.save()
+    if args.index:
+        with redirect_stdout(out), open_index(workers=args.workers) as index:
+            mismatches = part_mismatches_from_index(index)
+            if args.stats:
+                exam_stats = statistics_from_index(index)
+        print(f"\n🧮 Part assignment check ({index.rows:,} questions from the index):", file=out)
+        if not mismatches:
+            print("   ✅ Every question's part matches its mondai", file=out)
+        for (level, mondai, part, expected), count in sorted(mismatches.items(), key=str):
+            print(f"   ❌ {level} mondai {mondai}: {count:,} questions in '{part}', expected '{expected}'",
+                  file=out)
+        error_count += len(mismatches)
+    if exam_stats is not None and not stopped:
+        with redirect_stdout(out):
+            save_statistics_json(exam_stats)
+
+    if args.timings:
+        print(f"\n⏱️  Load timings ({total_files - len(timings)} files unchanged, served from manifest):",
+              file=out)
+        for line in timing_report(timings):
+            print(f"   {line}", file=out)
+
+    if args.rule_timings:
+        print(f"\n⏱️  Rule timings ({len(timings)} files validated this run):", file=out)
+        total = sum(rule_seconds.values()) or 1e-9
+        for rule_id, seconds in sorted(rule_seconds.items(), key=lambda item: -item[1]):
+            print(f"   {rule_id:<22} {seconds * 1000:9.1f} ms  {seconds / total * 100:5.1f}%", file=out)
+
+    sys.exit(1 if error_count else 0)
 
 
 if __name__ == "__main__":